@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Package gestionnaire_pi.core.algorithms (algorithmes Processing du plugin)"""
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Tampon + fusion par tuiles, en parallèle
+*************************/
+"""
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+from qgis.PyQt.QtCore import QThread
+from qgis.core import (
+    Qgis, QgsFeature, QgsFeatureSink, QgsGeometry, QgsProcessing,
+    QgsProcessingAlgorithm, QgsProcessingException,
+    QgsProcessingParameterDistance, QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSink, QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterNumber, QgsSpatialIndex, QgsWkbTypes,
+)
+
+
+def _buffer_dissolve(geoms, distance, segments, end_cap, join, miter, tolerance=0.0):
+    """
+    Tampon de chaque géométrie puis fusion : liste des parties obtenues.
+    Avec *tolerance*, le tampon porte sur une copie simplifiée (Douglas-Peucker)
+    élargie d’autant : le résultat contient toujours le tampon exact et ne
+    le dépasse pas de plus de 2 × tolerance.
+    """
+    if tolerance > 0:
+        geoms = [g.simplify(tolerance) for g in geoms]
+        distance += tolerance
+    buffers = [g.buffer(distance, segments, end_cap, join, miter) for g in geoms]
+    merged = QgsGeometry.unaryUnion([b for b in buffers if not b.isEmpty()])
+    if merged.isNull() or merged.isEmpty():
+        return []
+    return [QgsGeometry(part.clone()) for part in merged.constParts()]
+
+
+class _Components:
+    """Union-find minimal sur des indices de parties."""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def join(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[rj] = ri
+
+
+def _connected_groups(n, pairs):
+    """
+    Regroupe les indices 0..n-1 reliés (même indirectement) par *pairs* ;
+    groupes et indices dans l’ordre de première apparition.
+    """
+    components = _Components(n)
+    for i, j in pairs:
+        components.join(i, j)
+    groups = {}
+    for i in range(n):
+        groups.setdefault(components.find(i), []).append(i)
+    return list(groups.values())
+
+
+class BufferDissolveTiledAlgorithm(QgsProcessingAlgorithm):
+    """
+    Équivalent de `native:buffer` avec DISSOLVE=true, calculé par tuiles :
+    chaque entité est rattachée à la tuile de son centre d’emprise, les
+    tuiles sont tamponnées et fusionnées en parallèle, puis seules les
+    parties qui touchent une partie d’une autre tuile sont refusionnées.
+    Sortie identique au natif : une entité multipolygone portant les
+    attributs de la première entité.
+    """
+    INPUT = 'INPUT'
+    DISTANCE = 'DISTANCE'
+    SEGMENTS = 'SEGMENTS'
+    END_CAP_STYLE = 'END_CAP_STYLE'
+    JOIN_STYLE = 'JOIN_STYLE'
+    MITER_LIMIT = 'MITER_LIMIT'
+    TILE_SIZE = 'TILE_SIZE'
+    SIMPLIFY_TOLERANCE = 'SIMPLIFY_TOLERANCE'
+    OUTPUT = 'OUTPUT'
+
+    # tuiles visées par fil de calcul quand TILE_SIZE = 0
+    TILES_PER_THREAD = 4
+    # même ordre que les énumérations de native:buffer
+    END_CAPS = [Qgis.EndCapStyle.Round, Qgis.EndCapStyle.Flat, Qgis.EndCapStyle.Square]
+    JOINS = [Qgis.JoinStyle.Round, Qgis.JoinStyle.Miter, Qgis.JoinStyle.Bevel]
+
+    def name(self):
+        return 'bufferdissolvetiled'
+
+    def displayName(self):
+        return 'Tampon fusionné par tuiles'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Tampon avec fusion, calculé tuile par tuile sur plusieurs "
+                "fils puis raccordé aux bords des tuiles. Même résultat que "
+                "« Tampon » avec « Regrouper le résultat ». Taille de tuile "
+                "à 0 : choisie selon le nombre de processeurs. Une tolérance "
+                "de simplification > 0 accélère le tampon sur une copie "
+                "simplifiée (zone élargie de 2 × tolérance au plus, jamais "
+                "réduite) ; les entités d’entrée ne sont pas modifiées.")
+
+    def createInstance(self):
+        return BufferDissolveTiledAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, 'Couche en entrée', [QgsProcessing.TypeVectorAnyGeometry]))
+        self.addParameter(QgsProcessingParameterDistance(
+            self.DISTANCE, 'Distance', defaultValue=10.0, parentParameterName=self.INPUT))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.SEGMENTS, 'Segments', QgsProcessingParameterNumber.Integer,
+            defaultValue=5, minValue=1))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.END_CAP_STYLE, 'Style d’extrémité', ['Rond', 'Plat', 'Carré'],
+            defaultValue=0))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.JOIN_STYLE, 'Style de jointure', ['Rond', 'Angle droit', 'Biseau'],
+            defaultValue=0))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.MITER_LIMIT, 'Limite d’angle', QgsProcessingParameterNumber.Double,
+            defaultValue=2.0, minValue=1.0))
+        self.addParameter(QgsProcessingParameterDistance(
+            self.TILE_SIZE, 'Taille des tuiles (0 = automatique)', defaultValue=0.0,
+            parentParameterName=self.INPUT, minValue=0.0))
+        self.addParameter(QgsProcessingParameterDistance(
+            self.SIMPLIFY_TOLERANCE, 'Tolérance de simplification (0 = aucune)',
+            defaultValue=0.0, parentParameterName=self.INPUT, minValue=0.0,
+            optional=True))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, 'Tampon', QgsProcessing.TypeVectorPolygon))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        distance = self.parameterAsDouble(parameters, self.DISTANCE, context)
+        segments = self.parameterAsInt(parameters, self.SEGMENTS, context)
+        end_cap = self.END_CAPS[self.parameterAsEnum(parameters, self.END_CAP_STYLE, context)]
+        join = self.JOINS[self.parameterAsEnum(parameters, self.JOIN_STYLE, context)]
+        miter = self.parameterAsDouble(parameters, self.MITER_LIMIT, context)
+        tile_size = self.parameterAsDouble(parameters, self.TILE_SIZE, context)
+        tolerance = self.parameterAsDouble(parameters, self.SIMPLIFY_TOLERANCE, context)
+
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, source.fields(),
+            QgsWkbTypes.MultiPolygon, source.sourceCrs())
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        # 1. Lecture et rattachement des entités aux tuiles --------------
+        threads = max(QThread.idealThreadCount(), 1)
+        extent = source.sourceExtent()
+        if tile_size <= 0:
+            n = math.ceil(math.sqrt(threads * self.TILES_PER_THREAD))
+            tile_size = max(extent.width(), extent.height()) / n or 1.0
+
+        tiles = {}
+        first_attributes = None
+        for feat in source.getFeatures():
+            if feedback.isCanceled():
+                raise QgsProcessingException('Tampon annulé.')
+            if not feat.hasGeometry():
+                continue
+            if first_attributes is None:
+                first_attributes = feat.attributes()
+            geom = feat.geometry()
+            c = geom.boundingBox().center()
+            key = (int((c.x() - extent.xMinimum()) // tile_size),
+                   int((c.y() - extent.yMinimum()) // tile_size))
+            tiles.setdefault(key, []).append(geom)
+        if first_attributes is None:
+            return {self.OUTPUT: dest_id}
+        feedback.setProgress(10)
+
+        # 2. Tampon + fusion par tuile, en parallèle ----------------------
+        keys = list(tiles)
+        parts, owner = [], []
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(_buffer_dissolve, tiles[k], distance,
+                                   segments, end_cap, join, miter, tolerance)
+                       for k in keys]
+            for done, (key, future) in enumerate(zip(keys, futures), 1):
+                if feedback.isCanceled():
+                    for f in futures:
+                        f.cancel()
+                    raise QgsProcessingException('Tampon annulé.')
+                for part in future.result():
+                    parts.append(part)
+                    owner.append(key)
+                feedback.setProgress(10 + 70 * done / len(keys))
+        tiles.clear()
+
+        # 3. Raccord : parties de tuiles différentes qui se touchent ------
+        index = QgsSpatialIndex()
+        for i, part in enumerate(parts):
+            index.addFeature(i, part.boundingBox())
+        touching = ((i, j) for i, part in enumerate(parts)
+                    for j in index.intersects(part.boundingBox())
+                    if j > i and owner[j] != owner[i] and part.intersects(parts[j]))
+        groups = [[parts[i] for i in g] for g in _connected_groups(len(parts), touching)]
+        to_merge = [g for g in groups if len(g) > 1]
+        final_parts = [g[0] for g in groups if len(g) == 1]
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for merged in pool.map(QgsGeometry.unaryUnion, to_merge):
+                final_parts.extend(QgsGeometry(p.clone()) for p in merged.constParts())
+        feedback.setProgress(95)
+
+        # 4. Une entité, comme le natif avec DISSOLVE ----------------------
+        result = QgsGeometry.collectGeometry(final_parts)
+        result.convertToMultiType()
+        out = QgsFeature(source.fields())
+        out.setGeometry(result)
+        out.setAttributes(first_attributes)
+        sink.addFeature(out, QgsFeatureSink.FastInsert)
+        feedback.setProgress(100)
+        return {self.OUTPUT: dest_id}
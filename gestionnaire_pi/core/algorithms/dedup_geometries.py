@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Suppression des géométries en double par hachage
+*************************/
+"""
+import math
+
+from qgis.core import (
+    QgsFeatureSink, QgsProcessing, QgsProcessingAlgorithm,
+    QgsProcessingException, QgsProcessingOutputNumber,
+    QgsProcessingParameterDistance, QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFeatureSource,
+)
+
+
+def bbox_keys(geom, tolerance=0.0):
+    """
+    Clé de rangement d’une géométrie et clés où chercher ses doublons.
+    Deux géométries égales au sens GEOS ont la même emprise : à tolérance
+    0, la clé est l’emprise exacte. À une distance de Hausdorff ≤
+    *tolerance*, les coins bas-gauche des emprises sont à ≤ *tolerance*
+    l’un de l’autre : la clé est la maille du coin, et les mailles
+    voisines sont aussi consultées.
+    """
+    box = geom.boundingBox()
+    if tolerance <= 0:
+        key = (box.xMinimum(), box.yMinimum(), box.xMaximum(), box.yMaximum())
+        return key, [key]
+    i = math.floor(box.xMinimum() / tolerance)
+    j = math.floor(box.yMinimum() / tolerance)
+    return (i, j), [(i + di, j + dj) for di in (-1, 0, 1) for dj in (-1, 0, 1)]
+
+
+class DedupGeometriesAlgorithm(QgsProcessingAlgorithm):
+    """
+    Remplace `native:deleteduplicategeometries` : au lieu d’un index
+    spatial construit sur toute la couche avant la comparaison, chaque
+    géométrie est rangée en une passe dans une table de hachage par
+    emprise (voir `bbox_keys`), et n’est comparée qu’aux géométries
+    conservées des mêmes clés. Le test reste celui du natif (égalité GEOS) :
+    à tolérance 0, les mêmes doublons sont supprimés. Avec une tolérance,
+    la distance de Hausdorff ≤ tolérance remplace l’égalité.
+    La première entité d’un groupe est conservée (le natif en garde une,
+    selon l’ordre de sa table interne).
+    """
+    INPUT = 'INPUT'
+    TOLERANCE = 'TOLERANCE'
+    OUTPUT = 'OUTPUT'
+    DUPLICATE_COUNT = 'DUPLICATE_COUNT'
+    RETAINED_COUNT = 'RETAINED_COUNT'
+
+    def name(self):
+        return 'dedupgeometries'
+
+    def displayName(self):
+        return 'Supprimer les doublons (hachage)'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Supprime les entités dont la géométrie reprend celle d’une "
+                "entité précédente, quel que soit le sens de numérisation. "
+                "Tolérance à 0 : mêmes doublons que « Supprimer les "
+                "géométries en double » (égalité géométrique) ; au-delà : "
+                "doublons à la tolérance près (distance de Hausdorff). La "
+                "première entité de chaque groupe est conservée. Les "
+                "entités sans géométrie sont conservées. Le nombre de "
+                "doublons supprimés est rapporté.")
+
+    def createInstance(self):
+        return DedupGeometriesAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, 'Couche en entrée', [QgsProcessing.TypeVectorAnyGeometry]))
+        self.addParameter(QgsProcessingParameterDistance(
+            self.TOLERANCE, 'Tolérance (0 = doublons exacts)', defaultValue=0.0,
+            parentParameterName=self.INPUT, minValue=0.0))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, 'Sans doublons', QgsProcessing.TypeVectorAnyGeometry))
+        self.addOutput(QgsProcessingOutputNumber(
+            self.DUPLICATE_COUNT, 'Doublons supprimés'))
+        self.addOutput(QgsProcessingOutputNumber(
+            self.RETAINED_COUNT, 'Entités conservées'))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        tolerance = self.parameterAsDouble(parameters, self.TOLERANCE, context)
+
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, source.fields(),
+            source.wkbType(), source.sourceCrs())
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        seen = {}           # clé d’emprise → géométries conservées
+        duplicates = retained = 0
+        count = source.featureCount()
+        step = 100.0 / count if count > 0 else 0
+        for i, feat in enumerate(source.getFeatures(), 1):
+            if feedback.isCanceled():
+                raise QgsProcessingException('Suppression des doublons annulée.')
+            feedback.setProgress(i * step)
+            if feat.hasGeometry():
+                geom = feat.geometry()
+                key, neighbours = bbox_keys(geom, tolerance)
+                kept = (other for k in neighbours for other in seen.get(k, ()))
+                if self._is_duplicate(geom, kept, tolerance):
+                    duplicates += 1
+                    continue
+                seen.setdefault(key, []).append(geom)
+            sink.addFeature(feat, QgsFeatureSink.FastInsert)
+            retained += 1
+
+        feedback.pushInfo(f"{duplicates} doublon(s) supprimé(s), {retained} entité(s) conservée(s).")
+        return {
+            self.OUTPUT: dest_id,
+            self.DUPLICATE_COUNT: duplicates,
+            self.RETAINED_COUNT: retained,
+        }
+
+    @staticmethod
+    def _is_duplicate(geom, candidates, tolerance):
+        """Vrai si *geom* double l’une des géométries *candidates*."""
+        for other in candidates:
+            if tolerance > 0:
+                if geom.hausdorffDistance(other) <= tolerance:
+                    return True
+            elif geom.isGeosEqual(other):
+                return True
+        return False
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Export CSV au format final (une seule passe)
+*************************/
+"""
+import csv
+import os
+
+from qgis.PyQt.QtCore import QDate, QDateTime, QTime, Qt
+from qgis.core import (
+    NULL, QgsFeatureRequest, QgsProcessing, QgsProcessingAlgorithm,
+    QgsProcessingException, QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFileDestination, QgsProcessingParameterString,
+)
+
+
+def csv_value(value) -> str:
+    """Texte brut d’un attribut : NULL → vide, dates ISO, le reste en str()."""
+    if value is None or value == NULL:
+        return ''
+    if isinstance(value, (QDate, QDateTime, QTime)):
+        return value.toString(Qt.ISODate)
+    return str(value)
+
+
+def csv_writer(f, delimiter=';'):
+    """Écrivain CSV du format livré : sans guillemets, séparateurs échappés par « \\ »."""
+    return csv.writer(f, delimiter=delimiter, quoting=csv.QUOTE_NONE, escapechar='\\')
+
+
+class ExportCsvAlgorithm(QgsProcessingAlgorithm):
+    """
+    Écrit directement le CSV livré (UTF-8, délimiteur « ; », aucune
+    protection par guillemets) en lisant la couche une seule fois, sans
+    géométrie. Remplace le couple `savefeatures` + ré-écriture Python.
+    """
+    INPUT = 'INPUT'
+    DELIMITER = 'DELIMITER'
+    OUTPUT = 'OUTPUT'
+
+    def name(self):
+        return 'exportcsv'
+
+    def displayName(self):
+        return 'Export CSV (format final)'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Exporte les attributs de la couche en CSV UTF-8, sans "
+                "guillemets, en un seul passage (les séparateurs présents "
+                "dans les valeurs sont échappés par « \\ »).")
+
+    def createInstance(self):
+        return ExportCsvAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, 'Couche à exporter', [QgsProcessing.TypeVector]))
+        self.addParameter(QgsProcessingParameterString(
+            self.DELIMITER, 'Délimiteur', defaultValue=';'))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.OUTPUT, 'Fichier CSV', 'CSV (*.csv)'))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        delimiter = self.parameterAsString(parameters, self.DELIMITER, context) or ';'
+        path = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
+
+        count = source.featureCount()
+        step = 100.0 / count if count > 0 else 0
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+
+        # écrit en « .part » puis renommé : un arrêt laisse le CSV précédent
+        part = path + '.part'
+        try:
+            with open(part, 'w', encoding='utf-8', newline='') as f:
+                w = csv_writer(f, delimiter)
+                w.writerow(source.fields().names())
+                for i, feat in enumerate(source.getFeatures(request)):
+                    if feedback.isCanceled():
+                        raise QgsProcessingException('Export CSV annulé.')
+                    w.writerow([csv_value(v) for v in feat.attributes()])
+                    feedback.setProgress(i * step)
+            os.replace(part, path)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+        return {self.OUTPUT: path}
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Jointures par plus proche / par localisation sur un index partagé
+*************************/
+"""
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (
+    QgsFeature, QgsFeatureRequest, QgsFeatureSink,
+    QgsField, QgsFields, QgsGeometry, QgsProcessing, QgsProcessingAlgorithm,
+    QgsProcessingException, QgsProcessingParameterDistance,
+    QgsProcessingParameterEnum, QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFeatureSource, QgsProcessingParameterField,
+    QgsProcessingParameterNumber, QgsProcessingParameterString,
+    QgsProcessingUtils, QgsSpatialIndex,
+)
+
+
+def _prefixed(fields, names, prefix):
+    """Champs *names* de *fields* (tous si vide), renommés avec *prefix*."""
+    out = QgsFields()
+    indices = []
+    for i, field in enumerate(fields):
+        if names and field.name() not in names:
+            continue
+        field = QgsField(field)
+        field.setName(prefix + field.name())
+        out.append(field)
+        indices.append(i)
+    return out, indices
+
+
+class IndexedJoinAlgorithm(QgsProcessingAlgorithm):
+    """
+    Remplace plusieurs `native:joinbynearest` / `native:joinattributesbylocation`
+    dirigés vers la même couche : l’index spatial de la couche jointe (avec
+    ses géométries et ses attributs) est construit une seule fois par SCR
+    d’entrée (une fois quand toutes les couches partagent le même), puis
+    chaque couche en entrée est lue une fois et écrite dans sa propre
+    sortie. Comme avec les natifs, la couche jointe est reprojetée dans le
+    SCR de l’entrée : distances et coordonnées sont dans ce SCR. Les champs
+    produits sont ceux des natifs (mêmes noms, mêmes champs n / distance /
+    feature_x … pour le plus proche), les entités sans correspondance sont
+    conservées avec des attributs NULL.
+    """
+    JOIN = 'JOIN'
+    NEAREST_INPUT = 'NEAREST_INPUT_{}'
+    NEAREST_OUTPUT = 'NEAREST_OUTPUT_{}'
+    NEAREST_FIELDS = 'NEAREST_FIELDS'
+    NEAREST_PREFIX = 'NEAREST_PREFIX'
+    NEIGHBORS = 'NEIGHBORS'
+    MAX_DISTANCE = 'MAX_DISTANCE'
+    INTERSECT_INPUT = 'INTERSECT_INPUT_{}'
+    INTERSECT_OUTPUT = 'INTERSECT_OUTPUT_{}'
+    INTERSECT_PREFIX = 'INTERSECT_PREFIX_{}'
+    INTERSECT_FIELDS = 'INTERSECT_FIELDS'
+    PREDICATE = 'PREDICATE'
+
+    # nombre d’emplacements de chaque type (entrées et sorties facultatives)
+    SLOTS = (1, 2)
+    # mêmes indices que PREDICATE de native:joinattributesbylocation
+    PREDICATES = [
+        ('intersects', 'intersecte'),
+        ('contains', 'contient'),
+        ('isEqual', 'est égal'),
+        ('touches', 'touche'),
+        ('overlaps', 'chevauche'),
+        ('within', 'est à l’intérieur'),
+        ('crosses', 'croise'),
+    ]
+
+    def name(self):
+        return 'indexedjoin'
+
+    def displayName(self):
+        return 'Jointures sur index partagé'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Joint jusqu’à deux couches par plus proche voisin (distance "
+                "maximale) et deux couches par localisation (attributs de la "
+                "première entité correspondante) à la même couche, dont "
+                "l’index spatial n’est construit qu’une fois. Chaque entrée "
+                "renseignée produit sa propre sortie.")
+
+    def createInstance(self):
+        return IndexedJoinAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.JOIN, 'Couche à joindre', [QgsProcessing.TypeVectorAnyGeometry]))
+
+        # Plus proche voisin ----------------------------------------------
+        for n in self.SLOTS:
+            self.addParameter(QgsProcessingParameterFeatureSource(
+                self.NEAREST_INPUT.format(n), f'Plus proche : entrée {n}',
+                [QgsProcessing.TypeVectorAnyGeometry], optional=True))
+        self.addParameter(QgsProcessingParameterField(
+            self.NEAREST_FIELDS, 'Plus proche : champs à copier (vide = tous)',
+            parentLayerParameterName=self.JOIN, allowMultiple=True, optional=True))
+        self.addParameter(QgsProcessingParameterString(
+            self.NEAREST_PREFIX, 'Plus proche : préfixe', defaultValue='',
+            optional=True))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.NEIGHBORS, 'Nombre maximal de voisins',
+            QgsProcessingParameterNumber.Integer, defaultValue=1, minValue=1))
+        self.addParameter(QgsProcessingParameterDistance(
+            self.MAX_DISTANCE, 'Distance maximale (0 = aucune)', defaultValue=0.0,
+            parentParameterName=self.NEAREST_INPUT.format(1), minValue=0.0))
+
+        # Par localisation ------------------------------------------------
+        for n in self.SLOTS:
+            self.addParameter(QgsProcessingParameterFeatureSource(
+                self.INTERSECT_INPUT.format(n), f'Localisation : entrée {n}',
+                [QgsProcessing.TypeVectorAnyGeometry], optional=True))
+            self.addParameter(QgsProcessingParameterString(
+                self.INTERSECT_PREFIX.format(n), f'Localisation : préfixe {n}',
+                defaultValue='', optional=True))
+        self.addParameter(QgsProcessingParameterField(
+            self.INTERSECT_FIELDS, 'Localisation : champs à copier (vide = tous)',
+            parentLayerParameterName=self.JOIN, allowMultiple=True, optional=True))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.PREDICATE, 'Prédicat géométrique', [p[1] for p in self.PREDICATES],
+            allowMultiple=True, defaultValue=[0]))
+
+        for n in self.SLOTS:
+            self.addParameter(QgsProcessingParameterFeatureSink(
+                self.NEAREST_OUTPUT.format(n), f'Plus proche {n}',
+                QgsProcessing.TypeVectorAnyGeometry, optional=True))
+        for n in self.SLOTS:
+            self.addParameter(QgsProcessingParameterFeatureSink(
+                self.INTERSECT_OUTPUT.format(n), f'Localisation {n}',
+                QgsProcessing.TypeVectorAnyGeometry, optional=True))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        join = self.parameterAsSource(parameters, self.JOIN, context)
+        if join is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.JOIN))
+
+        jobs = []       # (type, source, nom de sortie, préfixe)
+        for n in self.SLOTS:
+            source = self.parameterAsSource(parameters, self.NEAREST_INPUT.format(n), context)
+            if source is not None:
+                jobs.append(('nearest', source, self.NEAREST_OUTPUT.format(n),
+                             self.parameterAsString(parameters, self.NEAREST_PREFIX, context)))
+        for n in self.SLOTS:
+            source = self.parameterAsSource(parameters, self.INTERSECT_INPUT.format(n), context)
+            if source is not None:
+                jobs.append(('intersect', source, self.INTERSECT_OUTPUT.format(n),
+                             self.parameterAsString(parameters, self.INTERSECT_PREFIX.format(n), context)))
+        if not jobs:
+            return {}
+
+        nearest_fields = self.parameterAsFields(parameters, self.NEAREST_FIELDS, context)
+        intersect_fields = self.parameterAsFields(parameters, self.INTERSECT_FIELDS, context)
+        neighbors = self.parameterAsInt(parameters, self.NEIGHBORS, context)
+        max_distance = self.parameterAsDouble(parameters, self.MAX_DISTANCE, context)
+        predicates = [self.PREDICATES[i][0]
+                      for i in self.parameterAsEnums(parameters, self.PREDICATE, context)]
+        if not predicates:
+            raise QgsProcessingException('Aucun prédicat géométrique sélectionné.')
+
+        total = join.featureCount() + sum(job[1].featureCount() for job in jobs)
+        step = 100.0 / total if total > 0 else 0
+        done = join.featureCount()
+        indexes = {}        # SCR (WKT) des entrées → (index, attributs joints)
+
+        results = {}
+        for kind, source, output, prefix in jobs:
+            # 1. Index de la couche jointe dans le SCR de l’entrée, partagé
+            crs_key = source.sourceCrs().toWkt()
+            if crs_key not in indexes:
+                indexes[crs_key] = self._join_index(join, source.sourceCrs(), context, feedback)
+                feedback.setProgress(done * step)
+            index, join_attributes = indexes[crs_key]
+
+            names = nearest_fields if kind == 'nearest' else intersect_fields
+            added, indices = _prefixed(join.fields(), names, prefix)
+            fields = QgsProcessingUtils.combineFields(source.fields(), added)
+            if kind == 'nearest':
+                for name, type_ in (('n', QVariant.Int), ('distance', QVariant.Double),
+                                    ('feature_x', QVariant.Double), ('feature_y', QVariant.Double),
+                                    ('nearest_x', QVariant.Double), ('nearest_y', QVariant.Double)):
+                    fields.append(QgsField(name, type_))
+
+            sink, dest_id = self.parameterAsSink(
+                parameters, output, context, fields, source.wkbType(), source.sourceCrs())
+            if sink is None:
+                raise QgsProcessingException(self.invalidSinkError(parameters, output))
+
+            for feat in source.getFeatures():
+                if feedback.isCanceled():
+                    raise QgsProcessingException('Jointures annulées.')
+                done += 1
+                feedback.setProgress(done * step)
+                base = feat.attributes()
+                empty = [None] * len(indices)
+                if not feat.hasGeometry():
+                    rows = [base + empty + ([None] * 6 if kind == 'nearest' else [])]
+                else:
+                    geom = feat.geometry()
+                    if kind == 'nearest':
+                        rows = self._nearest_rows(
+                            index, join_attributes, indices, geom, base,
+                            neighbors, max_distance)
+                    else:
+                        rows = [base + self._first_match(
+                            index, join_attributes, indices, geom, predicates)]
+                for attributes in rows:
+                    out = QgsFeature(fields)
+                    out.setGeometry(feat.geometry())
+                    out.setAttributes(attributes)
+                    sink.addFeature(out, QgsFeatureSink.FastInsert)
+            results[output] = dest_id
+
+        feedback.setProgress(100)
+        return results
+
+    @staticmethod
+    def _join_index(join, crs, context, feedback):
+        """Index (géométries dans *crs*) et attributs de la couche jointe."""
+        request = QgsFeatureRequest().setDestinationCrs(crs, context.transformContext())
+        index = QgsSpatialIndex(QgsSpatialIndex.FlagStoreFeatureGeometries)
+        attributes = {}
+        for feat in join.getFeatures(request):
+            if feedback.isCanceled():
+                raise QgsProcessingException('Jointures annulées.')
+            if feat.hasGeometry():
+                index.addFeature(feat)
+                attributes[feat.id()] = feat.attributes()
+        return index, attributes
+
+    @staticmethod
+    def _nearest_rows(index, join_attributes, indices, geom, base,
+                      neighbors, max_distance):
+        """Lignes de sortie d’une entité : une par voisin retenu (ou une vide)."""
+        candidates = []
+        for fid in index.nearestNeighbor(geom, neighbors, max_distance):
+            join_geom = index.geometry(fid)
+            candidates.append((geom.distance(join_geom), fid, join_geom))
+        # ex aequo : ordre stable par identifiant, tronqué à *neighbors*
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        rows = []
+        for n, (distance, fid, join_geom) in enumerate(candidates[:neighbors], 1):
+            line = geom.shortestLine(join_geom)
+            start, end = line.vertexAt(0), line.vertexAt(1)
+            attributes = join_attributes[fid]
+            rows.append(base + [attributes[i] for i in indices] + [
+                n, distance, start.x(), start.y(), end.x(), end.y()])
+        if not rows:
+            rows.append(base + [None] * (len(indices) + 6))
+        return rows
+
+    @staticmethod
+    def _first_match(index, join_attributes, indices, geom, predicates):
+        """Attributs de la première entité jointe (plus petit fid) qui vérifie un prédicat."""
+        engine = QgsGeometry.createGeometryEngine(geom.constGet())
+        engine.prepareGeometry()
+        for fid in sorted(index.intersects(geom.boundingBox())):
+            other = index.geometry(fid).constGet()
+            if any(getattr(engine, p)(other) for p in predicates):
+                attributes = join_attributes[fid]
+                return [attributes[i] for i in indices]
+        return [None] * len(indices)
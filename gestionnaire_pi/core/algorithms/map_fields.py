@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Restructuration des champs en une passe (plusieurs étapes composées)
+*************************/
+"""
+from qgis.core import (
+    QgsDistanceArea, QgsExpression, QgsExpressionContextScope, QgsFeature,
+    QgsFeatureRequest, QgsFeatureSink, QgsField, QgsFields, QgsProcessing,
+    QgsProcessingAlgorithm, QgsProcessingException,
+    QgsProcessingParameterBoolean, QgsProcessingParameterExpression,
+    QgsProcessingParameterFeatureSink, QgsProcessingParameterFeatureSource,
+    QgsProcessingParameterFieldMapping, QgsWkbTypes,
+)
+
+
+class _Stage:
+    """Une étape compilée : filtre facultatif puis table de champs facultative."""
+
+    def __init__(self, fields_in, filter_expr, mapping, expression_context, context, da):
+        self.fields_in = fields_in
+        self.filter = None
+        if filter_expr:
+            self.filter = self._prepared(filter_expr, expression_context, context, da)
+
+        self.fields = None
+        self.expressions = []
+        if mapping:
+            self.fields = QgsFields()
+            for item in mapping:
+                field = QgsField(
+                    item['name'], item['type'], item.get('type_name', ''),
+                    item.get('length', 0), item.get('precision', 0),
+                    item.get('comment', ''), item.get('sub_type', 0),
+                )
+                if item.get('alias'):
+                    field.setAlias(item['alias'])
+                self.fields.append(field)
+                expr = item.get('expression', '')
+                self.expressions.append(
+                    self._prepared(expr, expression_context, context, da) if expr else None)
+
+    def _prepared(self, text, expression_context, context, da):
+        expression = QgsExpression(text)
+        if expression.hasParserError():
+            raise QgsProcessingException(
+                f"Erreur dans l’expression « {text} » : {expression.parserErrorString()}")
+        expression.setGeomCalculator(da)
+        expression.setDistanceUnits(context.distanceUnits())
+        expression.setAreaUnits(context.areaUnits())
+        expression_context.setFields(self.fields_in)
+        expression.prepare(expression_context)
+        return expression
+
+    def fields_out(self):
+        return self.fields if self.fields is not None else self.fields_in
+
+
+class MapFieldsAlgorithm(QgsProcessingAlgorithm):
+    """
+    Enchaîne jusqu’à trois couples (filtre, restructuration) comme le
+    feraient `native:extractbyexpression` puis `native:refactorfields`,
+    mais en une seule lecture de la couche : chaque entité traverse les
+    étapes en mémoire et seule la dernière table de champs est écrite. Les
+    expressions sont préparées une fois ; les conversions de type suivent
+    celles du natif (valeur incompatible → erreur).
+    """
+    INPUT = 'INPUT'
+    FILTER = 'FILTER_{}'
+    FIELDS_MAPPING = 'FIELDS_MAPPING_{}'
+    DROP_GEOMETRY = 'DROP_GEOMETRY'
+    OUTPUT = 'OUTPUT'
+
+    STAGES = (1, 2, 3)
+
+    def name(self):
+        return 'mapfields'
+
+    def displayName(self):
+        return 'Restructuration des champs en une passe'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Applique successivement, pour chaque étape renseignée, un "
+                "filtre (entités conservées si l’expression est vraie) puis "
+                "une restructuration des champs, sans couche intermédiaire. "
+                "Les expressions d’une étape portent sur les champs produits "
+                "par l’étape précédente. « Supprimer les géométries » écrit "
+                "une table sans géométrie.")
+
+    def createInstance(self):
+        return MapFieldsAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, 'Couche en entrée', [QgsProcessing.TypeVector]))
+        for n in self.STAGES:
+            # seule la 1re étape connaît les champs de l’entrée à la conception
+            parent = self.INPUT if n == 1 else ''
+            self.addParameter(QgsProcessingParameterExpression(
+                self.FILTER.format(n), f'Étape {n} : filtre',
+                parentLayerParameterName=parent, optional=True))
+            self.addParameter(QgsProcessingParameterFieldMapping(
+                self.FIELDS_MAPPING.format(n), f'Étape {n} : champs',
+                parentLayerParameterName=parent, optional=n > 1))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.DROP_GEOMETRY, 'Supprimer les géométries', defaultValue=False))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, 'Couche restructurée', QgsProcessing.TypeVectorAnyGeometry))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+        drop_geometry = self.parameterAsBool(parameters, self.DROP_GEOMETRY, context)
+
+        expression_context = self.createExpressionContext(parameters, context, source)
+        row_scope = QgsExpressionContextScope()
+        expression_context.appendScope(row_scope)
+
+        da = QgsDistanceArea()
+        da.setSourceCrs(source.sourceCrs(), context.transformContext())
+        da.setEllipsoid(context.ellipsoid())
+
+        # 1. Compilation des étapes ---------------------------------------
+        stages = []
+        fields = source.fields()
+        request = QgsFeatureRequest()
+        for n in self.STAGES:
+            filter_expr = self.parameterAsExpression(parameters, self.FILTER.format(n), context)
+            if n == 1 and filter_expr:
+                # filtre de l’entrée confié au fournisseur (compilé si possible)
+                request.setFilterExpression(filter_expr)
+                request.setExpressionContext(expression_context)
+                filter_expr = ''
+            mapping = parameters.get(self.FIELDS_MAPPING.format(n)) or []
+            if not filter_expr and not mapping:
+                continue
+            stage = _Stage(fields, filter_expr, mapping, expression_context, context, da)
+            stages.append(stage)
+            fields = stage.fields_out()
+
+        wkb_type = QgsWkbTypes.NoGeometry if drop_geometry else source.wkbType()
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, fields, wkb_type, source.sourceCrs())
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        # 2. Une seule lecture, étapes appliquées en mémoire ---------------
+        count = source.featureCount()
+        step = 100.0 / count if count > 0 else 0
+        for i, feat in enumerate(source.getFeatures(request), 1):
+            if feedback.isCanceled():
+                raise QgsProcessingException('Restructuration des champs annulée.')
+            row_scope.setVariable('row_number', i)
+            current = self._apply(stages, feat, expression_context)
+            if current is not None:
+                if drop_geometry:
+                    current.clearGeometry()
+                sink.addFeature(current, QgsFeatureSink.FastInsert)
+            feedback.setProgress(i * step)
+
+        return {self.OUTPUT: dest_id}
+
+    @staticmethod
+    def _apply(stages, feat, expression_context):
+        """Entité après toutes les étapes, ou None si un filtre l’écarte."""
+        current = feat
+        for stage in stages:
+            expression_context.setFields(stage.fields_in)
+            expression_context.setFeature(current)
+            if stage.filter is not None and not stage.filter.evaluate(expression_context):
+                return None
+            if stage.fields is None:
+                continue
+            attributes = []
+            for field, expression in zip(stage.fields, stage.expressions):
+                value = None
+                if expression is not None:
+                    value = expression.evaluate(expression_context)
+                    if expression.hasEvalError():
+                        raise QgsProcessingException(
+                            f"Erreur d’évaluation « {expression.expression()} » : "
+                            f"{expression.evalErrorString()}")
+                    try:
+                        value = field.convertCompatible(value)
+                    except ValueError:
+                        raise QgsProcessingException(
+                            f"Valeur « {value} » incompatible avec le champ "
+                            f"« {field.name()} »")
+                attributes.append(value)
+            mapped = QgsFeature(stage.fields, current.id())
+            mapped.setGeometry(current.geometry())
+            mapped.setAttributes(attributes)
+            current = mapped
+        return current
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Fusion en flux de couches linéaires (filtre et emprise poussés aux sources)
+*************************/
+"""
+from qgis.PyQt.QtCore import QVariant
+from qgis.core import (
+    QgsCoordinateTransform, QgsFeature, QgsFeatureRequest, QgsFeatureSink,
+    QgsField, QgsFields, QgsProcessing, QgsProcessingAlgorithm,
+    QgsProcessingException, QgsProcessingParameterCrs,
+    QgsProcessingParameterExpression, QgsProcessingParameterExtent,
+    QgsProcessingParameterFeatureSink, QgsProcessingParameterMultipleLayers,
+    QgsVectorLayer, QgsWkbTypes,
+)
+
+
+def merged_schema(layers):
+    """
+    Champs, type géométrique communs et champs ajoutés, avec les règles de
+    `native:mergevectorlayers` : champs réunis par nom (casse ignorée),
+    types identiques exigés, Z / M / multi promus, champs « layer » et
+    « path » ajoutés s’ils manquent.
+    """
+    fields = QgsFields()
+    wkb_type = None
+    for layer in layers:
+        layer_type = layer.wkbType()
+        if wkb_type is None:
+            wkb_type = layer_type
+        elif QgsWkbTypes.geometryType(layer_type) != QgsWkbTypes.geometryType(wkb_type):
+            raise QgsProcessingException(
+                f"La couche « {layer.name()} » n’a pas le même type de géométrie.")
+        if QgsWkbTypes.hasZ(layer_type):
+            wkb_type = QgsWkbTypes.addZ(wkb_type)
+        if QgsWkbTypes.hasM(layer_type):
+            wkb_type = QgsWkbTypes.addM(wkb_type)
+        if QgsWkbTypes.isMultiType(layer_type):
+            wkb_type = QgsWkbTypes.multiType(wkb_type)
+
+        for field in layer.fields():
+            index = fields.lookupField(field.name())
+            if index < 0:
+                fields.append(QgsField(field))
+            elif fields.at(index).type() != field.type():
+                raise QgsProcessingException(
+                    f"Le champ « {field.name()} » de « {layer.name()} » n’a pas le "
+                    f"même type que dans les couches précédentes.")
+    added = []
+    for name in ('layer', 'path'):
+        if fields.lookupField(name) < 0:
+            fields.append(QgsField(name, QVariant.String))
+            added.append(name)
+    return fields, wkb_type, added
+
+
+class MergeLinesAlgorithm(QgsProcessingAlgorithm):
+    """
+    Remplace `native:mergevectorlayers` suivi d’un `extractbyexpression` :
+    les couches d’origine sont lues l’une après l’autre, avec le filtre
+    attributaire et le rectangle d’emprise passés à la requête de chaque
+    fournisseur (compilés en SQL / index spatial quand il le peut). Seules
+    les entités retenues sont écrites, une seule fois, au schéma commun.
+    """
+    LAYERS = 'LAYERS'
+    FILTER = 'FILTER'
+    EXTENT = 'EXTENT'
+    CRS = 'CRS'
+    OUTPUT = 'OUTPUT'
+
+    def name(self):
+        return 'mergelines'
+
+    def displayName(self):
+        return 'Fusion filtrée des linéaires'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Fusionne les couches comme « Fusionner des couches "
+                "vecteur » (mêmes règles de champs, champs layer / path) en "
+                "ne lisant que les entités qui vérifient le filtre et "
+                "recoupent l’emprise facultative. Aucune couche fusionnée "
+                "complète n’est écrite.")
+
+    def createInstance(self):
+        return MergeLinesAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterMultipleLayers(
+            self.LAYERS, 'Couches à fusionner', QgsProcessing.TypeVectorAnyGeometry))
+        self.addParameter(QgsProcessingParameterExpression(
+            self.FILTER, 'Filtre', optional=True))
+        self.addParameter(QgsProcessingParameterExtent(
+            self.EXTENT, 'Emprise', optional=True))
+        self.addParameter(QgsProcessingParameterCrs(
+            self.CRS, 'SCR de destination', optional=True))
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, 'Fusion', QgsProcessing.TypeVectorAnyGeometry))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        layers = [lyr for lyr in self.parameterAsLayerList(parameters, self.LAYERS, context)
+                  if isinstance(lyr, QgsVectorLayer)]
+        if not layers:
+            raise QgsProcessingException('Aucune couche vecteur à fusionner.')
+        filter_expr = self.parameterAsExpression(parameters, self.FILTER, context)
+        crs = self.parameterAsCrs(parameters, self.CRS, context)
+        if not crs.isValid():
+            crs = layers[0].crs()
+        extent = None
+        if parameters.get(self.EXTENT):
+            extent = self.parameterAsExtent(parameters, self.EXTENT, context)
+            extent_crs = self.parameterAsExtentCrs(parameters, self.EXTENT, context)
+
+        fields, wkb_type, added = merged_schema(layers)
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, fields, wkb_type, crs)
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        expression_context = self.createExpressionContext(parameters, context)
+        total = sum(max(lyr.featureCount(), 0) for lyr in layers)
+        step = 100.0 / total if total > 0 else 0
+        done = 0
+        kept = 0
+        layer_index = fields.lookupField('layer') if 'layer' in added else -1
+        path_index = fields.lookupField('path') if 'path' in added else -1
+        for layer in layers:
+            request = QgsFeatureRequest()
+            if filter_expr:
+                request.setFilterExpression(filter_expr)
+                request.setExpressionContext(expression_context)
+            if extent is not None and not extent.isNull():
+                to_layer = QgsCoordinateTransform(
+                    extent_crs if extent_crs.isValid() else layer.crs(),
+                    layer.crs(), context.transformContext())
+                request.setFilterRect(to_layer.transformBoundingBox(extent))
+            to_dest = QgsCoordinateTransform(layer.crs(), crs, context.transformContext())
+
+            # correspondance champs de la couche → champs communs
+            mapping = [fields.lookupField(f.name()) for f in layer.fields()]
+
+            for feat in layer.getFeatures(request):
+                if feedback.isCanceled():
+                    raise QgsProcessingException('Fusion des linéaires annulée.')
+                attributes = [None] * fields.count()
+                for src, dest in zip(feat.attributes(), mapping):
+                    attributes[dest] = src
+                if layer_index >= 0:
+                    attributes[layer_index] = layer.name()
+                if path_index >= 0:
+                    attributes[path_index] = layer.publicSource()
+
+                out = QgsFeature(fields)
+                if feat.hasGeometry():
+                    geom = feat.geometry()
+                    if not to_dest.isShortCircuited():
+                        geom.transform(to_dest)
+                    if QgsWkbTypes.isMultiType(wkb_type):
+                        geom.convertToMultiType()
+                    if QgsWkbTypes.hasZ(wkb_type):
+                        geom.get().addZValue(0)
+                    if QgsWkbTypes.hasM(wkb_type):
+                        geom.get().addMValue(0)
+                    out.setGeometry(geom)
+                out.setAttributes(attributes)
+                sink.addFeature(out, QgsFeatureSink.FastInsert)
+                kept += 1
+            # progression par couche : le filtre écarte des entités non lues
+            done += max(layer.featureCount(), 0)
+            feedback.setProgress(done * step)
+
+        feedback.pushInfo(f"{kept} entité(s) retenue(s) sur {total}.")
+        return {self.OUTPUT: dest_id}
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Écriture du lot dans un seul GeoPackage (une transaction, WAL)
+*************************/
+"""
+import os
+
+from osgeo import ogr, osr
+from qgis.PyQt.QtCore import QDate, QDateTime, QTime, QVariant
+from qgis.core import (
+    NULL, QgsCoordinateReferenceSystem, QgsProcessing, QgsProcessingAlgorithm,
+    QgsProcessingException, QgsProcessingOutputMultipleLayers,
+    QgsProcessingParameterFeatureSource, QgsProcessingParameterFileDestination,
+    QgsProcessingParameterNumber, QgsProcessingParameterString, QgsWkbTypes,
+)
+
+from gestionnaire_pi.core.algorithms.export_csv import csv_value
+
+# types de champs QGIS → OGR (le reste est écrit en texte)
+_OGR_TYPES = {
+    QVariant.Int: ogr.OFTInteger,
+    QVariant.UInt: ogr.OFTInteger64,
+    QVariant.LongLong: ogr.OFTInteger64,
+    QVariant.ULongLong: ogr.OFTInteger64,
+    QVariant.Double: ogr.OFTReal,
+    QVariant.Bool: ogr.OFTInteger,
+    QVariant.Date: ogr.OFTDate,
+    QVariant.Time: ogr.OFTTime,
+    QVariant.DateTime: ogr.OFTDateTime,
+}
+
+
+def _ogr_geometry_type(wkb_type):
+    """Type OGR (codes 2.5D / M) d’un type WKB QGIS (codes ISO)."""
+    if wkb_type == QgsWkbTypes.NoGeometry:
+        return ogr.wkbNone
+    ogr_type = int(QgsWkbTypes.flatType(wkb_type))
+    if QgsWkbTypes.hasZ(wkb_type):
+        ogr_type = ogr.GT_SetZ(ogr_type)
+    if QgsWkbTypes.hasM(wkb_type):
+        ogr_type = ogr.GT_SetM(ogr_type)
+    return ogr_type
+
+
+def _remove_package(path):
+    """Supprime un GeoPackage et ses fichiers WAL / SHM éventuels."""
+    for p in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+class WriteLotAlgorithm(QgsProcessingAlgorithm):
+    """
+    Écrit jusqu’à quatre couches (les tables sans géométrie comprises) dans
+    un même GeoPackage, via OGR, en une seule transaction : journal WAL,
+    cache SQLite dimensionné par CACHE_SIZE, index spatial créé par le
+    pilote. Le fichier est construit sous un nom temporaire puis renommé :
+    un lot interrompu ne laisse pas de paquet partiel.
+    """
+    LAYER = 'LAYER_{}'
+    NAME = 'NAME_{}'
+    CACHE_SIZE = 'CACHE_SIZE'
+    OUTPUT = 'OUTPUT'
+    LAYERS = 'LAYERS'
+
+    SLOTS = (1, 2, 3, 4)
+
+    def name(self):
+        return 'writelot'
+
+    def displayName(self):
+        return 'Écriture du lot (GeoPackage unique)'
+
+    def group(self):
+        return 'Outils lot P.I.'
+
+    def groupId(self):
+        return 'outils_lot'
+
+    def shortHelpString(self):
+        return ("Regroupe les couches livrées dans un seul GeoPackage, écrit "
+                "en une transaction (journal WAL). Chaque couche renseignée "
+                "devient une table du paquet sous le nom indiqué. Le fichier "
+                "existant est remplacé.")
+
+    def createInstance(self):
+        return WriteLotAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        for n in self.SLOTS:
+            self.addParameter(QgsProcessingParameterFeatureSource(
+                self.LAYER.format(n), f'Couche {n}', [QgsProcessing.TypeVector],
+                optional=True))
+            self.addParameter(QgsProcessingParameterString(
+                self.NAME.format(n), f'Nom de la couche {n}', optional=True))
+        self.addParameter(QgsProcessingParameterNumber(
+            self.CACHE_SIZE, 'Cache SQLite (Mo)', QgsProcessingParameterNumber.Integer,
+            defaultValue=64, minValue=2))
+        self.addParameter(QgsProcessingParameterFileDestination(
+            self.OUTPUT, 'GeoPackage du lot', 'GeoPackage (*.gpkg)'))
+        self.addOutput(QgsProcessingOutputMultipleLayers(
+            self.LAYERS, 'Couches écrites'))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        path = self.parameterAsFileOutput(parameters, self.OUTPUT, context)
+        cache_mb = self.parameterAsInt(parameters, self.CACHE_SIZE, context)
+
+        layers = []         # (nom, source)
+        for n in self.SLOTS:
+            source = self.parameterAsSource(parameters, self.LAYER.format(n), context)
+            if source is None:
+                continue
+            name = self.parameterAsString(parameters, self.NAME.format(n), context)
+            layers.append((name or f'couche_{n}', source))
+        if not layers:
+            raise QgsProcessingException('Aucune couche à écrire.')
+
+        tmp_path = os.path.splitext(path)[0] + '.part.gpkg'
+        _remove_package(tmp_path)
+        ds = ogr.GetDriverByName('GPKG').CreateDataSource(tmp_path)
+        if ds is None:
+            raise QgsProcessingException(f'Création impossible : {tmp_path}')
+
+        total = sum(source.featureCount() for _, source in layers)
+        step = 100.0 / total if total > 0 else 0
+        done = 0
+        committed = False
+        try:
+            ds.ExecuteSQL('PRAGMA journal_mode = WAL')
+            ds.ExecuteSQL(f'PRAGMA cache_size = -{cache_mb * 1024}')
+            ds.StartTransaction()
+            for name, source in layers:
+                done = self._write_layer(ds, name, source, feedback, done, step)
+                if feedback.isCanceled():
+                    ds.RollbackTransaction()
+                    raise QgsProcessingException('Écriture du lot annulée.')
+            ds.CommitTransaction()
+            committed = True
+        finally:
+            ds = None       # fermeture : checkpoint et suppression du WAL
+            if not committed:
+                _remove_package(tmp_path)
+
+        _remove_package(path)
+        os.replace(tmp_path, path)
+        feedback.setProgress(100)
+        return {
+            self.OUTPUT: path,
+            self.LAYERS: [f'{path}|layername={name}' for name, _ in layers],
+        }
+
+    @staticmethod
+    def _write_layer(ds, name, source, feedback, done, step):
+        """Crée la table *name* et y copie *source* ; renvoie le compteur."""
+        srs = None
+        if source.sourceCrs().isValid():
+            srs = osr.SpatialReference()
+            srs.ImportFromWkt(source.sourceCrs().toWkt(
+                QgsCoordinateReferenceSystem.WKT_PREFERRED_GDAL))
+            srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        layer = ds.CreateLayer(name, srs, _ogr_geometry_type(source.wkbType()),
+                               options=['SPATIAL_INDEX=YES'])
+        if layer is None:
+            raise QgsProcessingException(f'Couche « {name} » non créée.')
+
+        # la colonne « fid » du paquet est la clé OGR : champ homonyme ignoré
+        indices = []
+        for i, field in enumerate(source.fields()):
+            if field.name().lower() == 'fid':
+                continue
+            defn = ogr.FieldDefn(field.name(), _OGR_TYPES.get(field.type(), ogr.OFTString))
+            if field.type() == QVariant.Bool:
+                defn.SetSubType(ogr.OFSTBoolean)
+            if field.length() > 0 and field.type() in (QVariant.String, QVariant.Double):
+                defn.SetWidth(field.length())
+                defn.SetPrecision(max(field.precision(), 0))
+            layer.CreateField(defn)
+            indices.append(i)
+
+        layer_defn = layer.GetLayerDefn()
+        for feat in source.getFeatures():
+            if feedback.isCanceled():
+                return done
+            out = ogr.Feature(layer_defn)
+            attributes = feat.attributes()
+            for j, i in enumerate(indices):
+                value = attributes[i]
+                if value is None or value == NULL:
+                    out.SetFieldNull(j)
+                elif isinstance(value, (QDate, QDateTime, QTime)):
+                    out.SetField(j, csv_value(value))
+                elif isinstance(value, bool):
+                    out.SetField(j, int(value))
+                elif isinstance(value, (int, float, str)):
+                    out.SetField(j, value)
+                else:
+                    out.SetField(j, str(value))
+            if feat.hasGeometry():
+                out.SetGeometry(ogr.CreateGeometryFromWkb(bytes(feat.geometry().asWkb())))
+            layer.CreateFeature(out)
+            done += 1
+            feedback.setProgress(done * step)
+        return done
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Cache disque des longueurs Annexe 6, par segment de ligne
+*************************/
+
+Un fichier SQLite est posé à côté de la couche folio
+(« <folios>_annexe6_cache.sqlite »). Chaque segment y a une entrée dont la
+clé combine :
+  • l’empreinte de sa géométrie et de sa classe ;
+  • la révision des zones et folios 'vrai' de son voisinage (emprise),
+    identifiants et géométries compris.
+Un segment inchangé dont le voisinage n’a pas bougé réutilise donc ses
+parts par folio ; seuls les éléments édités (et leurs voisins) sont recalculés.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from qgis.core import Qgis, QgsMessageLog
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    key      TEXT PRIMARY KEY,
+    payload  TEXT NOT NULL,
+    used_at  REAL NOT NULL
+)
+"""
+
+# format des entrées : à incrémenter si le calcul par segment change
+CACHE_VERSION = "2"
+
+
+def geometry_digest(geom) -> str:
+    """Empreinte SHA-1 du WKB d’une géométrie."""
+    return hashlib.sha1(bytes(geom.asWkb())).hexdigest()
+
+
+def segment_key(geom_digest, seg_class, zones, folios, with_contributions,
+                tolerance=0.0) -> str:
+    """
+    Clé d’un segment. *zones* / *folios* : [(id, empreinte)] du voisinage,
+    l’ordre n’a pas d’importance. *tolerance* : tolérance de simplification
+    des tests d’exclusion (un segment écarté à une tolérance ne l’est pas
+    forcément à une autre).
+    """
+    h = hashlib.sha1()
+    h.update(f"{CACHE_VERSION}|{geom_digest}|{seg_class}|{int(bool(with_contributions))}"
+             f"|{float(tolerance or 0.0)!r}".encode())
+    for tag, items in (("z", zones), ("f", folios)):
+        for item_id, digest in sorted(items):
+            h.update(f"|{tag}{item_id}:{digest}".encode())
+    return h.hexdigest()
+
+
+def cache_path_for(layer, fallback_folder=None):
+    """Fichier cache à côté de la source de *layer* (ou dans *fallback_folder*)."""
+    source = layer.dataProvider().dataSourceUri().split("|")[0]
+    if os.path.isfile(source):
+        base = os.path.splitext(source)[0]
+    elif fallback_folder and os.path.isdir(fallback_folder):
+        base = os.path.join(fallback_folder, layer.name())
+    else:
+        return None
+    return f"{base}_annexe6_cache.sqlite"
+
+
+class SegmentCache:
+    """Lecture à la demande, écritures regroupées jusqu’à `close()`."""
+
+    # entrées non réutilisées depuis ce délai : purgées à la fermeture
+    MAX_AGE_DAYS = 30
+
+    def __init__(self, path):
+        self.path = path
+        self.con = sqlite3.connect(path)
+        self.con.execute(_SCHEMA)
+        self.hits = []
+        self.pending = {}
+        self.n_hits = self.n_misses = 0
+
+    @classmethod
+    def open_for(cls, layer, fallback_folder=None):
+        """Ouvre le cache de *layer* ; None (calcul sans cache) en cas d’échec."""
+        path = cache_path_for(layer, fallback_folder)
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except (sqlite3.Error, OSError) as e:
+            QgsMessageLog.logMessage(
+                f"[GestionnairePi] Cache Annexe 6 indisponible ({path}) : {e}",
+                "GestionnairePi", Qgis.Warning
+            )
+            return None
+
+    def get(self, key):
+        row = self.con.execute(
+            "SELECT payload FROM segments WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.n_misses += 1
+            return None
+        self.n_hits += 1
+        self.hits.append(key)
+        return json.loads(row[0])
+
+    def put(self, key, record):
+        self.pending[key] = json.dumps(record, separators=(",", ":"))
+
+    def close(self):
+        """Écrit les nouvelles entrées, rafraîchit les entrées utilisées, purge."""
+        now = time.time()
+        try:
+            with self.con:
+                self.con.executemany(
+                    "INSERT OR REPLACE INTO segments (key, payload, used_at) VALUES (?, ?, ?)",
+                    [(k, p, now) for k, p in self.pending.items()],
+                )
+                self.con.executemany(
+                    "UPDATE segments SET used_at = ? WHERE key = ?",
+                    [(now, k) for k in self.hits],
+                )
+                self.con.execute(
+                    "DELETE FROM segments WHERE used_at < ?",
+                    (now - self.MAX_AGE_DAYS * 86400,),
+                )
+        except sqlite3.Error as e:
+            QgsMessageLog.logMessage(
+                f"[GestionnairePi] Cache Annexe 6 non enregistré : {e}",
+                "GestionnairePi", Qgis.Warning
+            )
+        finally:
+            self.con.close()
+        QgsMessageLog.logMessage(
+            f"[GestionnairePi] Cache Annexe 6 : {self.n_hits} segment(s) réutilisé(s), "
+            f"{self.n_misses} recalculé(s)",
+            "GestionnairePi", Qgis.Info
+        )
@@ -3,16 +3,26 @@
  Annexe6_Main
 *************************/
 """
-from qgis.PyQt.QtWidgets import QMessageBox
-from PyQt5.QtCore import Qt
-from qgis.core import QgsProject, QgsFeatureRequest
+import os
+import time
+
+from qgis.PyQt.QtWidgets import QMessageBox, QProgressDialog
+from PyQt5.QtCore import Qt, QCoreApplication
+from qgis.core import QgsProject, QgsFeatureRequest, QgsFeedback, QgsMessageLog, Qgis
 
 from gestionnaire_pi.core.annexe6.service import (
+    Annexe6Cancelled,
     process_data,
     generate_csv_files,
     update_tr_numbers,
-    cleanup_rubber_bands,
+    split_folios,
+    write_lengths,
+    zones_without_class_c,
 )
+from gestionnaire_pi.core.annexe6.coordstore import LineCoordStore
+from gestionnaire_pi.core.annexe6.preview import preview_totals
+from gestionnaire_pi.core.history.service import KIND_ANNEXE6, MemorySampler, record_run
+from gestionnaire_pi.settings.manager import SettingsManager
 from gestionnaire_pi.ui.annexe6_dialogs import ModificationDialog, ValidationDialog
 
 
@@ -29,6 +39,24 @@ class Annexe6Processor:
         detection_zone_layer_name: str,
         folio_layer_name: str,
         output_folder: str,
+    ):
+        """Lance le traitement Annexe 6 (pic mémoire relevé pendant l’exécution)."""
+        sampler = MemorySampler().start()
+        try:
+            self._run_custom(
+                line_layer_name, detection_zone_layer_name, folio_layer_name,
+                output_folder, sampler,
+            )
+        finally:
+            sampler.stop()
+
+    def _run_custom(
+        self,
+        line_layer_name: str,
+        detection_zone_layer_name: str,
+        folio_layer_name: str,
+        output_folder: str,
+        sampler: MemorySampler,
     ):
         """
         Lance le traitement Annexe 6.
@@ -37,6 +65,11 @@ class Annexe6Processor:
           message et arrêt immédiat (pas de stats, pas de CSV).
         """
         project = QgsProject.instance()
+        started_at = time.time()
+        phases = {}         # durées machine (hors temps passé dans les dialogues)
+
+        def _timed(phase, t0):
+            phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - t0
 
         # 1. Récupération des couches ------------------------------------
         try:
@@ -70,32 +103,72 @@ class Annexe6Processor:
         if not detection_zone_layer.isEditable():
             detection_zone_layer.startEditing()
 
-        deleted_features = []
+        deleted_ids = []        # fid des zones supprimées
+        settings = SettingsManager()
+        chunk_size = settings.get_annexe6_chunk_size()
+        simplify_tolerance = settings.get_simplify_tolerance()
+
+        # Lignes décodées une fois (tableaux memmap) pour toutes les passes
+        t0 = time.perf_counter()
+        line_store = LineCoordStore.open_for(line_layer)
+        _timed("Magasin de coordonnées", t0)
 
         # ------------------------------------------------------------------
         # 4. Boucle principale de traitement / validation
         # ------------------------------------------------------------------
         while True:
-            total_zones, length_c, length_b, length_w, corrections, folios, raccords = process_data(
-                line_layer,
-                detection_zone_layer,
-                folio_layer,
-                output_folder,
-                deleted_features,
+            # Aperçu par échantillonnage, affiché pendant le calcul exact
+            t0 = time.perf_counter()
+            preview = preview_totals(
+                line_layer, detection_zone_layer, deleted_ids, line_store
             )
+            _timed("Aperçu", t0)
+            dlg = ValidationDialog(preview=preview)
+            dlg.show()
+            QCoreApplication.processEvents()
 
-            zones_to_review = [
-                z
-                for z in detection_zone_layer.getFeatures(
-                    QgsFeatureRequest().setFilterExpression("type = 0")
+            # dry-run : rien n’est écrit sur les folios avant « Valider ».
+            # Calcul sur le fil de l’interface : la couche des zones est en
+            # édition (suppressions non enregistrées), tampon qu’un QgsTask ne
+            # peut pas lire sans risque ; le QgsFeedback rend la main à Qt.
+            t0 = time.perf_counter()
+            feedback, progress_dlg = self._progress("Calcul des longueurs…")
+            try:
+                lengths = process_data(
+                    line_layer,
+                    detection_zone_layer,
+                    folio_layer,
+                    output_folder,
+                    deleted_ids,
+                    dry_run=True,
+                    with_contributions=True,
+                    line_store=line_store,
+                    chunk_size=chunk_size,
+                    simplify_tolerance=simplify_tolerance,
+                    feedback=feedback,
                 )
-                if not any(
-                    l["classe"] == "C" and l.geometry().intersects(z.geometry())
-                    for l in line_layer.getFeatures()
+            except Annexe6Cancelled:
+                progress_dlg.close()
+                dlg.close()
+                if detection_zone_layer.isEditable():
+                    detection_zone_layer.rollBack()
+                QMessageBox.information(
+                    None, "Annulé",
+                    "Calcul interrompu : aucune longueur n'a été écrite.",
                 )
-            ]
+                return
+            progress_dlg.close()
+            total_zones, length_c, length_b, length_w, corrections, folios, raccords = lengths
+            _timed("Calcul des longueurs", t0)
+
+            # contrôle exact, une fois les longueurs affichables
+            t0 = time.perf_counter()
+            zones_to_review = zones_without_class_c(
+                line_layer, detection_zone_layer, line_store
+            )
+            _timed("Contrôle des zones", t0)
 
-            dlg = ValidationDialog(
+            dlg.set_totals(
                 total_zones, round(length_c, 1), round(length_b, 1), round(length_w, 1)
             )
             dlg.set_modify_enabled(bool(zones_to_review))
@@ -110,8 +183,9 @@ class Annexe6Processor:
                     mod_dlg = ModificationDialog(
                         zones_to_review,
                         self.iface,
-                        deleted_features,
+                        deleted_ids,
                         detection_zone_layer,
+                        result=lengths,
                     )
                     mod_dlg.setModal(False)
                     mod_dlg.setWindowModality(Qt.NonModal)
@@ -122,8 +196,7 @@ class Annexe6Processor:
 
                     # Callback : au fermeture => nettoyage + relance run_custom
                     def _after_mod(_result):
-                        cleanup_rubber_bands(self.iface.mapCanvas())
-                        deleted_features.extend(mod_dlg.get_deleted_features())
+                        mod_dlg.cleanup()   # deleted_ids complété par la boîte elle-même
                         # Relance exactement le même traitement
                         self.run_custom(
                             line_layer_name,
@@ -149,9 +222,10 @@ class Annexe6Processor:
                 detection_zone_layer.commitChanges()
 
             # Renumérotation des TR après suppressions -------------------
-            if deleted_features:
+            t0 = time.perf_counter()
+            if deleted_ids:
                 mapping = update_tr_numbers(
-                    detection_zone_layer, deleted_features
+                    detection_zone_layer, deleted_ids
                 )
 
                 # MAJ Zones
@@ -174,21 +248,78 @@ class Annexe6Processor:
                         )
                         folio_layer.updateFeature(folio)
                 folio_layer.commitChanges()
+            _timed("Renumérotation TR", t0)
 
-            # Recalcul final après corrections ---------------------------
-            total_zones, length_c, length_b, length_w, corrections, folios, raccords = process_data(
-                line_layer,
-                detection_zone_layer,
-                folio_layer,
-                output_folder,
-                [],
-            )
+            # Écriture unique des longueurs validées ---------------------
+            # (les zones supprimées étaient déjà exclues du calcul : le
+            #  résultat en mémoire vaut le recalcul après commit)
+            t0 = time.perf_counter()
+            write_lengths(folio_layer, lengths)
+            folios, raccords, corrections = split_folios(folio_layer)
+            _timed("Écriture des longueurs", t0)
 
             # Génération des CSV ----------------------------------------
-            if generate_csv_files(
-                corrections, folios, raccords, folio_layer, output_folder
-            ):
+            t0 = time.perf_counter()
+            feedback, progress_dlg = self._progress("Génération des CSV…")
+            try:
+                ok = generate_csv_files(
+                    corrections, folios, raccords, folio_layer, output_folder,
+                    feedback=feedback,
+                )
+            except Annexe6Cancelled:
+                ok = False
+                QMessageBox.information(
+                    None, "Annulé",
+                    "Génération interrompue : les CSV précédents sont conservés.",
+                )
+            finally:
+                progress_dlg.close()
+            _timed("Génération CSV", t0)
+            if ok:
+                self._record_history(
+                    started_at, phases,
+                    (line_layer, detection_zone_layer, folio_layer),
+                    output_folder, sampler.stop(),
+                )
                 QMessageBox.information(
                     None, "Succès", "Le traitement est terminé."
                 )
             break
+
+    # ------------------------------------------------------------------
+    #  Progression : QProgressDialog relié à un QgsFeedback
+    # ------------------------------------------------------------------
+    def _progress(self, label):
+        feedback = QgsFeedback()
+        dlg = QProgressDialog(label, "Annuler", 0, 100, self.iface.mainWindow())
+        dlg.setWindowTitle("Annexe 6")
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(500)
+        dlg.canceled.connect(feedback.cancel)
+
+        def _on_progress(pct):
+            dlg.setValue(int(pct))
+            QCoreApplication.processEvents()    # clic sur « Annuler »
+
+        feedback.progressChanged.connect(_on_progress)
+        return feedback, dlg
+
+    # ------------------------------------------------------------------
+    #  Historique local des exécutions
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _record_history(started_at, phases, layers, output_folder, peak_memory_mb):
+        try:
+            record_run(
+                KIND_ANNEXE6, started_at, sum(phases.values()),
+                {lyr.name(): lyr.featureCount() for lyr in layers},
+                phases,
+                [os.path.join(output_folder, name)
+                 for name in ("Annexe_6.csv", "corrections.csv", "Export_atlas.csv")],
+                peak_memory_mb=peak_memory_mb,
+            )
+        except Exception as e:
+            QgsMessageLog.logMessage(
+                f"[GestionnairePi] Historique non enregistré : {e}",
+                "GestionnairePi", Qgis.Warning
+            )
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Magasin de coordonnées des couches de lignes (NumPy, memmap)
+*************************/
+
+La couche de lignes est décodée une seule fois en tableaux plats, enregistrés
+en `.npy` dans « <fichier>_<table>_coords/ » (une table d’un GeoPackage a son
+propre dossier) et relus en `mmap_mode="r"` :
+  xy          (nb sommets × 2)  coordonnées
+  part_start  (nb parties + 1)  début de chaque partie dans xy
+  feat_part   (nb entités + 1)  première partie de chaque entité
+  multi       (nb entités)      géométrie multi-parties
+  bbox        (nb entités × 4)  xmin, ymin, xmax, ymax
+  classes     (nb entités)      code → `class_names` (meta.json)
+  digests     (nb entités × 20) SHA-1 du WKB (mêmes clés que cache.py)
+Le magasin est invalidé par la modification de sa table : `last_change` de
+gpkg_contents et nombre d’entités pour un GeoPackage (l’écriture d’une autre
+table du même fichier, ex. les longueurs des folios, ne le périme pas), date
+et taille du fichier sinon. NumPy reste optionnel : sans lui, `open_for`
+renvoie None et les appelants relisent la couche comme avant.
+"""
+import json
+import os
+import re
+import shutil
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+from qgis.core import (
+    Qgis, QgsFeatureRequest, QgsGeometry, QgsLineString, QgsMessageLog,
+    QgsMultiLineString, QgsRectangle, QgsWkbTypes
+)
+
+from gestionnaire_pi.core.annexe6.cache import geometry_digest
+
+try:
+    import numpy as np
+except ImportError:     # NumPy absent : lecture directe de la couche
+    np = None
+
+STORE_VERSION = 2
+_ARRAYS = ("xy", "part_start", "feat_part", "multi", "bbox", "classes", "digests")
+
+
+def _table_name(uri):
+    """Valeur de « layername= » dans l’URI OGR, ou chaîne vide."""
+    for option in uri.split("|")[1:]:
+        key, _, value = option.partition("=")
+        if key.strip().lower() == "layername":
+            return value.strip()
+    return ""
+
+
+def _gpkg_last_change(source, table):
+    """`last_change` de *table* dans gpkg_contents (lecture seule), ou None."""
+    try:
+        with closing(sqlite3.connect(f"{Path(source).as_uri()}?mode=ro", uri=True)) as db:
+            row = db.execute(
+                "SELECT last_change FROM gpkg_contents WHERE lower(table_name) = lower(?)",
+                (table,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _source_signature(layer):
+    """Fichier source, table et ce qui invalide le magasin, ou None (couche non fichier)."""
+    uri = layer.dataProvider().dataSourceUri()
+    source = uri.split("|")[0]
+    if not os.path.isfile(source):
+        return None, None, None
+    table = _table_name(uri)
+    last_change = _gpkg_last_change(source, table) if table else None
+    if last_change is not None:
+        # la table seule : les autres tables du paquet peuvent changer
+        stamps = [last_change, layer.dataProvider().featureCount()]
+    else:
+        stamps = []
+        for path in (source, source + "-wal"):
+            if os.path.exists(path):
+                st = os.stat(path)
+                stamps.append([st.st_mtime_ns, st.st_size])
+    return source, table, {
+        "version": STORE_VERSION,
+        "uri": uri,
+        "subset": layer.subsetString(),
+        "stamps": stamps,
+    }
+
+
+def store_folder(source, table=""):
+    """Dossier du magasin : « <fichier>_coords » ou « <fichier>_<table>_coords »."""
+    base = os.path.splitext(source)[0]
+    if table:
+        base += "_" + re.sub(r"[^\w.-]", "_", table)
+    return base + "_coords"
+
+
+class LineCoordStore:
+    """Vue en lecture seule (memmap) sur les sommets d’une couche de lignes."""
+
+    def __init__(self, folder, class_names):
+        for name in _ARRAYS:
+            path = os.path.join(folder, f"{name}.npy")
+            try:
+                arr = np.load(path, mmap_mode="r")
+            except ValueError:      # tableau vide : rien à projeter en mémoire
+                arr = np.load(path)
+            setattr(self, name, arr)
+        self.class_names = class_names
+        self.count = len(self.multi)
+
+    # ------------------------------------------------------------------
+    #  Ouverture / construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def open_for(cls, layer, class_field="classe"):
+        """
+        Magasin à jour de *layer* (reconstruit si la source a changé), ou None :
+        NumPy absent, couche non fichier, éditions non enregistrées, géométries
+        courbes ou Z/M (non représentables à l’identique).
+        """
+        if np is None or layer.isModified():
+            return None
+        wkb_type = layer.wkbType()
+        if (QgsWkbTypes.hasZ(wkb_type) or QgsWkbTypes.hasM(wkb_type)
+                or QgsWkbTypes.flatType(QgsWkbTypes.singleType(wkb_type)) != QgsWkbTypes.LineString):
+            return None
+        source, table, signature = _source_signature(layer)
+        if source is None:
+            return None
+        signature["class_field"] = class_field
+
+        folder = store_folder(source, table)
+        meta_path = os.path.join(folder, "meta.json")
+        try:
+            with open(meta_path, encoding="utf-8") as fh:
+                meta = json.load(fh)
+            if meta.get("signature") == signature:
+                return cls(folder, meta["class_names"])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        try:
+            class_names = cls._build(layer, class_field, folder)
+            with open(meta_path, "w", encoding="utf-8") as fh:
+                json.dump({"signature": signature, "class_names": class_names}, fh)
+            return cls(folder, class_names)
+        except (OSError, ValueError) as e:
+            QgsMessageLog.logMessage(
+                f"[GestionnairePi] Magasin de coordonnées indisponible ({folder}) : {e}",
+                "GestionnairePi", Qgis.Warning
+            )
+            return None
+
+    @staticmethod
+    def _build(layer, class_field, folder):
+        """Décode la couche une fois ; meta.json est écrit en dernier par l’appelant."""
+        xs, ys, part_start, feat_part = [], [], [0], [0]
+        multi, bbox, classes, digests = [], [], [], []
+        class_codes = {}
+
+        request = QgsFeatureRequest().setSubsetOfAttributes([class_field], layer.fields())
+        for feat in layer.getFeatures(request):
+            geom = feat.geometry()
+            if geom is None or geom.isEmpty():
+                continue
+            for part in geom.constParts():
+                xs.extend(part.xVector())
+                ys.extend(part.yVector())
+                part_start.append(len(xs))
+            feat_part.append(len(part_start) - 1)
+            multi.append(QgsWkbTypes.isMultiType(geom.wkbType()))
+            r = geom.boundingBox()
+            bbox.append((r.xMinimum(), r.yMinimum(), r.xMaximum(), r.yMaximum()))
+            classes.append(class_codes.setdefault(str(feat[class_field]), len(class_codes)))
+            digests.append(bytes.fromhex(geometry_digest(geom)))
+
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        os.makedirs(folder)
+        arrays = {
+            "xy": np.column_stack((np.asarray(xs, dtype=np.float64),
+                                   np.asarray(ys, dtype=np.float64))).reshape(-1, 2),
+            "part_start": np.asarray(part_start, dtype=np.int64),
+            "feat_part": np.asarray(feat_part, dtype=np.int64),
+            "multi": np.asarray(multi, dtype=np.bool_),
+            "bbox": np.asarray(bbox, dtype=np.float64).reshape(-1, 4),
+            "classes": np.asarray(classes, dtype=np.int32),
+            "digests": np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 20),
+        }
+        for name, arr in arrays.items():
+            np.save(os.path.join(folder, f"{name}.npy"), arr)
+        return sorted(class_codes, key=class_codes.get)
+
+    # ------------------------------------------------------------------
+    #  Accès
+    # ------------------------------------------------------------------
+    def class_name(self, i):
+        return self.class_names[self.classes[i]]
+
+    def digest(self, i):
+        return self.digests[i].tobytes().hex()
+
+    def bbox_rect(self, i):
+        return QgsRectangle(*self.bbox[i])
+
+    def geometry(self, i):
+        """Géométrie de l’entité *i*, identique (2D, même type) à celle de la couche."""
+        lines = []
+        for p in range(self.feat_part[i], self.feat_part[i + 1]):
+            a, b = self.part_start[p], self.part_start[p + 1]
+            lines.append(QgsLineString(self.xy[a:b, 0].tolist(), self.xy[a:b, 1].tolist()))
+        if not self.multi[i]:
+            return QgsGeometry(lines[0])
+        multi = QgsMultiLineString()
+        for line in lines:
+            multi.addGeometry(line)
+        return QgsGeometry(multi)
+
+    def centred_in(self, rect):
+        """Indices dont le centre d’emprise est dans *rect* (bornes max exclues)."""
+        b = self.bbox
+        cx = (b[:, 0] + b[:, 2]) / 2.0
+        cy = (b[:, 1] + b[:, 3]) / 2.0
+        return np.flatnonzero((cx >= rect.xMinimum()) & (cx < rect.xMaximum())
+                              & (cy >= rect.yMinimum()) & (cy < rect.yMaximum()))
+
+    def intersecting(self, rect, class_name=None):
+        """Indices (ordre de la couche) dont l’emprise touche *rect*, filtrés par classe brute."""
+        b = self.bbox
+        mask = ((b[:, 0] <= rect.xMaximum()) & (b[:, 2] >= rect.xMinimum())
+                & (b[:, 1] <= rect.yMaximum()) & (b[:, 3] >= rect.yMinimum()))
+        if class_name is not None:
+            if class_name not in self.class_names:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.classes == self.class_names.index(class_name)
+        return np.flatnonzero(mask)
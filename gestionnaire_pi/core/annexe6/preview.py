@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Aperçu rapide des totaux Annexe 6 (échantillonnage stratifié)
+*************************/
+
+Les lignes sont réparties en deux strates (classe C, classes B/W). Dans
+chaque strate, un échantillon aléatoire est découpé par l’union des zones ;
+le total est estimé par N × moyenne, avec une borne d’erreur à 95 %
+(1,96 écart-type, correction de population finie comprise).
+Les doublons stricts ne sont pas écartés : l’aperçu peut légèrement
+surestimer une couche qui en contient.
+"""
+import math
+import random
+
+from qgis.core import QgsFeatureRequest, QgsGeometry
+
+from gestionnaire_pi.core.annexe6.service import load_zone_geometries
+
+# nombre de segments découpés au plus, toutes strates confondues
+MAX_SAMPLES = 2000
+# taille minimale d’échantillon par strate (si la strate est assez grande)
+MIN_PER_STRATUM = 30
+Z_95 = 1.96
+
+
+class Annexe6Preview:
+    """Totaux estimés (m) et bornes d’erreur à 95 %."""
+
+    def __init__(self, length_c, err_c, length_b, err_b, sampled, population):
+        self.length_c = length_c
+        self.err_c = err_c
+        self.length_b = length_b            # B + W
+        self.err_b = err_b
+        self.sampled = sampled
+        self.population = population
+
+
+def _stratum_estimate(lengths, population):
+    """(total estimé, borne à 95 %) d’une strate de *population* éléments."""
+    n = len(lengths)
+    if n == 0:
+        return 0.0, 0.0
+    mean = sum(lengths) / n
+    if n >= population:
+        return population * mean, 0.0       # strate entière : valeur exacte
+    if n == 1:
+        return population * mean, float('inf')
+    var = sum((y - mean) ** 2 for y in lengths) / (n - 1)
+    se = population * math.sqrt((1 - n / population) * var / n)
+    return population * mean, Z_95 * se
+
+
+def _allocate(sizes, budget):
+    """
+    Allocation proportionnelle bornée par *budget* : chaque strate reçoit
+    d’abord min(taille, MIN_PER_STRATUM), le reste du budget est réparti
+    au prorata des éléments restants (arrondi inférieur).
+    """
+    allocation = {k: min(n, MIN_PER_STRATUM) for k, n in sizes.items()}
+    left = max(budget - sum(allocation.values()), 0)
+    rest = {k: n - allocation[k] for k, n in sizes.items()}
+    total = sum(rest.values())
+    if total:
+        for k in allocation:
+            allocation[k] += min(rest[k], left * rest[k] // total)
+    return allocation
+
+
+def preview_totals(line_layer, detection_zone_layer, zones_to_exclude=None,
+                   line_store=None, max_samples=MAX_SAMPLES, seed=0):
+    """
+    Aperçu des totaux C et B/W à partir des mêmes couches que `process_data`.
+    Avec *line_store*, strates et géométries viennent des tableaux memmap.
+    Seul l’échantillon est découpé : le contrôle exact des zones sans classe C
+    reste après le calcul des longueurs.
+    """
+    exclude_ids = set(zones_to_exclude or ())
+    zone_geoms = list(load_zone_geometries(detection_zone_layer, exclude_ids).values())
+    if not zone_geoms:
+        return Annexe6Preview(0.0, 0.0, 0.0, 0.0, 0, 0)
+    zone_union = QgsGeometry.unaryUnion(zone_geoms)
+
+    # -- strates : identifiants par groupe de classe --
+    strata = {'C': [], 'B': []}
+    if line_store is not None:
+        for i in range(line_store.count):
+            cls = line_store.class_name(i).strip().upper()
+            if cls == 'C':
+                strata['C'].append(i)
+            elif cls in ('B', 'W'):
+                strata['B'].append(i)
+    else:
+        request = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(['classe'], line_layer.fields())
+        for seg in line_layer.getFeatures(request):
+            cls = str(seg['classe']).strip().upper()
+            if cls == 'C':
+                strata['C'].append(seg.id())
+            elif cls in ('B', 'W'):
+                strata['B'].append(seg.id())
+
+    rng = random.Random(seed)
+    sizes = {k: len(v) for k, v in strata.items()}
+    allocation = _allocate(sizes, max_samples)
+    estimates = {}
+    sampled = 0
+    for key, ids in strata.items():
+        picked = rng.sample(ids, allocation[key])
+        if line_store is not None:
+            geoms = (line_store.geometry(i) for i in picked)
+        else:
+            request = QgsFeatureRequest().setFilterFids(picked)
+            request.setNoAttributes()
+            geoms = (f.geometry() for f in line_layer.getFeatures(request))
+
+        lengths = []
+        for g in geoms:
+            if g is None or g.isEmpty() or not g.intersects(zone_union):
+                lengths.append(0.0)
+            else:
+                lengths.append(g.intersection(zone_union).length())
+        sampled += len(lengths)
+        estimates[key] = _stratum_estimate(lengths, sizes[key])
+
+    return Annexe6Preview(
+        estimates['C'][0], estimates['C'][1],
+        estimates['B'][0], estimates['B'][1],
+        sampled, sum(sizes.values()),
+    )
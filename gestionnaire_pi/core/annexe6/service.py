@@ -5,16 +5,21 @@
 
 import os
 import csv
+import math
 import re
 from typing import List, Tuple
 
 from qgis.core import (
     QgsProject, QgsVectorLayer, QgsFeature, QgsFeatureRequest,
-    QgsSpatialIndex, QgsField, QgsGeometry
+    QgsSpatialIndex, QgsField, QgsGeometry, QgsRectangle
 )
 from qgis.PyQt.QtWidgets import QMessageBox
 from qgis.PyQt.QtCore import QVariant
 
+from gestionnaire_pi.core.annexe6.cache import (
+    SegmentCache, geometry_digest, segment_key
+)
+
 # ---------------------------------------------------------------------------
 # Utilitaires
 # ---------------------------------------------------------------------------
@@ -50,13 +55,14 @@ def group_raccord_with_folios_and_tr(folios, raccords):
     grouped = []
     valid_folios = [f for f in folios
                     if f['type'] == 'vrai' and clean_value(f['id_tr']).strip()]
+    geoms = folio_geometries(valid_folios + raccords)
 
     for folio in valid_folios:
         grouped.append(folio)
-        fgeom = folio.geometry()
+        fgeom = geoms[folio.id()]
         to_remove = []
         for rac in raccords:
-            if rac.geometry().distance(fgeom) <= 10:
+            if geoms[rac.id()].distance(fgeom) <= 10:
                 grouped.append(rac)
                 to_remove.append(rac)
         for r in to_remove:
@@ -64,27 +70,419 @@ def group_raccord_with_folios_and_tr(folios, raccords):
     return grouped
 
 # ---------------------------------------------------------------------------
-# Traitement principal
+# Suivi et interruption
 # ---------------------------------------------------------------------------
 
-def process_data(
-    line_layer,
-    detection_zone_layer,
-    folio_layer,
-    output_folder,
-    zones_to_exclude=None
-):
+class Annexe6Cancelled(Exception):
+    """Traitement interrompu depuis le QgsFeedback ; rien n’a été écrit."""
+
+
+class _Progress:
+    """Relais vers un QgsFeedback (optionnel) : % par élément traité, arrêt."""
+
+    def __init__(self, feedback, total):
+        self.feedback = feedback
+        self.total = max(int(total), 1)
+        self.done = 0
+        self.step = max(self.total // 200, 1)   # ~200 mises à jour au plus
+
+    def tick(self):
+        """Un élément traité ; lève Annexe6Cancelled si l’arrêt est demandé."""
+        if self.feedback is None:
+            return
+        if self.feedback.isCanceled():
+            raise Annexe6Cancelled()
+        self.done += 1
+        if self.done % self.step == 0:
+            self.feedback.setProgress(min(100.0, 100.0 * self.done / self.total))
+
+    def finish(self):
+        if self.feedback is not None:
+            self.feedback.setProgress(100.0)
+
+# ---------------------------------------------------------------------------
+# Folios en mémoire
+# ---------------------------------------------------------------------------
+
+# Colonnes de l’Annexe 6 → champ de la couche folio
+FOLIO_CSV_FIELDS = {
+    'Commune': 'commune_no',
+    'Code INSEE': 'commune_in',
+    'Rue concernée': 'voie_princ',
+    'Plan': 'plan_nom',
+    'Code qualité du plan': 'qualite_li',
+    'Identifiant du tronçon à détecter (facultatif)': 'id_tr',
+    'Linéaire réseaux cartographié en classe PI (mètre)': 'lg_res_clc',
+    'Matière réseaux cartographié en PI': 'mat_pi',
+    'Linéaire réseaux cartographié en classe B (mètre)': 'lg_res_clb',
+    'Matière réseaux cartographié en classe B': 'mat_b',
+    'Caracteristiques réseau du tronçon (facultatif)': 'carac_res',
+    'Quintile du plan': 'cdp_lib',
+    'Commentaire précision commande': 'commentair'
+}
+
+
+class FolioRecord:
     """
-    Calcul précis des longueurs par folio.
-    - Portion exclusive : longueur entière pour le folio.
-    - Portion commune à k folios : longueur / k pour chacun.
-    Retourne le tuple :
+    Folio réduit à ce qu’utilisent le calcul et les CSV : fid, type, id_tr,
+    attributs utiles (tuple aligné sur un schéma partagé) et longueurs.
+    La géométrie n’est pas gardée : voir `geometry()` / `folio_geometries`.
+    S’utilise comme une entité en lecture : record['champ'], record.id().
+    """
+    __slots__ = ('fid', 'type', 'id_tr', 'values', 'schema', 'layer', 'clc', 'clb')
+
+    def __init__(self, feature, schema, layer):
+        fields = feature.fields()
+        self.fid = feature.id()
+        self.type = str(feature['type']).lower()
+        self.id_tr = feature['id_tr'] if fields.indexFromName('id_tr') != -1 else None
+        self.values = tuple(feature[name] for name in schema)
+        self.schema = schema        # {nom de champ: position}, partagé
+        self.layer = layer
+        self.clc = feature['lg_res_clc'] if fields.indexFromName('lg_res_clc') != -1 else None
+        self.clb = feature['lg_res_clb'] if fields.indexFromName('lg_res_clb') != -1 else None
+
+    def id(self):
+        return self.fid
+
+    def get(self, name, default=None):
+        if name == 'type':
+            return self.type
+        if name == 'id_tr':
+            return self.id_tr
+        if name == 'lg_res_clc':
+            return self.clc
+        if name == 'lg_res_clb':
+            return self.clb
+        pos = self.schema.get(name)
+        return default if pos is None else self.values[pos]
+
+    __getitem__ = get
+
+    def geometry(self):
+        """Géométrie relue par fid (utiliser `folio_geometries` pour un lot)."""
+        return self.layer.getFeature(self.fid).geometry()
+
+
+def folio_geometries(records):
+    """{fid: géométrie} pour un lot de `FolioRecord`, en une seule requête."""
+    if not records:
+        return {}
+    request = QgsFeatureRequest().setFilterFids([r.fid for r in records])
+    request.setNoAttributes()
+    return {f.id(): f.geometry() for f in records[0].layer.getFeatures(request)}
+
+# ---------------------------------------------------------------------------
+# Résultat en mémoire
+# ---------------------------------------------------------------------------
+
+class Annexe6Result:
+    """
+    Résultat d’un passage de `process_data`, gardé en mémoire tant que
+    l’utilisateur n’a pas validé (mode « dry-run »).
+    Se dépaquette comme l’ancien tuple :
       total_zones, length_c, length_b, length_w, corrections, folios_vrais, raccords
     """
 
-    # ------------------------------------------------------------------ #
-    # 0. S’assurer que les champs de longueur existent                   #
-    # ------------------------------------------------------------------ #
+    def __init__(self, total_zones, length_c, length_b, length_w,
+                 corrections, vrais, raccords, clc, clb, contributions=None):
+        self.total_zones = total_zones
+        self.length_c = length_c
+        self.length_b = length_b
+        self.length_w = length_w
+        self.corrections = corrections
+        self.vrais = vrais
+        self.raccords = raccords
+        self.clc = clc          # {fid folio vrai: longueur classe C}
+        self.clb = clb          # {fid folio vrai: longueur classe B + W}
+        self.contributions = contributions or {}   # {fid zone: ZoneContribution}
+
+    def __iter__(self):
+        return iter((self.total_zones, self.length_c, self.length_b,
+                     self.length_w, self.corrections, self.vrais,
+                     self.raccords))
+
+
+class ZoneContribution:
+    """
+    Métrage qu’une zone est seule à couvrir, donc retiré des totaux (et des
+    folios) si on la supprime. Les recouvrements entre zones ne sont
+    comptés pour aucune d’elles.
+    """
+    __slots__ = ('c', 'b', 'folios')
+
+    def __init__(self):
+        self.c = 0.0
+        self.b = 0.0
+        self.folios = {}        # {fid folio vrai: [classe C, classe B]}
+
+    def add(self, seg_class, length):
+        if seg_class == 'C':
+            self.c += length
+        else:
+            self.b += length
+
+    def add_folio(self, fid, seg_class, share):
+        acc = self.folios.setdefault(fid, [0.0, 0.0])
+        acc[0 if seg_class == 'C' else 1] += share
+
+
+def split_by_owners(geom, cand_ids, geom_by_id):
+    """
+    Découpe progressivement *geom* par chaque polygone candidat.
+    Retourne [(sous-géométrie, {ids des polygones qui la couvrent})].
+    """
+    parts = [(geom, set())]
+    for pid in cand_ids:
+        p_geom = geom_by_id[pid]
+        if not geom.intersects(p_geom):
+            continue
+
+        new_parts = []
+        for geom_part, owners in parts:
+            if geom_part.intersects(p_geom):
+                overlap = geom_part.intersection(p_geom)
+                reste   = geom_part.difference(p_geom)
+
+                if not overlap.isEmpty():
+                    new_parts.append((overlap, owners | {pid}))
+                if not reste.isEmpty():
+                    new_parts.append((reste, owners))
+            else:
+                new_parts.append((geom_part, owners))
+        parts = new_parts
+    return parts
+
+
+def compute_segment(g_raw, seg_class, zone_union, zone_index, zone_geom_by_id,
+                    folio_index, folio_geom_by_id, zone_probe=None, tolerance=0.0):
+    """
+    Calcul d’un segment, indépendant des autres (donc mis en cache) :
+    {"d": empreinte de la portion en zone ou None, "len": longueur,
+     "f": [[fid folio, part]], "z": [[fid zone, longueur exclusive, [[fid folio, part]]]]}.
+    *zone_index* à None : pas de contributions par zone.
+    *zone_probe* / *tolerance* : test d’exclusion préalable sur copies
+    simplifiées (voir `simplified_probe`) ; les longueurs restent mesurées
+    sur la géométrie d’origine.
+    """
+    # -- on garde uniquement la portion dans la zone de détection --
+    if zone_union:
+        if zone_probe is not None and not g_raw.simplify(tolerance).intersects(zone_probe):
+            return {"d": None}                        # loin de toute zone
+        if not g_raw.intersects(zone_union):          # totalement hors zone
+            return {"d": None}
+        g_seg = g_raw.intersection(zone_union)        # portion à l'intérieur
+        if g_seg.isEmpty():
+            return {"d": None}
+    else:
+        g_seg = g_raw
+
+    record = {"d": geometry_digest(g_seg), "len": g_seg.length(), "f": [], "z": []}
+    if seg_class not in ('C', 'B', 'W'):
+        return record   # ni C ni B/W : rien à répartir
+
+    # --- Découpe par zones (contributions) puis par folios ---
+    if zone_index is not None:
+        zone_parts = split_by_owners(
+            g_seg, zone_index.intersects(g_seg.boundingBox()), zone_geom_by_id
+        )
+    else:
+        zone_parts = [(g_seg, set())]
+
+    shares = {}
+    for zone_part, zone_owners in zone_parts:
+        # portion couverte par une seule zone : elle disparaîtrait des
+        # totaux si cette zone était supprimée
+        contrib = None
+        if len(zone_owners) == 1:
+            contrib = [next(iter(zone_owners)), zone_part.length(), {}]
+            record["z"].append(contrib)
+
+        cand_ids = folio_index.intersects(zone_part.boundingBox())
+        if not cand_ids:
+            continue  # pas de folio 'vrai' concerné
+
+        # Attribution des longueurs par sous-segment
+        for geom_part, owners in split_by_owners(zone_part, cand_ids, folio_geom_by_id):
+            if not owners:
+                continue   # portion hors folio 'vrai'
+            share = geom_part.length() / len(owners)
+            for fid in owners:
+                shares[fid] = shares.get(fid, 0.0) + share
+                if contrib is not None:
+                    contrib[2][fid] = contrib[2].get(fid, 0.0) + share
+
+    record["f"] = [[fid, v] for fid, v in shares.items()]
+    for contrib in record["z"]:
+        contrib[2] = [[fid, v] for fid, v in contrib[2].items()]
+    return record
+
+
+def iter_segments(line_layer, line_store=None, class_field='classe', extent=None,
+                  centred=False):
+    """
+    Parcourt les lignes non vides : (classe brute, emprise, empreinte(), géométrie()).
+    Les deux derniers sont des appels différés : un segment repris du cache
+    n’a besoin d’aucune géométrie. Avec *line_store*, lecture des tableaux
+    en mémoire et préfiltre vectorisé sur *extent* (emprise des zones).
+    Avec *centred*, seules les lignes dont le centre d’emprise est dans
+    *extent* (bornes min incluses, max exclues) sont rendues : chaque ligne
+    appartient ainsi à une seule tuile.
+    """
+    if line_store is not None:
+        if extent is None:
+            indices = range(line_store.count)
+        elif centred:
+            indices = line_store.centred_in(extent)
+        else:
+            indices = line_store.intersecting(extent)
+        for i in indices:
+            yield (line_store.class_name(i), line_store.bbox_rect(i),
+                   lambda i=i: line_store.digest(i),
+                   lambda i=i: line_store.geometry(i))
+        return
+
+    request = QgsFeatureRequest().setSubsetOfAttributes([class_field], line_layer.fields())
+    if centred:
+        request.setFilterRect(extent)
+    for seg in line_layer.getFeatures(request):
+        g_raw = seg.geometry()
+        if g_raw is None or g_raw.isEmpty():
+            continue
+        if centred and not _centre_in(g_raw.boundingBox(), extent):
+            continue
+        yield (str(seg[class_field]), g_raw.boundingBox(),
+               lambda g=g_raw: geometry_digest(g),
+               lambda g=g_raw: g)
+
+
+def _centre_in(bbox, tile):
+    cx, cy = bbox.center().x(), bbox.center().y()
+    return (tile.xMinimum() <= cx < tile.xMaximum()
+            and tile.yMinimum() <= cy < tile.yMaximum())
+
+
+# tampon de l’enveloppe simplifiée (voir `simplified_probe`) : rayon en
+# multiples de la tolérance, segments par quart de cercle
+PROBE_RADIUS = 3.0
+PROBE_SEGMENTS = 8
+
+# bornes du découpage en tuiles : taille minimale (unités de carte) et
+# nombre maximal de tuiles (une requête fournisseur par tuile)
+MIN_CHUNK_SIZE = 100.0
+MAX_CHUNKS = 4096
+
+
+def chunk_size_setting(size) -> float:
+    """Taille de tuile retenue : 0 (couche entière) ou au moins MIN_CHUNK_SIZE."""
+    size = float(size or 0)
+    return 0.0 if size <= 0 else max(size, MIN_CHUNK_SIZE)
+
+
+def chunk_grid(extent, chunk_size):
+    """
+    (taille de tuile, colonnes, lignes) pour couvrir *extent* : la taille
+    est portée à MIN_CHUNK_SIZE, puis agrandie si la grille dépasse
+    MAX_CHUNKS tuiles.
+    """
+    size = max(float(chunk_size), MIN_CHUNK_SIZE)
+    cells = (extent.width() / size + 1) * (extent.height() / size + 1)
+    if cells > MAX_CHUNKS:
+        size *= math.sqrt(cells / MAX_CHUNKS)
+    while (int(extent.width() // size) + 1) * (int(extent.height() // size) + 1) > MAX_CHUNKS:
+        size *= 1.05
+    return size, int(extent.width() // size) + 1, int(extent.height() // size) + 1
+
+
+def iter_chunks(line_layer, line_store, class_field, chunk_size):
+    """
+    Découpe la couche de lignes en tuiles de *chunk_size* (unités de carte,
+    bornée par `chunk_grid`), parcourues ligne de tuiles par ligne de
+    tuiles. Rend, pour chaque tuile non vide : (emprise cumulée de ses
+    segments, [segments de iter_segments]).
+    Un segment est rattaché à la tuile de son centre d’emprise : chaque
+    ligne n’est lue qu’une fois. Deux lignes différentes dont les portions
+    en zone sont identiques peuvent tomber dans deux tuiles : les doublons
+    sont écartés par `process_data` sur toute la couche, pas par tuile.
+    """
+    extent = line_layer.extent()
+    if extent.isNull():
+        return
+    chunk_size, nx, ny = chunk_grid(extent, chunk_size)
+    x0, y0 = extent.xMinimum(), extent.yMinimum()
+    for row in range(ny):
+        for col in range(nx):
+            tile = QgsRectangle(x0 + col * chunk_size, y0 + row * chunk_size,
+                                x0 + (col + 1) * chunk_size, y0 + (row + 1) * chunk_size)
+            segments = list(iter_segments(line_layer, line_store, class_field,
+                                          tile, centred=True))
+            if not segments:
+                continue
+            seg_extent = QgsRectangle(segments[0][1])
+            for segment in segments[1:]:
+                seg_extent.combineExtentWith(segment[1])
+            yield seg_extent, segments
+
+
+def load_zone_geometries(detection_zone_layer, exclude_ids, rect=None):
+    """{fid: géométrie} des zones de type 0 retenues (limitées à *rect*)."""
+    request = QgsFeatureRequest()
+    if rect is not None:
+        request.setFilterRect(rect)
+    return {z.id(): z.geometry() for z in detection_zone_layer.getFeatures(request)
+            if z['type'] == 0 and z.id() not in exclude_ids}
+
+
+def load_folio_geometries(folio_layer, vrai_ids, rect):
+    """{fid: géométrie} des folios 'vrai' qui touchent *rect*."""
+    request = QgsFeatureRequest().setFilterRect(rect)
+    request.setNoAttributes()
+    return {f.id(): f.geometry() for f in folio_layer.getFeatures(request)
+            if f.id() in vrai_ids}
+
+
+def zones_without_class_c(line_layer, detection_zone_layer, line_store=None):
+    """
+    Zones de type 0 qu’aucune ligne de classe C ne traverse (à revoir).
+    Les lignes C sont lues une seule fois pour toutes les zones.
+    """
+    zones = list(detection_zone_layer.getFeatures(
+        QgsFeatureRequest().setFilterExpression("type = 0")
+    ))
+
+    if line_store is not None:
+        def crosses_c(z_geom):
+            return any(line_store.geometry(i).intersects(z_geom)
+                       for i in line_store.intersecting(z_geom.boundingBox(), "C"))
+    else:
+        c_geoms = {}
+        c_index = QgsSpatialIndex()
+        for l in line_layer.getFeatures():
+            if l["classe"] == "C" and l.hasGeometry():
+                c_geoms[l.id()] = l.geometry()
+                c_index.addFeature(l.id(), l.geometry().boundingBox())
+
+        def crosses_c(z_geom):
+            return any(c_geoms[fid].intersects(z_geom)
+                       for fid in c_index.intersects(z_geom.boundingBox()))
+
+    return [z for z in zones if not crosses_c(z.geometry())]
+
+
+def simplified_probe(zone_union, tolerance):
+    """
+    Enveloppe simplifiée de *zone_union* pour les tests d’exclusion : elle
+    contient l’union élargie de *tolerance*. Une ligne simplifiée à
+    *tolerance* qui ne la touche pas ne touche donc pas les zones.
+    Le tampon polygonal reste à r·cos(π / (4 · PROBE_SEGMENTS)) ≈ 0,995 r
+    de l’union au moins, et la simplification peut le rentrer de
+    *tolerance* : r = PROBE_RADIUS × tolerance laisse ≥ 1,98 × tolerance.
+    """
+    return zone_union.buffer(PROBE_RADIUS * tolerance, PROBE_SEGMENTS).simplify(tolerance)
+
+
+def ensure_length_fields(folio_layer):
+    """Crée au besoin les champs lg_res_clc / lg_res_clb."""
     new_fields = []
     if 'lg_res_clc' not in folio_layer.fields().names():
         new_fields.append(QgsField('lg_res_clc', QVariant.Double))
@@ -96,197 +494,296 @@ def process_data(
         folio_layer.updateFields()
         folio_layer.commitChanges()
 
-    # ------------------------------------------------------------------ #
-    # 1. Séparer les folios par type et indexer les "vrai"               #
-    # ------------------------------------------------------------------ #
+
+def split_folios(folio_layer, vrai_geometries=None):
+    """
+    Sépare les folios par type : (vrais, raccords, corrections), en
+    `FolioRecord`. Les corrections gardent tous les champs (corrections.csv),
+    les autres seulement ceux de l’Annexe 6. Si *vrai_geometries* (dict) est
+    fourni, il reçoit les géométries des folios 'vrai' lues dans le même
+    passage ; sinon la couche est lue sans géométrie.
+    """
     type_field = 'type'
-    vrais, raccords, corrections = [], [], []
-    folio_index = QgsSpatialIndex()
-    folio_geom_by_id = {}
+    # champs portés par les attributs dédiés de FolioRecord
+    own = ('type', 'id_tr', 'lg_res_clc', 'lg_res_clb')
+    names = [n for n in folio_layer.fields().names() if n not in own]
+    csv_schema = {n: i for i, n in enumerate(
+        n for n in names if n in FOLIO_CSV_FIELDS.values())}
+    full_schema = {n: i for i, n in enumerate(names)}
 
-    for f in folio_layer.getFeatures():
+    request = QgsFeatureRequest()
+    if vrai_geometries is None:
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+
+    vrais, raccords, corrections = [], [], []
+    for f in folio_layer.getFeatures(request):
         t = str(f[type_field]).lower()
         if t == 'vrai':
-            vrais.append(f)
-            folio_index.addFeature(f)           # API >= 3.30
-            folio_geom_by_id[f.id()] = f.geometry()
+            vrais.append(FolioRecord(f, csv_schema, folio_layer))
+            if vrai_geometries is not None:
+                vrai_geometries[f.id()] = f.geometry()
         elif t == 'raccord':
-            raccords.append(f)
+            raccords.append(FolioRecord(f, csv_schema, folio_layer))
         elif t == 'correction':
-            corrections.append(f)
+            corrections.append(FolioRecord(f, full_schema, folio_layer))
+    return vrais, raccords, corrections
 
-    # dictionnaires cumul longueur
-    clc = {f.id(): 0.0 for f in vrais}
-    clb = {f.id(): 0.0 for f in vrais}
 
-    # ------------------------------------------------------------------ #
-    # 1.b  Union des zones de détection                                 #
-    # ------------------------------------------------------------------ #
-    exclude_ids = {f.id() for f in zones_to_exclude} if zones_to_exclude else set()
-    zone_geoms = [z.geometry() for z in detection_zone_layer.getFeatures()
-                  if z['type'] == 0 and z.id() not in exclude_ids]
-    zone_union = QgsGeometry.unaryUnion(zone_geoms) if zone_geoms else None
+def write_lengths(folio_layer, result):
+    """
+    Écrit en une seule session d’édition les longueurs d’un résultat :
+    valeurs arrondies sur les folios 'vrai', champs vides sur les raccords.
+    """
+    ensure_length_fields(folio_layer)
+    idx_clc = folio_layer.fields().indexFromName('lg_res_clc')
+    idx_clb = folio_layer.fields().indexFromName('lg_res_clb')
 
-    # ------------------------------------------------------------------ #
-    # 2. Parcours de tous les segments                                   #
-    # ------------------------------------------------------------------ #
-    length_c = length_b = 0.0
-    seen_wkb = set()
-    class_field = 'classe'
+    values = {f.id(): (round(result.clc[f.id()], 1), round(result.clb[f.id()], 1))
+              for f in result.vrais}
+    values.update({f.id(): (None, None) for f in result.raccords})   # champs vides
 
-    for seg in line_layer.getFeatures():
-        g_raw = seg.geometry()
-        if g_raw is None or g_raw.isEmpty():
-            continue
+    folio_layer.startEditing()
+    for fid, (v_clc, v_clb) in values.items():
+        folio_layer.changeAttributeValues(fid, {idx_clc: v_clc, idx_clb: v_clb})
+    folio_layer.commitChanges()
 
-        # -- on garde uniquement la portion dans la zone de détection --
-        if zone_union:
-            if not g_raw.intersects(zone_union):          # totalement hors zone
-                continue
-            g_seg = g_raw.intersection(zone_union)        # portion à l'intérieur
-            if g_seg.isEmpty():
-                continue
-        else:
-            g_seg = g_raw
-        wkb = g_seg.asWkb()
-        if wkb in seen_wkb:                      # doublon strict
-            continue
-        seen_wkb.add(wkb)
+    # les enregistrements en mémoire portent les valeurs écrites
+    for f in result.vrais + result.raccords:
+        f.clc, f.clb = values[f.id()]
 
-        seg_class = str(seg[class_field]).strip().upper()
-        seg_len   = g_seg.length()
+# ---------------------------------------------------------------------------
+# Traitement principal
+# ---------------------------------------------------------------------------
 
-        # --- Totaux globaux ---
-        if seg_class == 'C':
-            length_c += seg_len
-        elif seg_class in ('B', 'W'):
-            length_b += seg_len     # W inclus
+def process_data(
+    line_layer,
+    detection_zone_layer,
+    folio_layer,
+    output_folder,
+    zones_to_exclude=None,
+    dry_run=False,
+    with_contributions=False,
+    use_cache=True,
+    line_store=None,
+    chunk_size=None,
+    feedback=None,
+    simplify_tolerance=0.0,
+):
+    """
+    Calcul précis des longueurs par folio.
+    - Portion exclusive : longueur entière pour le folio.
+    - Portion commune à k folios : longueur / k pour chacun.
+    En mode *dry_run*, rien n’est écrit dans la couche folio : les longueurs
+    restent dans l’`Annexe6Result` retourné (voir `write_lengths`).
+    Avec *with_contributions*, le même passage calcule pour chaque zone le
+    métrage C/B (total et par folio) qui disparaîtrait avec elle.
+    Avec *use_cache*, les segments inchangés (voisinage compris) reprennent
+    leurs parts depuis le cache disque posé à côté de la couche folio.
+    *line_store* (`LineCoordStore`) : lignes lues depuis le magasin de
+    coordonnées plutôt que décodées depuis le fournisseur.
+    Avec *chunk_size* (> 0, unités de carte), les lignes sont traitées par
+    tuiles : seules les zones et folios touchant la tuile courante sont en
+    mémoire. La mémoire suit alors la densité de la tuile la plus chargée,
+    pas la taille de la couche ; une tuile très dense reste coûteuse.
+    *simplify_tolerance* (> 0) : tests d’exclusion sur copies simplifiées,
+    jamais sur les géométries livrées ni pour les longueurs.
+    *feedback* (QgsFeedback) : progression au prorata des lignes parcourues,
+    arrêt entre deux segments par `Annexe6Cancelled` (couche folio intacte).
+    Retourne un `Annexe6Result`, dépaquetable en :
+      total_zones, length_c, length_b, length_w, corrections, folios_vrais, raccords
+    """
 
-        # --- Folios candidats ---
-        cand_ids = folio_index.intersects(g_seg.boundingBox())
-        if not cand_ids:
-            continue  # pas de folio 'vrai' concerné
+    # Rien n’est écrit avant la fin du parcours (champs compris, voir
+    # write_lengths) : une interruption laisse la couche folio intacte.
 
-        # Liste des sous-segments : [(geom, owners_set)]
-        subsegments = [(g_seg, set())]
+    # ------------------------------------------------------------------ #
+    # 1. Séparer les folios par type                                     #
+    # ------------------------------------------------------------------ #
+    chunked = bool(chunk_size) and chunk_size > 0
+    # géométries des "vrai" gardées le temps du calcul seulement ; par
+    # blocs, elles sont relues tuile par tuile
+    folio_geom_by_id = None if chunked else {}
+    vrais, raccords, corrections = split_folios(folio_layer, folio_geom_by_id)
+    vrai_ids = {f.id() for f in vrais}
+
+    # dictionnaires cumul longueur (un flottant par folio / zone : les
+    # sommes partielles de chaque bloc y sont versées au fil de l’eau)
+    clc = {f.id(): 0.0 for f in vrais}
+    clb = {f.id(): 0.0 for f in vrais}
+    contributions = {}
+    length_c = length_b = 0.0
 
-        # Découpe progressive par chaque folio intersecté
-        for fid in cand_ids:
-            f_geom = folio_geom_by_id[fid]
-            if not g_seg.intersects(f_geom):
-                continue
+    exclude_ids = set(zones_to_exclude or ())
+    class_field = 'classe'
 
-            new_subs = []
-            for geom_part, owners in subsegments:
-                if geom_part.intersects(f_geom):
-                    overlap = geom_part.intersection(f_geom)
-                    reste   = geom_part.difference(f_geom)
+    # ------------------------------------------------------------------ #
+    # 1.b  Cache disque par segment (voir cache.py)                     #
+    # ------------------------------------------------------------------ #
+    cache = SegmentCache.open_for(folio_layer, output_folder) if use_cache else None
+    progress = _Progress(
+        feedback, line_store.count if line_store is not None else line_layer.featureCount()
+    )
 
-                    if not overlap.isEmpty():
-                        new_subs.append((overlap, owners | {fid}))
-                    if not reste.isEmpty():
-                        new_subs.append((reste, owners))
+    # ------------------------------------------------------------------ #
+    # 2. Parcours des segments, d’un bloc ou tuile par tuile             #
+    # ------------------------------------------------------------------ #
+    if chunked:
+        chunks = iter_chunks(line_layer, line_store, class_field, chunk_size)
+    else:
+        chunks = [(None, None)]
+
+    # empreintes des portions en zone déjà comptées, sur toute la couche
+    # (deux doublons peuvent venir de deux tuiles)
+    seen_digests = set()
+    try:
+        for chunk_extent, segments in chunks:
+            # -- zones et folios "vrai" du bloc, index et union --
+            zone_geom_by_id = load_zone_geometries(
+                detection_zone_layer, exclude_ids, chunk_extent
+            )
+            if chunked:
+                folio_geom_by_id = load_folio_geometries(
+                    folio_layer, vrai_ids, chunk_extent
+                )
+            zone_geoms = list(zone_geom_by_id.values())
+            zone_union = QgsGeometry.unaryUnion(zone_geoms) if zone_geoms else None
+            zone_probe = None
+            if simplify_tolerance and simplify_tolerance > 0 and zone_union is not None:
+                zone_probe = simplified_probe(zone_union, simplify_tolerance)
+
+            # index des zones : voisinage des segments (clé de cache) et contributions
+            zone_index = QgsSpatialIndex()
+            for zid, z_geom in zone_geom_by_id.items():
+                zone_index.addFeature(zid, z_geom.boundingBox())
+            folio_index = QgsSpatialIndex()
+            for fid, f_geom in folio_geom_by_id.items():
+                folio_index.addFeature(fid, f_geom.boundingBox())
+
+            if cache is not None:
+                zone_digest = {zid: geometry_digest(g) for zid, g in zone_geom_by_id.items()}
+                folio_digest = {fid: geometry_digest(g) for fid, g in folio_geom_by_id.items()}
+
+            if segments is None:
+                if zone_union is not None:
+                    segments = iter_segments(line_layer, line_store, class_field,
+                                             zone_union.boundingBox())
                 else:
-                    new_subs.append((geom_part, owners))
-            subsegments = new_subs
-
-        # Attribution des longueurs par sous-segment
-        for geom_part, owners in subsegments:
-            if not owners:
-                continue   # portion hors folio 'vrai'
-            L_part = geom_part.length()
-            share  = L_part / len(owners)
-            for fid in owners:
+                    segments = iter_segments(line_layer, line_store, class_field)
+
+            for seg_class, bbox, digest_of, geometry_of in segments:
+                progress.tick()
+                seg_class = seg_class.strip().upper()
+
+                record = key = None
+                if cache is not None:
+                    key = segment_key(
+                        digest_of(), seg_class,
+                        [(zid, zone_digest[zid]) for zid in zone_index.intersects(bbox)],
+                        [(fid, folio_digest[fid]) for fid in folio_index.intersects(bbox)],
+                        with_contributions, simplify_tolerance,
+                    )
+                    record = cache.get(key)
+                if record is None:
+                    record = compute_segment(
+                        geometry_of(), seg_class, zone_union,
+                        zone_index if with_contributions and zone_geom_by_id else None,
+                        zone_geom_by_id, folio_index, folio_geom_by_id,
+                        zone_probe, simplify_tolerance,
+                    )
+                    if cache is not None:
+                        cache.put(key, record)
+
+                if record["d"] is None:
+                    continue
+                if record["d"] in seen_digests:          # doublon strict
+                    continue
+                seen_digests.add(record["d"])
+
+                # --- Totaux globaux ---
                 if seg_class == 'C':
-                    clc[fid] += share
+                    length_c += record["len"]
                 elif seg_class in ('B', 'W'):
-                    clb[fid] += share
-
-    # ------------------------------------------------------------------ #
-    # 3. Écriture des valeurs dans la couche folio                       #
-    # ------------------------------------------------------------------ #
-    folio_layer.startEditing()
-    idx_clc = folio_layer.fields().indexFromName('lg_res_clc')
-    idx_clb = folio_layer.fields().indexFromName('lg_res_clb')
-
-    for f in vrais:
-        fid = f.id()
-        f[idx_clc] = round(clc[fid], 1)
-        f[idx_clb] = round(clb[fid], 1)
-        folio_layer.updateFeature(f)
-
-    for f in raccords:                 # champs vides sur les raccords
-        f[idx_clc] = None
-        f[idx_clb] = None
-        folio_layer.updateFeature(f)
-
-    folio_layer.commitChanges()
+                    length_b += record["len"]     # W inclus
+                else:
+                    continue
+
+                # --- Parts par folio et contributions par zone ---
+                cl = clc if seg_class == 'C' else clb
+                for fid, share in record["f"]:
+                    cl[fid] += share
+                for zid, zone_len, folio_shares in record["z"]:
+                    contrib = contributions.setdefault(zid, ZoneContribution())
+                    contrib.add(seg_class, zone_len)
+                    for fid, share in folio_shares:
+                        contrib.add_folio(fid, seg_class, share)
+    finally:
+        if cache is not None:
+            cache.close()
+    progress.finish()
 
     # ------------------------------------------------------------------ #
-    # 4. Valeurs de retour                                               #
+    # 3. Résultat en mémoire (+ écriture hors dry-run)                   #
     # ------------------------------------------------------------------ #
     total_zones = len(vrais) + len(raccords)
-    return (total_zones,
-            round(length_c, 1),
-            round(length_b, 1),
-            0.0,
-            corrections,
-            vrais,
-            raccords)
+    result = Annexe6Result(total_zones,
+                           round(length_c, 1),
+                           round(length_b, 1),
+                           0.0,
+                           corrections,
+                           vrais,
+                           raccords,
+                           clc,
+                           clb,
+                           contributions)
+    if not dry_run:
+        write_lengths(folio_layer, result)
+    return result
 
 # ---------------------------------------------------------------------------
 #  Fonctions annexes : numérotation TR, export CSV, nettoyage bandes
 #  (inchangées sauf nettoyage mineur)
 # ---------------------------------------------------------------------------
 
-def update_tr_numbers(detection_zone_layer, deleted_features):
+def update_tr_numbers(detection_zone_layer, deleted_ids):
+    deleted_ids = set(deleted_ids)
     remaining = [z for z in detection_zone_layer.getFeatures("type = 0")
-                 if z.id() not in {f.id() for f in deleted_features}]
+                 if z.id() not in deleted_ids]
     remaining.sort(key=lambda x: int(re.search(r'\d+', x['id']).group()))
     return {zone['id']: f'TR{idx}' for idx, zone in enumerate(remaining, 1)}
 
 
-def generate_csv_files(corrections, folios, raccords, folio_layer, output_folder):
+def generate_csv_files(corrections, folios, raccords, folio_layer, output_folder,
+                       feedback=None):
+    """
+    Écrit Annexe_6.csv, corrections.csv et Export_atlas.csv. Les fichiers sont
+    d’abord écrits en « .part » puis renommés ensemble : une erreur ou un
+    arrêt (*feedback*, `Annexe6Cancelled` relevée) laisse les précédents en place.
+    """
+    paths = {
+        'correction': os.path.join(output_folder, 'corrections.csv'),
+        'folios':     os.path.join(output_folder, 'Annexe_6.csv'),
+        'atlas':      os.path.join(output_folder, 'Export_atlas.csv')
+    }
+    parts = {k: p + '.part' for k, p in paths.items()}
     try:
-        paths = {
-            'correction': os.path.join(output_folder, 'corrections.csv'),
-            'folios':     os.path.join(output_folder, 'Annexe_6.csv'),
-            'atlas':      os.path.join(output_folder, 'Export_atlas.csv')
-        }
-        for p in paths.values():
-            if os.path.exists(p):
-                os.remove(p)
-
         folios.sort(key=sort_by_tr)
         corrections.sort(key=sort_by_tr)
         grouped = group_raccord_with_folios_and_tr(folios[:], raccords[:])
+        progress = _Progress(feedback, 2 * len(grouped) + len(corrections))
 
         # ---------- Annexe 6 ------------------------------------------------
-        folio_csv_fields = {
-            'Commune': 'commune_no',
-            'Code INSEE': 'commune_in',
-            'Rue concernée': 'voie_princ',
-            'Plan': 'plan_nom',
-            'Code qualité du plan': 'qualite_li',
-            'Identifiant du tronçon à détecter (facultatif)': 'id_tr',
-            'Linéaire réseaux cartographié en classe PI (mètre)': 'lg_res_clc',
-            'Matière réseaux cartographié en PI': 'mat_pi',
-            'Linéaire réseaux cartographié en classe B (mètre)': 'lg_res_clb',
-            'Matière réseaux cartographié en classe B': 'mat_b',
-            'Caracteristiques réseau du tronçon (facultatif)': 'carac_res',
-            'Quintile du plan': 'cdp_lib',
-            'Commentaire précision commande': 'commentair'
-        }
-
-        with open(paths['folios'], 'w', newline='', encoding='utf-8') as f:
+        folio_csv_fields = FOLIO_CSV_FIELDS
+
+        with open(parts['folios'], 'w', newline='', encoding='utf-8') as f:
             f.write('\ufeff')  # BOM pour Excel
             w = csv.writer(f, delimiter=';', quoting=csv.QUOTE_MINIMAL)
             w.writerow(folio_csv_fields.keys())
 
             for feat in grouped:
+                progress.tick()
                 row = []
                 for label, field in folio_csv_fields.items():
-                    raw = feat[field] if field in feat.fields().names() else ''
+                    raw = feat.get(field, '')
                     val = ''
 
                     if field in ('lg_res_clc', 'lg_res_clb'):
@@ -310,13 +807,14 @@ def generate_csv_files(corrections, folios, raccords, folio_layer, output_folder
                 w.writerow(row)
 
         # ---------- corrections.csv ----------------------------------------
-        with open(paths['correction'], 'w', newline='', encoding='utf-8') as f:
+        with open(parts['correction'], 'w', newline='', encoding='utf-8') as f:
             f.write('\ufeff')
             w = csv.writer(f, delimiter=';')
             fields = [fld.name() for fld in folio_layer.fields()]
             w.writerow(fields)
             for feat in corrections:
-                w.writerow([clean_value(feat[f]) for f in fields])
+                progress.tick()
+                w.writerow([clean_value(feat.get(f)) for f in fields])
 
         # ---------- Export_atlas.csv ---------------------------------------
         atlas_fields = [
@@ -328,18 +826,34 @@ def generate_csv_files(corrections, folios, raccords, folio_layer, output_folder
             'Date de verrouillage prévue', 'Date de verrouillage effective',
             'Date d\'intégration prévue', 'Date d\'intégration réalisée',
         ]
-        with open(paths['atlas'], 'w', newline='', encoding='utf-8') as f:
+        with open(parts['atlas'], 'w', newline='', encoding='utf-8') as f:
             f.write('\ufeff')
             w = csv.writer(f, delimiter=';')
             w.writerow(atlas_fields)
             for feat in grouped:
+                progress.tick()
                 w.writerow([clean_value(feat['plan_nom'])] + [''] * 14)
 
+        for key, path in paths.items():
+            os.replace(parts[key], path)
+        progress.finish()
         return True
+    except Annexe6Cancelled:
+        _remove_files(parts.values())
+        raise
     except Exception as e:
+        _remove_files(parts.values())
         QMessageBox.critical(None, 'Erreur', f'Erreur génération CSV : {e}')
         return False
 
+
+def _remove_files(paths):
+    for p in paths:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
 def cleanup_rubber_bands(canvas):
     """Supprime toutes les QgsRubberBand du canvas actif."""
     from qgis.gui import QgsRubberBand
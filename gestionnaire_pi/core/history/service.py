@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Historique local des exécutions (SQLite) et rapport de performances
+*************************/
+"""
+import html
+import json
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime
+
+from qgis.core import Qgis, QgsApplication
+
+KIND_LOT = "creation_lot"
+KIND_ANNEXE6 = "annexe6"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at      TEXT NOT NULL,
+    kind            TEXT NOT NULL,
+    plugin_version  TEXT,
+    qgis_version    TEXT,
+    duration_s      REAL,
+    input_features  INTEGER,
+    inputs_json     TEXT,
+    phases_json     TEXT,
+    peak_memory_mb  REAL,
+    output_bytes    INTEGER,
+    outputs_json    TEXT
+)
+"""
+
+
+def history_path() -> str:
+    """Fichier SQLite dans le profil QGIS de l’utilisateur."""
+    folder = os.path.join(QgsApplication.qgisSettingsDirPath(), "gestionnaire_pi")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, "run_history.sqlite")
+
+
+def _connect(path=None):
+    con = sqlite3.connect(path or history_path())
+    con.execute(_SCHEMA)
+    return con
+
+
+def plugin_version() -> str:
+    try:
+        from qgis.utils import pluginMetadata
+        return pluginMetadata("gestionnaire_pi", "version")
+    except Exception:
+        return ""
+
+
+def current_memory_mb():
+    """Mémoire résidente actuelle du processus QGIS (Mo), ou None si indisponible."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2 ** 20
+    except ImportError:
+        pass
+    try:                            # Linux sans psutil
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MemorySampler:
+    """
+    Pic de mémoire résidente *pendant une exécution* : la mémoire courante
+    est relevée à intervalle régulier (thread de fond) et le maximum gardé.
+    Les pics du processus (ru_maxrss, peak_wset) couvrent toute la session
+    QGIS et ne distinguent pas les exécutions.
+    """
+    INTERVAL_S = 0.5
+
+    def __init__(self):
+        self.peak_mb: float | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self) -> None:
+        mb = current_memory_mb()
+        if mb is not None and (self.peak_mb is None or mb > self.peak_mb):
+            self.peak_mb = mb
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.INTERVAL_S):
+            self._sample()
+
+    def start(self) -> "MemorySampler":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="gestionnaire_pi-memory",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> float | None:
+        """Arrête l’échantillonnage et renvoie le pic (Mo)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sample()
+        return self.peak_mb
+
+
+def record_run(kind, started_at, duration_s, inputs, phases, outputs, peak_memory_mb=None):
+    """
+    Enregistre une exécution.
+
+    :param inputs: {nom de couche: nombre d’entités}
+    :param phases: {phase: durée en s}
+    :param outputs: chemins des fichiers produits (tailles relevées ici)
+    :param peak_memory_mb: pic mémoire relevé pendant l’exécution (`MemorySampler`)
+    """
+    sizes = {}
+    for path in outputs:
+        path = path.split("|")[0] if path else path
+        if path and os.path.exists(path):
+            sizes[path] = os.path.getsize(path)
+
+    with closing(_connect()) as con, con:
+        con.execute(
+            "INSERT INTO runs (started_at, kind, plugin_version, qgis_version,"
+            " duration_s, input_features, inputs_json, phases_json,"
+            " peak_memory_mb, output_bytes, outputs_json)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                datetime.fromtimestamp(started_at).isoformat(timespec="seconds"),
+                kind,
+                plugin_version(),
+                Qgis.version(),
+                round(duration_s, 3),
+                sum(inputs.values()),
+                json.dumps(inputs, ensure_ascii=False),
+                json.dumps({k: round(v, 3) for k, v in phases.items()}, ensure_ascii=False),
+                peak_memory_mb,
+                sum(sizes.values()),
+                json.dumps(sizes, ensure_ascii=False),
+            ),
+        )
+
+
+def fetch_runs(kind=None, limit=500):
+    """Dernières exécutions (plus récentes d’abord), en dictionnaires."""
+    with closing(_connect()) as con:
+        con.row_factory = sqlite3.Row
+        sql = "SELECT * FROM runs"
+        args = ()
+        if kind:
+            sql += " WHERE kind = ?"
+            args = (kind,)
+        sql += " ORDER BY id DESC LIMIT ?"
+        return [dict(r) for r in con.execute(sql, args + (limit,))]
+
+
+def _throughput(run) -> float:
+    """Entités traitées par seconde."""
+    d = run["duration_s"] or 0
+    return (run["input_features"] or 0) / d if d > 0 else 0.0
+
+
+def export_html_report(path: str) -> str:
+    """Écrit un rapport HTML (tendance de débit par version) et renvoie *path*."""
+    runs = fetch_runs()
+    esc = html.escape
+
+    # 1. Débit moyen par type / version plugin / version QGIS
+    groups: dict[tuple, list[float]] = {}
+    for r in reversed(runs):
+        key = (r["kind"], r["plugin_version"] or "?", r["qgis_version"] or "?")
+        groups.setdefault(key, []).append(_throughput(r))
+    best = max((sum(v) / len(v) for v in groups.values()), default=0) or 1
+
+    rows_trend = []
+    for (kind, pv, qv), values in groups.items():
+        avg = sum(values) / len(values)
+        rows_trend.append(
+            f"<tr><td>{esc(kind)}</td><td>{esc(pv)}</td><td>{esc(qv)}</td>"
+            f"<td>{len(values)}</td><td>{avg:,.1f}</td>"
+            f"<td><div class='bar' style='width:{100 * avg / best:.0f}%'></div></td></tr>"
+        )
+
+    # 2. Détail des exécutions
+    rows_runs = []
+    for r in runs:
+        phases = json.loads(r["phases_json"] or "{}")
+        top = sorted(phases.items(), key=lambda kv: kv[1], reverse=True)[:3]
+        mem = f"{r['peak_memory_mb']:.0f}" if r["peak_memory_mb"] is not None else ""
+        rows_runs.append(
+            f"<tr><td>{esc(r['started_at'])}</td><td>{esc(r['kind'])}</td>"
+            f"<td>{esc(r['plugin_version'] or '')}</td><td>{esc(r['qgis_version'] or '')}</td>"
+            f"<td>{r['input_features'] or 0}</td><td>{r['duration_s'] or 0:.1f}</td>"
+            f"<td>{_throughput(r):,.1f}</td><td>{mem}</td>"
+            f"<td>{(r['output_bytes'] or 0) / 2 ** 20:.1f}</td>"
+            f"<td>{esc(', '.join(f'{k} : {v:.1f} s' for k, v in top))}</td></tr>"
+        )
+
+    doc = f"""<!DOCTYPE html>
+<html lang="fr"><head><meta charset="utf-8">
+<title>Gestionnaire PI – performances</title>
+<style>
+ body {{ font-family: sans-serif; margin: 2em; }}
+ table {{ border-collapse: collapse; margin-bottom: 2em; }}
+ td, th {{ border: 1px solid #ccc; padding: 4px 8px; font-size: 90%; }}
+ th {{ background: #009bc4; color: #fff; }}
+ .bar {{ background: #fab200; height: 10px; min-width: 2px; }}
+</style></head><body>
+<h1>Historique des exécutions</h1>
+<p>Généré le {datetime.now().isoformat(timespec="seconds")} – {len(runs)} exécution(s).</p>
+<h2>Débit moyen (entités / s) par version</h2>
+<table><tr><th>Traitement</th><th>Plugin</th><th>QGIS</th><th>Exécutions</th>
+<th>Débit</th><th style="width:200px"></th></tr>
+{''.join(rows_trend)}
+</table>
+<h2>Détail</h2>
+<table><tr><th>Date</th><th>Traitement</th><th>Plugin</th><th>QGIS</th><th>Entités</th>
+<th>Durée (s)</th><th>Débit</th><th>Pic mémoire (Mo)</th><th>Sorties (Mo)</th>
+<th>Phases les plus longues</th></tr>
+{''.join(rows_runs)}
+</table>
+</body></html>
+"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(doc)
+    return path
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Points de reprise d’un lot (sorties des enfants + manifeste)
+*************************/
+
+Les sorties temporaires des enfants sont écrites dans « .reprise_lot » du
+dossier de sortie (voir `prepare_lot_model`). Après un échec ou une
+annulation, les résultats des enfants terminés sont consignés dans
+manifest.json avec l’empreinte du lot (modèle, couches en entrée,
+paramètres). Au lancement suivant, si l’empreinte est identique, ces
+enfants sont marqués comme déjà exécutés (QgsProcessingModelInitialRunConfig)
+et le modèle reprend après eux. Un lot réussi supprime le dossier.
+
+Un enfant interrompu peut être marqué « réussi » par le modèle (algorithme
+qui s’arrête sans erreur) : les enfants sans sorties, ou dont un fichier a
+été écrit après la demande d’annulation, ne sont pas consignés.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+
+from qgis.core import Qgis, QgsMapLayer, QgsVectorLayer
+
+# QgsProcessingModelInitialRunConfig / QgsProcessingContext.modelResult()
+RESUME_SUPPORTED = Qgis.QGIS_VERSION_INT >= 33800
+
+CHECKPOINT_DIR = ".reprise_lot"
+MANIFEST = "manifest.json"
+
+
+def checkpoint_dir(output_dir: str) -> str | None:
+    """Dossier des points de reprise du lot écrit dans *output_dir*."""
+    return os.path.join(output_dir, CHECKPOINT_DIR) if output_dir else None
+
+
+def lot_checkpoint_dir(settings, output_dir: str) -> str | None:
+    """
+    Dossier de reprise d’un lot, ou None si l’option est désactivée (par
+    défaut : les intermédiaires restent alors éligibles à la mémoire).
+    """
+    if not RESUME_SUPPORTED or not settings.get_checkpoint():
+        return None
+    return checkpoint_dir(output_dir)
+
+
+def _file_signature(path: str):
+    path = path.split("|")[0]
+    if not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def _value_signature(value):
+    if isinstance(value, QgsVectorLayer):
+        return [value.source(), value.subsetString(), _file_signature(value.source()),
+                value.featureCount()]
+    if isinstance(value, QgsMapLayer):
+        return [value.source(), _file_signature(value.source())]
+    if isinstance(value, (list, tuple)):
+        return [_value_signature(v) for v in value]
+    return str(value)
+
+
+def run_fingerprint(model, params: dict, **options) -> str:
+    """Empreinte du modèle (fichier .model3), des entrées et des options."""
+    parts = {
+        "model": _file_signature(model.sourceFilePath()),
+        "params": {k: _value_signature(v) for k, v in params.items()},
+        "options": {k: str(v) for k, v in options.items()},
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _jsonable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    return str(value)
+
+
+def _output_paths(outputs):
+    values = outputs.values() if isinstance(outputs, dict) else outputs
+    for value in values:
+        if isinstance(value, (dict, list)):
+            yield from _output_paths(value)
+        elif isinstance(value, str) and os.path.isabs(value.split("|")[0]):
+            yield value.split("|")[0]
+
+
+def _written_before(outputs, timestamp: float) -> bool:
+    """Vrai si aucun fichier des sorties n’a été modifié après *timestamp*."""
+    for path in _output_paths(outputs):
+        try:
+            if os.path.getmtime(path) >= timestamp:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _outputs_exist(outputs) -> bool:
+    """Vrai si les sorties ne sont pas vides et que leurs fichiers existent encore."""
+    return bool(outputs) and all(os.path.exists(p) for p in _output_paths(outputs))
+
+
+def _read_manifest(directory: str) -> dict:
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def clear_checkpoint(directory: str | None) -> None:
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _referenced_paths(outputs, paths: set) -> set:
+    values = outputs.values() if isinstance(outputs, dict) else outputs
+    for value in values:
+        if isinstance(value, (dict, list)):
+            _referenced_paths(value, paths)
+        elif isinstance(value, str):
+            paths.add(os.path.normcase(os.path.abspath(value.split("|")[0])))
+    return paths
+
+
+def prune_checkpoint(directory: str | None) -> None:
+    """
+    Supprime du dossier de reprise les fichiers qu’aucun enfant consigné ne
+    référence (sortie partielle de l’enfant interrompu, WAL / SHM).
+    """
+    if not directory or not os.path.isdir(directory):
+        return
+    kept = _referenced_paths(_read_manifest(directory).get("children", {}), set())
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        base = re.sub(r"-(wal|shm|journal)$", "", path)
+        if name == MANIFEST or os.path.normcase(os.path.abspath(base)) in kept:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def resume_config(directory: str, fingerprint: str):
+    """
+    Configuration de reprise (ou None) et enfants repris. Un point de
+    reprise d’un autre lot est effacé ; le dossier est (re)créé.
+    """
+    from qgis.core import QgsProcessingModelInitialRunConfig  # QGIS ≥ 3.38
+
+    manifest = _read_manifest(directory)
+    if manifest.get("fingerprint") != fingerprint:
+        clear_checkpoint(directory)
+        manifest = {}
+    os.makedirs(directory, exist_ok=True)
+
+    children = {cid: outputs for cid, outputs in manifest.get("children", {}).items()
+                if _outputs_exist(outputs)}
+    if not children:
+        return None, []
+    config = QgsProcessingModelInitialRunConfig()
+    config.setPreviouslyExecutedChildAlgorithms(set(children))
+    config.setInitialChildOutputs(children)
+    return config, sorted(children)
+
+
+def save_checkpoint(directory: str, fingerprint: str, model_result,
+                    canceled_at: float | None = None) -> int:
+    """
+    Consigne les enfants terminés (lot précédent compris) ; renvoie leur
+    nombre. *canceled_at* (time.time() de la demande d’annulation) écarte
+    les enfants dont une sortie a été écrite après elle.
+    """
+    manifest = _read_manifest(directory)
+    children = manifest.get("children", {}) if manifest.get("fingerprint") == fingerprint else {}
+    for cid, result in model_result.childResults().items():
+        if result.executionStatus() != Qgis.ProcessingModelChildAlgorithmExecutionStatus.Success:
+            continue
+        outputs = _jsonable(result.outputs())
+        if not outputs:
+            continue
+        if canceled_at is not None and not _written_before(outputs, canceled_at):
+            continue
+        children[cid] = outputs
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "children": children}, f, indent=2)
+    return len(children)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Index spatiaux et attributaires des entrées / sorties d’un lot
+*************************/
+
+Avant le lot : les couches en entrée sans index spatial en reçoivent un
+(si le fournisseur le permet).
+Après le lot : chaque GeoPackage livré reçoit son R-tree s’il manque, un
+index sur les champs filtrés par l’Annexe 6 (type, classe, id, id_tr,
+plan_nom, sans tenir compte de la casse) puis un ANALYZE, pour que
+SQLite choisisse ces index dans les filtres suivants.
+"""
+import os
+import sqlite3
+
+from qgis.core import (
+    Qgis, QgsFeatureSource, QgsMessageLog, QgsVectorDataProvider, QgsVectorLayer,
+)
+
+# champs indexés dans les GeoPackages livrés (comparaison insensible à la casse)
+INDEXED_FIELDS = ("type", "classe", "id", "id_tr", "plan_nom")
+
+
+def _log(msg, level=Qgis.Warning):
+    QgsMessageLog.logMessage(f"[GestionnairePi] {msg}", "GestionnairePi", level)
+
+
+def ensure_spatial_indexes(layers) -> list[str]:
+    """
+    Crée l’index spatial des couches qui n’en ont pas.
+    Renvoie les noms des couches indexées.
+    """
+    created = []
+    for layer in layers:
+        if layer is None or not layer.isSpatial():
+            continue
+        if layer.hasSpatialIndex() != QgsFeatureSource.SpatialIndexNotPresent:
+            continue
+        provider = layer.dataProvider()
+        if not provider.capabilities() & QgsVectorDataProvider.CreateSpatialIndex:
+            continue
+        if provider.createSpatialIndex():
+            created.append(layer.name())
+        else:
+            _log(f"Index spatial non créé pour « {layer.name()} »")
+    return created
+
+
+def _feature_tables(con):
+    """(table, colonne géométrie) des tables d’entités du GeoPackage."""
+    return con.execute(
+        "SELECT c.table_name, g.column_name FROM gpkg_contents c "
+        "JOIN gpkg_geometry_columns g ON g.table_name = c.table_name "
+        "WHERE c.data_type = 'features'"
+    ).fetchall()
+
+
+def _has_rtree(con, table, column) -> bool:
+    row = con.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (f"rtree_{table}_{column}",),
+    ).fetchone()
+    return row is not None
+
+
+def index_geopackage(path: str, fields=INDEXED_FIELDS) -> list[str]:
+    """
+    R-tree manquants + index attributaires + ANALYZE sur *path*.
+    Renvoie les index créés (« table.champ »). Sans effet si le fichier
+    n’est pas un GeoPackage lisible.
+    """
+    created = []
+    if not path or not os.path.isfile(path):
+        return created
+    wanted = {f.lower() for f in fields}
+
+    try:
+        con = sqlite3.connect(path)
+    except sqlite3.Error as e:
+        _log(f"Index non créés pour {path} : {e}")
+        return created
+
+    try:
+        tables = _feature_tables(con)
+        missing_rtree = [(t, c) for t, c in tables if not _has_rtree(con, t, c)]
+
+        for table, _geom in tables:
+            columns = [row[1] for row in con.execute(f'PRAGMA table_info("{table}")')]
+            for column in columns:
+                if column.lower() not in wanted:
+                    continue
+                name = f"idx_{table}_{column}".lower()
+                con.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ("{column}")'
+                )
+                created.append(f"{table}.{column}")
+        con.commit()
+    except sqlite3.Error as e:
+        _log(f"Index attributaires non créés pour {path} : {e}")
+        return created
+    finally:
+        con.close()
+
+    # Le R-tree GeoPackage a besoin des fonctions SpatiaLite/GDAL : on
+    # passe par le fournisseur OGR plutôt que par sqlite3.
+    for table, _geom in missing_rtree:
+        layer = QgsVectorLayer(f"{path}|layername={table}", table, "ogr")
+        if layer.isValid() and layer.dataProvider().createSpatialIndex():
+            created.append(f"{table} (spatial)")
+        else:
+            _log(f"Index spatial non créé pour {path}|{table}")
+
+    # Statistiques à jour (y compris pour le R-tree tout juste créé)
+    try:
+        con = sqlite3.connect(path)
+        con.execute("ANALYZE")
+        con.commit()
+        con.close()
+    except sqlite3.Error as e:
+        _log(f"ANALYZE impossible sur {path} : {e}")
+    return created
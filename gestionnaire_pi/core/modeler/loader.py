@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Chargement des couches résultats d’un lot (tâche de fond)
+"""
+import os
+
+from qgis.core import (
+    QgsApplication, QgsMessageLog, QgsTask, QgsVectorLayer, Qgis,
+)
+
+from gestionnaire_pi.core.modeler.indexes import index_geopackage
+
+
+class ResultLayersTask(QgsTask):
+    """
+    Indexe, ouvre et style les GeoPackages produits par un lot hors du
+    thread principal. Les couches prêtes sont rendues à `on_ready` (appelé sur le
+    thread principal), qui les ajoute au projet en une seule fois ; après un
+    échec ou une annulation, `on_ready` reçoit le message d’erreur.
+    """
+
+    def __init__(self, outputs, on_ready):
+        """
+        :param outputs: liste ordonnée de couples (source gpkg, chemin qml) ;
+            la source peut viser une table (« chemin|layername=… »)
+        :param on_ready: callable(list[QgsVectorLayer], str | None) ; le
+            second argument vaut None si le chargement a abouti
+        """
+        super().__init__("Chargement des résultats du lot", QgsTask.CanCancel)
+        self.outputs = outputs
+        self.on_ready = on_ready
+        self.layers: list[QgsVectorLayer] = []
+        self._warnings: list[str] = []
+        self._error: str | None = None
+
+    def run(self):
+        try:
+            return self._load()
+        except Exception as e:
+            self._error = f"Chargement des résultats interrompu : {e}"
+            return False
+
+    def _load(self):
+        main_thread = QgsApplication.instance().thread()
+        total = len(self.outputs) or 1
+        indexed = set()         # paquet unique : un seul passage d’indexation
+
+        for i, (gpkg, qml) in enumerate(self.outputs, 1):
+            if self.isCanceled():
+                return False
+
+            # 1. Index spatiaux / attributaires + ANALYZE (filtres Annexe 6)
+            path, _, table = gpkg.partition("|layername=")
+            if path not in indexed:
+                index_geopackage(path)
+                indexed.add(path)
+
+            # 2. Ouverture du GeoPackage
+            name = table or os.path.splitext(os.path.basename(path))[0]   # joli nom dans la Légende
+            vlayer = QgsVectorLayer(gpkg, name, "ogr")
+            if not vlayer.isValid():
+                self._warnings.append(f"⚠️ Impossible d’ouvrir {gpkg}")
+                continue
+
+            # 3. Application + sauvegarde du style
+            ok, _ = vlayer.loadNamedStyle(qml)
+            if not ok:
+                self._warnings.append(f"⚠️ Style manquant : {qml}")
+            else:
+                vlayer.saveStyleToDatabase('default', '', '', True)   # stocke le QML dans le gpkg
+
+            # 4. La couche doit vivre sur le thread principal pour le projet
+            vlayer.moveToThread(main_thread)
+            self.layers.append(vlayer)
+            self.setProgress(i * 100 / total)
+
+        return True
+
+    def finished(self, result):
+        for msg in self._warnings:
+            QgsMessageLog.logMessage(msg, "GestionnairePi", Qgis.Warning)
+        if result:
+            self.on_ready(self.layers, None)
+            return
+        error = self._error or ("Chargement des résultats annulé." if self.isCanceled()
+                                else "Chargement des résultats impossible.")
+        self.on_ready([], error)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Mode de sortie d’un lot : intermédiaires en mémoire, paquet unique
+*************************/
+
+Le modèle Principale est cloné avant chaque lot, puis adapté :
+  • les sorties temporaires des enfants deviennent des couches mémoire
+    quand le volume estimé du lot tient dans le budget mémoire, ou des
+    GeoPackages du dossier de reprise quand les points de reprise sont
+    actifs (voir checkpoint.py) ;
+  • en mode « paquet unique », les trois `savefeatures` sont désactivés
+    au profit de `gestionnaire_pi:writelot_1` (inactif dans le fichier).
+Le fichier .model3 n’est jamais modifié.
+"""
+import os
+import re
+
+from qgis.core import (
+    QgsProcessingModelAlgorithm, QgsProcessingModelChildParameterSource,
+    QgsProcessingOutputLayerDefinition,
+)
+
+SAVE_CHILDREN = (
+    "native:savefeatures_1",    # linéaires
+    "native:savefeatures_2",    # folios
+    "native:savefeatures_3",    # zones de détection
+)
+WRITE_LOT_CHILD = "gestionnaire_pi:writelot_1"
+
+# copies intermédiaires simultanées estimées pour un octet en entrée
+INTERMEDIATE_FACTOR = 3
+# taille supposée d’une entité quand la source n’est pas un fichier
+DEFAULT_FEATURE_BYTES = 1024
+# part du budget confiée au cache SQLite de l’écriture finale
+CACHE_SHARE = 4
+
+
+def estimate_input_bytes(layers) -> int:
+    """Volume disque approximatif des couches en entrée du lot."""
+    total = 0
+    for layer in layers:
+        if layer is None:
+            continue
+        path = layer.source().split("|")[0]
+        if os.path.isfile(path):
+            total += os.path.getsize(path)
+            if path.lower().endswith(".shp"):
+                dbf = path[:-4] + ".dbf"
+                if os.path.isfile(dbf):
+                    total += os.path.getsize(dbf)
+        else:
+            total += max(layer.featureCount(), 0) * DEFAULT_FEATURE_BYTES
+    return total
+
+
+def keeps_in_memory(input_bytes, memory_budget_mb, checkpoint_dir=None) -> bool:
+    """
+    Vrai si les intermédiaires du lot peuvent rester en mémoire : pas de
+    points de reprise et volume estimé dans le budget.
+    """
+    budget = max(int(memory_budget_mb), 0) * 1024 * 1024
+    return not checkpoint_dir and 0 < input_bytes * INTERMEDIATE_FACTOR <= budget
+
+
+def _is_temporary_sink(child, name, source):
+    definition = child.algorithm().parameterDefinition(name) if child.algorithm() else None
+    if definition is None or definition.type() not in ("sink", "vectorDestination"):
+        return False
+    value = source.staticValue()
+    return (isinstance(value, QgsProcessingOutputLayerDefinition)
+            and value.sink.staticValue() == "TEMPORARY_OUTPUT")
+
+
+def prepare_lot_model(model, input_layers, memory_budget_mb, single_package,
+                      checkpoint_dir=None):
+    """
+    Copie adaptée de *model*. Renvoie (modèle, intermédiaires en mémoire ?).
+    Avec *checkpoint_dir*, les intermédiaires y sont écrits (jamais en mémoire).
+    """
+    clone = QgsProcessingModelAlgorithm()
+    clone.loadVariant(model.toVariant())
+
+    in_memory = keeps_in_memory(estimate_input_bytes(input_layers), memory_budget_mb,
+                                checkpoint_dir)
+
+    for child_id, child in clone.childAlgorithms().items():
+        changed = False
+        if in_memory or checkpoint_dir:
+            for name, sources in child.parameterSources().items():
+                if len(sources) == 1 and _is_temporary_sink(child, name, sources[0]):
+                    if checkpoint_dir:
+                        sink = os.path.join(
+                            checkpoint_dir, re.sub(r"\W+", "_", f"{child_id}_{name}") + ".gpkg")
+                    else:
+                        sink = "memory:"
+                    child.addParameterSources(name, [
+                        QgsProcessingModelChildParameterSource.fromStaticValue(
+                            QgsProcessingOutputLayerDefinition(sink))
+                    ])
+                    changed = True
+        if child_id in SAVE_CHILDREN:
+            child.setActive(not single_package)
+            changed = True
+        elif child_id == WRITE_LOT_CHILD:
+            child.setActive(single_package)
+            child.addParameterSources("CACHE_SIZE", [
+                QgsProcessingModelChildParameterSource.fromStaticValue(
+                    max(int(memory_budget_mb) // CACHE_SHARE, 64))
+            ])
+            changed = True
+        if changed:
+            clone.setChildAlgorithm(child)
+    return clone, in_memory
+
+
+def lot_outputs(child_results, single_package) -> list[str]:
+    """Sources (linéaires, folios, zones) produites par le lot, dans l’ordre."""
+    if single_package:
+        return list(child_results[WRITE_LOT_CHILD]["LAYERS"])[:3]
+    return [child_results[cid]["OUTPUT"] for cid in SAVE_CHILDREN]
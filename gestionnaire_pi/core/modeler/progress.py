@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Progression pondérée et temps restant d’un lot
+*************************/
+"""
+import re
+import time
+
+# début d’un enfant du modèle, annoncé par setProgressText :
+# « Running <description> [i/n] » (préfixe absent ou traduit toléré)
+_STEP_RE = re.compile(r"^(?:Running\s+)?(.+?)\s*\[(\d+)/(\d+)\]\s*$")
+
+
+def parse_step(text: str) -> tuple[str, int, int] | None:
+    """(description de l’enfant, rang, nombre d’enfants) ou None."""
+    m = _STEP_RE.match(text.strip())
+    if not m:
+        return None
+    return m.group(1), int(m.group(2)), int(m.group(3))
+
+
+def format_duration(seconds: float) -> str:
+    """Durée lisible (> 1 h → « 1 h 05 min 12 s »)."""
+    h, rem = divmod(int(seconds), 3600)
+    m, s   = divmod(rem, 60)
+    return f"{h} h {m:02d} min {s:02d} s" if h else f"{m:02d} min {s:02d} s"
+
+
+class ProgressEstimator:
+    """
+    Convertit la progression brute du modèle (une part égale par enfant)
+    en progression pondérée par la durée attendue de chaque enfant.
+
+    Les durées attendues viennent de l’historique : secondes *par entité en
+    entrée*, par enfant, multipliées par le nombre d’entités du lot courant.
+    Sans historique, la progression brute est conservée et le temps restant
+    est extrapolé linéairement.
+    """
+
+    # poids d’un nouveau passage dans la moyenne glissante
+    SMOOTHING = 0.3
+
+    def __init__(self, history: dict[str, float], feature_count: int):
+        self.history = dict(history)
+        self.feature_count = max(int(feature_count), 1)
+        self._t0 = time.perf_counter()
+        self._done: list[str] = []          # enfants terminés
+        self._current: str | None = None
+        self._index = 0                     # rang (1..n) de l’enfant courant
+        self._total = 0                     # nombre d’enfants à exécuter
+
+    # ---------- alimenté par le feedback (thread de la tâche) ----------
+    def start_step(self, key: str, index: int, total: int) -> None:
+        if self._current is not None:
+            self._done.append(self._current)
+        self._current, self._index, self._total = key, index, total
+
+    # ---------- lu par l’interface (thread principal) ----------
+    def _expected(self, key: str) -> float:
+        if key in self.history:
+            return self.history[key] * self.feature_count
+        known = list(self.history.values())
+        return (sum(known) / len(known)) * self.feature_count if known else 0.0
+
+    def estimate(self, raw_pct: float) -> tuple[float, float | None]:
+        """Retourne (progression pondérée 0-100, secondes restantes ou None)."""
+        elapsed = time.perf_counter() - self._t0
+        if not self.history or not self._total or self._current is None:
+            if raw_pct <= 0:
+                return raw_pct, None
+            return raw_pct, elapsed * (100.0 - raw_pct) / raw_pct
+
+        # part réalisée de l’enfant courant, déduite de la progression brute
+        frac = raw_pct * self._total / 100.0 - (self._index - 1)
+        frac = max(0.0, min(1.0, frac))
+
+        done = sum(self._expected(k) for k in self._done)
+        done += frac * self._expected(self._current)
+        # enfants pas encore lancés : ceux de l’historique non encore vus
+        seen = set(self._done) | {self._current}
+        todo = (1.0 - frac) * self._expected(self._current)
+        todo += sum(self._expected(k) for k in self.history if k not in seen)
+        total = done + todo
+        if total <= 0:
+            return raw_pct, None
+
+        pct = 100.0 * done / total
+        # recalage sur la vitesse réellement observée pendant ce lot
+        speed = elapsed / done if done > 0 else 1.0
+        return pct, todo * speed
+
+    # ---------- mise à jour de l’historique en fin de lot ----------
+    def updated_history(self, durations: dict[str, float]) -> dict[str, float]:
+        """Fusionne les durées (s) du lot terminé dans l’historique normalisé."""
+        history = dict(self.history)
+        for key, seconds in durations.items():
+            per_feature = seconds / self.feature_count
+            old = history.get(key)
+            history[key] = per_feature if old is None else \
+                (1 - self.SMOOTHING) * old + self.SMOOTHING * per_feature
+        return history
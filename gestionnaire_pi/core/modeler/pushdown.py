@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+/*************************
+ Filtre d’emprise appliqué aux linéaires avant la fusion du lot
+*************************/
+
+L’emprise des plans des communes du lot (bbox des entités d’emprises dont
+COMMUNE_IN est dans la liste INSEE, élargie d’une marge) est passée au
+paramètre « emprise_lineaires » du modèle. « 1-Fusion_Lin »
+(gestionnaire_pi:mergelines) la projette dans le SCR de chaque couche
+linéaire et ne lit que les entités du rectangle (index spatial du
+fournisseur) : aucune copie des couches d’origine n’est faite.
+
+La fusion alimente aussi la couche livrée Lineaires_* : avec le filtre,
+elle ne contient que les linéaires proches des plans. Le filtre est donc
+désactivé par défaut (option « Linéaires limités à l’emprise des plans »).
+"""
+from qgis.core import (
+    Qgis, QgsExpression, QgsFeatureRequest, QgsRectangle, QgsUnitTypes,
+)
+
+# marge autour de l’emprise des plans (m) : tampon et jointure au plus proche
+EXTENT_MARGIN_M = 100.0
+
+
+def emprise_extent(emprises, insee_codes) -> QgsRectangle:
+    """Emprise (SCR de *emprises*) des plans des communes *insee_codes*."""
+    request = QgsFeatureRequest()
+    if insee_codes and emprises.fields().lookupField("COMMUNE_IN") >= 0:
+        codes = ", ".join(QgsExpression.quotedValue(c) for c in insee_codes)
+        request.setFilterExpression(f'"COMMUNE_IN" IN ({codes})')
+        request.setSubsetOfAttributes(["COMMUNE_IN"], emprises.fields())
+    else:
+        request.setNoAttributes()
+
+    extent = QgsRectangle()
+    extent.setNull()
+    for feat in emprises.getFeatures(request):
+        if feat.hasGeometry():
+            extent.combineExtentWith(feat.geometry().boundingBox())
+    return extent
+
+
+def extent_parameter(extent, crs, margin_m=EXTENT_MARGIN_M):
+    """
+    Valeur du paramètre d’emprise (« xmin,xmax,ymin,ymax [SCR] ») élargie
+    de *margin_m* mètres, ou None si l’emprise est vide.
+    """
+    if extent.isNull() or extent.isEmpty():
+        return None
+    rect = QgsRectangle(extent)
+    factor = QgsUnitTypes.fromUnitToUnitFactor(Qgis.DistanceUnit.Meters, crs.mapUnits())
+    rect.grow(margin_m * factor)
+    return (f"{rect.xMinimum()},{rect.xMaximum()},"
+            f"{rect.yMinimum()},{rect.yMaximum()} [{crs.authid()}]")
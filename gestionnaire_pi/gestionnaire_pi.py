@@ -15,6 +15,33 @@ from qgis.core import (
 )
 from .resources import *
 from gestionnaire_pi.ui.main_dockwidget import GestionnairePiDockWidget
+from gestionnaire_pi.core.algorithms.buffer_dissolve import BufferDissolveTiledAlgorithm
+from gestionnaire_pi.core.algorithms.dedup_geometries import DedupGeometriesAlgorithm
+from gestionnaire_pi.core.algorithms.export_csv import ExportCsvAlgorithm
+from gestionnaire_pi.core.algorithms.indexed_join import IndexedJoinAlgorithm
+from gestionnaire_pi.core.algorithms.map_fields import MapFieldsAlgorithm
+from gestionnaire_pi.core.algorithms.merge_lines import MergeLinesAlgorithm
+from gestionnaire_pi.core.algorithms.write_lot import WriteLotAlgorithm
+
+class AlgorithmsProvider(QgsProcessingProvider):
+    """Provider des algorithmes Python du plugin (utilisés par les modèles)."""
+    def id(self):
+        return 'gestionnaire_pi'
+
+    def name(self):
+        return 'Gestionnaire PI'
+
+    def longName(self):
+        return self.name()
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(ExportCsvAlgorithm())
+        self.addAlgorithm(BufferDissolveTiledAlgorithm())
+        self.addAlgorithm(DedupGeometriesAlgorithm())
+        self.addAlgorithm(IndexedJoinAlgorithm())
+        self.addAlgorithm(MapFieldsAlgorithm())
+        self.addAlgorithm(MergeLinesAlgorithm())
+        self.addAlgorithm(WriteLotAlgorithm())
 
 class Model3Provider(QgsProcessingProvider):
     """Provider qui expose tous les .model3 du dossier models/ comme algorithmes Processing."""
@@ -45,6 +72,7 @@ class GestionnairePi:
         self.iface = iface
         self.plugin_dir = os.path.dirname(__file__)
         self.model_provider = None
+        self.algorithms_provider = None
         
         # Chargement des traductions
         locale = str(QSettings().value('locale/userLocale'))[0:2]
@@ -104,7 +132,11 @@ class GestionnairePi:
             add_to_toolbar=True
         )
 
-        # 2) Enregistrement du fournisseur de modèles
+        # 2) Algorithmes du plugin, enregistrés AVANT les modèles qui les utilisent
+        self.algorithms_provider = AlgorithmsProvider()
+        QgsApplication.processingRegistry().addProvider(self.algorithms_provider)
+
+        # 3) Enregistrement du fournisseur de modèles
         models_folder = os.path.join(self.plugin_dir, 'models')
         self.model_provider = Model3Provider(models_folder)
         QgsApplication.processingRegistry().addProvider(self.model_provider)
@@ -119,6 +151,9 @@ class GestionnairePi:
         if self.model_provider:
             QgsApplication.processingRegistry().removeProvider(self.model_provider)
             self.model_provider = None
+        if self.algorithms_provider:
+            QgsApplication.processingRegistry().removeProvider(self.algorithms_provider)
+            self.algorithms_provider = None
 
         # fermeture du dockwidget
         if self.dockwidget:
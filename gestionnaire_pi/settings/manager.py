@@ -5,6 +5,8 @@
 *************************/
 """
 
+import json
+
 from qgis.PyQt.QtCore import QSettings
 
 class SettingsManager:
@@ -30,6 +32,48 @@ class SettingsManager:
     def set_log_detail(self, val):
         self.settings.setValue(self.prefix + "log_detail", val)
 
+    # --- Annexe 6 : taille des tuiles du calcul par blocs (0 = désactivé) ---
+    def get_annexe6_chunk_size(self):
+        return self.settings.value(self.prefix + "annexe6_chunk_size", 0.0, type=float)
+
+    def set_annexe6_chunk_size(self, size):
+        self.settings.setValue(self.prefix + "annexe6_chunk_size", float(size))
+
+    # --- Tolérance de simplification des copies de travail (0 = aucune) ---
+    def get_simplify_tolerance(self):
+        return self.settings.value(self.prefix + "simplify_tolerance", 0.0, type=float)
+
+    def set_simplify_tolerance(self, tolerance):
+        self.settings.setValue(self.prefix + "simplify_tolerance", float(tolerance))
+
+    # --- Lot : budget mémoire des intermédiaires (Mo, 0 = fichiers) ---
+    def get_memory_budget_mb(self):
+        return self.settings.value(self.prefix + "memory_budget_mb", 1024, type=int)
+
+    def set_memory_budget_mb(self, budget):
+        self.settings.setValue(self.prefix + "memory_budget_mb", int(budget))
+
+    # --- Lot : couches livrées dans un seul GeoPackage ---
+    def get_single_package(self):
+        return self.settings.value(self.prefix + "single_package", False, type=bool)
+
+    def set_single_package(self, val):
+        self.settings.setValue(self.prefix + "single_package", val)
+
+    # --- Lot : linéaires lus sur l’emprise des plans seulement (Lineaires_* réduit) ---
+    def get_extent_pushdown(self):
+        return self.settings.value(self.prefix + "extent_pushdown", False, type=bool)
+
+    def set_extent_pushdown(self, val):
+        self.settings.setValue(self.prefix + "extent_pushdown", val)
+
+    # --- Lot : points de reprise dans le dossier de sortie (intermédiaires sur disque) ---
+    def get_checkpoint(self):
+        return self.settings.value(self.prefix + "checkpoint", False, type=bool)
+
+    def set_checkpoint(self, val):
+        self.settings.setValue(self.prefix + "checkpoint", val)
+
     # --- Theme ---
     def get_theme(self):
         return self.settings.value(self.prefix + "theme", "clair")
@@ -45,3 +89,14 @@ class SettingsManager:
 
     def set_color(self, color):
         self.settings.setValue(self.prefix + "color", color.name())  # stocke hexadécimal
+
+    # --- Durées historiques des enfants du modèle (s / entité) ---
+    def get_child_timings(self):
+        raw = self.settings.value(self.prefix + "child_timings", "{}", type=str)
+        try:
+            return {k: float(v) for k, v in json.loads(raw).items()}
+        except (ValueError, TypeError, AttributeError):
+            return {}
+
+    def set_child_timings(self, timings):
+        self.settings.setValue(self.prefix + "child_timings", json.dumps(timings))
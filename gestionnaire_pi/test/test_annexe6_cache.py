@@ -0,0 +1,115 @@
+# coding=utf-8
+"""Annexe 6 segment cache test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from qgis.core import QgsGeometry
+
+from gestionnaire_pi.core.annexe6.cache import (
+    SegmentCache, geometry_digest, segment_key,
+)
+
+ZONES = [(1, 'z1'), (2, 'z2')]
+FOLIOS = [(10, 'f10')]
+
+
+class SegmentKeyTest(unittest.TestCase):
+    """Invalidation : la clé change avec le segment et son voisinage."""
+
+    def key(self, digest='g', seg_class='C', zones=ZONES, folios=FOLIOS, contrib=False,
+            tolerance=0.0):
+        return segment_key(digest, seg_class, zones, folios, contrib, tolerance)
+
+    def test_stable_and_order_independent(self):
+        self.assertEqual(self.key(), self.key())
+        self.assertEqual(self.key(zones=list(reversed(ZONES))), self.key())
+
+    def test_segment_changes(self):
+        self.assertNotEqual(self.key(digest='g2'), self.key())
+        self.assertNotEqual(self.key(seg_class='B'), self.key())
+        self.assertNotEqual(self.key(contrib=True), self.key())
+
+    def test_tolerance_changes(self):
+        self.assertNotEqual(self.key(tolerance=0.5), self.key())
+        self.assertNotEqual(self.key(tolerance=0.5), self.key(tolerance=1.0))
+        self.assertEqual(self.key(tolerance=None), self.key())
+
+    def test_neighbourhood_changes(self):
+        self.assertNotEqual(self.key(zones=[(1, 'z1'), (2, 'z2-edited')]), self.key())
+        self.assertNotEqual(self.key(zones=[(1, 'z1')]), self.key())
+        self.assertNotEqual(self.key(zones=ZONES + [(3, 'z3')]), self.key())
+        self.assertNotEqual(self.key(folios=[(10, 'f10'), (11, 'f11')]), self.key())
+
+    def test_zone_and_folio_not_interchangeable(self):
+        self.assertNotEqual(self.key(zones=[(5, 'x')], folios=[]),
+                            self.key(zones=[], folios=[(5, 'x')]))
+
+    def test_geometry_digest(self):
+        a = QgsGeometry.fromWkt('LineString (0 0, 10 0)')
+        b = QgsGeometry.fromWkt('LineString (0 0, 10 0)')
+        c = QgsGeometry.fromWkt('LineString (0 0, 10 0.001)')
+        self.assertEqual(geometry_digest(a), geometry_digest(b))
+        self.assertNotEqual(geometry_digest(a), geometry_digest(c))
+
+
+class SegmentCacheTest(unittest.TestCase):
+    """Écritures regroupées, relecture et purge."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'folios_annexe6_cache.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_written_on_close(self):
+        cache = SegmentCache(self.path)
+        cache.put('k', {'F1': [1.5, 0.0]})
+        self.assertIsNone(cache.get('k'))       # pas encore écrit
+        cache.close()
+
+        cache = SegmentCache(self.path)
+        self.assertEqual(cache.get('k'), {'F1': [1.5, 0.0]})
+        self.assertIsNone(cache.get('other'))
+        self.assertEqual((cache.n_hits, cache.n_misses), (1, 1))
+        cache.close()
+
+    def test_stale_entries_purged(self):
+        cache = SegmentCache(self.path)
+        cache.put('old', {})
+        cache.put('used', {})
+        cache.close()
+        old = time.time() - (SegmentCache.MAX_AGE_DAYS + 1) * 86400
+        con = sqlite3.connect(self.path)
+        with con:
+            con.execute('UPDATE segments SET used_at = ?', (old,))
+        con.close()
+
+        cache = SegmentCache(self.path)
+        cache.get('used')                       # réutilisée : rafraîchie
+        cache.close()
+
+        cache = SegmentCache(self.path)
+        self.assertIsNone(cache.get('old'))
+        self.assertEqual(cache.get('used'), {})
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""Annexe 6 tiling bounds test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import QgsFeature, QgsGeometry, QgsRectangle, QgsVectorLayer
+
+from gestionnaire_pi.core.annexe6.service import (
+    MAX_CHUNKS, MIN_CHUNK_SIZE, chunk_grid, chunk_size_setting, process_data,
+)
+
+
+def memory_layer(uri, rows):
+    layer = QgsVectorLayer(uri, 'couche', 'memory')
+    features = []
+    for attributes, wkt in rows:
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes(list(attributes))
+        feat.setGeometry(QgsGeometry.fromWkt(wkt))
+        features.append(feat)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+class ChunkGridTest(unittest.TestCase):
+    """Taille minimale et nombre maximal de tuiles."""
+
+    def test_setting(self):
+        self.assertEqual(chunk_size_setting(0), 0.0)
+        self.assertEqual(chunk_size_setting(None), 0.0)
+        self.assertEqual(chunk_size_setting(0.01), MIN_CHUNK_SIZE)
+        self.assertEqual(chunk_size_setting(2500), 2500.0)
+
+    def test_minimum_size(self):
+        size, nx, ny = chunk_grid(QgsRectangle(0, 0, 5000, 3000), 1)
+        self.assertEqual(size, MIN_CHUNK_SIZE)
+        self.assertEqual((nx, ny), (51, 31))
+
+    def test_tile_count_bounded(self):
+        for chunk_size in (0.01, 1, 1000):
+            size, nx, ny = chunk_grid(QgsRectangle(0, 0, 1e6, 1e6), chunk_size)
+            self.assertLessEqual(nx * ny, MAX_CHUNKS)
+            self.assertGreaterEqual(size, chunk_size)
+
+    def test_grid_covers_extent(self):
+        size, nx, ny = chunk_grid(QgsRectangle(0, 0, 1e7, 10), 100)
+        self.assertLessEqual(nx * ny, MAX_CHUNKS)
+        self.assertGreater(nx * size, 1e7)
+        self.assertGreater(ny * size, 10)
+
+
+class ChunkedEquivalenceTest(unittest.TestCase):
+    """Par tuiles ou d’un bloc : mêmes longueurs, doublons compris."""
+
+    @classmethod
+    def setUpClass(cls):
+        from gestionnaire_pi.test.utilities import get_qgis_app
+        get_qgis_app()
+
+    def layers(self):
+        lines = memory_layer('LineString?crs=EPSG:2154&field=classe:string', [
+            # portions en zone identiques (90 5, 110 5), centres dans les
+            # tuiles [0, 100) et [100, 200) : un seul doublon compté
+            (('C',), 'LineString(0 5, 110 5)'),
+            (('C',), 'LineString(90 5, 300 5)'),
+            (('B',), 'LineString(150 -5, 450 -5)'),
+            (('W',), 'LineString(380 0, 380 40)'),
+            (('C',), 'LineString(0 500, 10 500)'),          # hors zone
+            (('B',), 'LineString(990 0, 1000 0)'),          # hors zone
+        ])
+        zones = memory_layer('Polygon?crs=EPSG:2154&field=id:string&field=type:integer', [
+            (('TR1', 0), 'Polygon((90 0, 110 0, 110 10, 90 10, 90 0))'),
+            (('TR2', 0), 'Polygon((200 -10, 400 -10, 400 20, 200 20, 200 -10))'),
+        ])
+        folios = memory_layer('Polygon?crs=EPSG:2154&field=type:string&field=id_tr:string', [
+            (('vrai', 'TR1'), 'Polygon((0 -50, 250 -50, 250 50, 0 50, 0 -50))'),
+            (('vrai', 'TR2'), 'Polygon((250 -50, 500 -50, 500 50, 250 50, 250 -50))'),
+        ])
+        return lines, zones, folios
+
+    def run_pass(self, chunk_size):
+        lines, zones, folios = self.layers()
+        return process_data(lines, zones, folios, None, dry_run=True,
+                            with_contributions=True, use_cache=False,
+                            chunk_size=chunk_size)
+
+    def test_same_totals(self):
+        whole, chunked = self.run_pass(0), self.run_pass(MIN_CHUNK_SIZE)
+        self.assertAlmostEqual(whole.length_c, 20.0)
+        self.assertAlmostEqual(whole.length_b, 200.0 + 20.0)
+        self.assertAlmostEqual(chunked.length_c, whole.length_c)
+        self.assertAlmostEqual(chunked.length_b, whole.length_b)
+        for fid in whole.clc:
+            self.assertAlmostEqual(chunked.clc[fid], whole.clc[fid])
+            self.assertAlmostEqual(chunked.clb[fid], whole.clb[fid])
+        self.assertEqual(set(chunked.contributions), set(whole.contributions))
+        for zid, contrib in whole.contributions.items():
+            self.assertAlmostEqual(chunked.contributions[zid].c, contrib.c)
+            self.assertAlmostEqual(chunked.contributions[zid].b, contrib.b)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# coding=utf-8
+"""Annexe 6 sampled preview test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import math
+import random
+import unittest
+
+from gestionnaire_pi.core.annexe6.preview import (
+    MIN_PER_STRATUM, _allocate, _stratum_estimate,
+)
+
+
+class AllocateTest(unittest.TestCase):
+    """Répartition de l’échantillon entre les strates."""
+
+    def test_proportional(self):
+        allocation = _allocate({'C': 30000, 'B': 10000}, 2000)
+        self.assertGreaterEqual(sum(allocation.values()), 1998)
+        self.assertAlmostEqual(allocation['C'] / allocation['B'], 3.0, delta=0.15)
+
+    def test_never_above_budget(self):
+        for sizes in ({'C': 100000, 'B': 40}, {'C': 5, 'B': 70000},
+                      {'C': 1234, 'B': 5678}, {'C': 0, 'B': 9999}):
+            allocation = _allocate(sizes, 2000)
+            self.assertLessEqual(sum(allocation.values()), 2000, sizes)
+
+    def test_minimum_per_stratum(self):
+        allocation = _allocate({'C': 100000, 'B': 500}, 2000)
+        self.assertGreaterEqual(allocation['B'], MIN_PER_STRATUM)
+
+    def test_never_above_population(self):
+        self.assertEqual(_allocate({'C': 12, 'B': 0}, 2000), {'C': 12, 'B': 0})
+        self.assertEqual(_allocate({'C': 300, 'B': 200}, 2000), {'C': 300, 'B': 200})
+
+
+class StratumEstimateTest(unittest.TestCase):
+    """Total estimé et borne d’erreur à 95 %."""
+
+    def test_empty_sample(self):
+        self.assertEqual(_stratum_estimate([], 100), (0.0, 0.0))
+
+    def test_whole_stratum_is_exact(self):
+        self.assertEqual(_stratum_estimate([1.0, 2.0, 3.0], 3), (6.0, 0.0))
+
+    def test_single_value_is_unbounded(self):
+        total, err = _stratum_estimate([4.0], 10)
+        self.assertEqual(total, 40.0)
+        self.assertTrue(math.isinf(err))
+
+    def test_known_values(self):
+        # moyenne 2, variance 1, correction de population finie 0,7
+        total, err = _stratum_estimate([1.0, 2.0, 3.0], 10)
+        self.assertAlmostEqual(total, 20.0)
+        self.assertAlmostEqual(err, 1.96 * 10 * math.sqrt(0.7 / 3))
+
+    def test_bound_covers_true_total(self):
+        rng = random.Random(1)
+        population = [rng.expovariate(1 / 25.0) if rng.random() < 0.6 else 0.0
+                      for _ in range(2000)]
+        true_total = sum(population)
+        runs, covered = 400, 0
+        for _ in range(runs):
+            total, err = _stratum_estimate(rng.sample(population, 150), len(population))
+            covered += abs(total - true_total) <= err
+        self.assertGreater(covered / runs, 0.90)
+        self.assertLess(covered / runs, 0.99)
+
+
+if __name__ == "__main__":
+    unittest.main()
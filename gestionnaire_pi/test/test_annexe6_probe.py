@@ -0,0 +1,51 @@
+# coding=utf-8
+"""Annexe 6 simplified exclusion probe test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import QgsGeometry
+
+from gestionnaire_pi.core.annexe6.service import simplified_probe
+
+ZONES = QgsGeometry.fromWkt(
+    'MultiPolygon(((0 0, 40 0, 40 10, 0 10, 0 0)),'
+    '((60 0, 70 0, 65 30, 60 0)))')
+
+
+class SimplifiedProbeTest(unittest.TestCase):
+    """L’enveloppe contient l’union élargie de la tolérance."""
+
+    def test_contains_dilated_union(self):
+        for tolerance in (0.1, 1.0, 5.0):
+            probe = simplified_probe(ZONES, tolerance)
+            self.assertTrue(probe.contains(ZONES.buffer(tolerance, 32)), tolerance)
+
+    def test_line_touching_corner_is_kept(self):
+        # touche le coin (40, 10) ; la simplification retire ce sommet et la
+        # copie passe à 0,8 au-dessus des zones
+        tolerance = 1.0
+        line = QgsGeometry.fromWkt('LineString(30 10.8, 40 10, 50 10.8)')
+        simplified = line.simplify(tolerance)
+        self.assertTrue(line.intersects(ZONES))
+        self.assertFalse(simplified.intersects(ZONES))
+        self.assertTrue(simplified.intersects(simplified_probe(ZONES, tolerance)))
+
+    def test_far_line_excluded(self):
+        tolerance = 1.0
+        line = QgsGeometry.fromWkt('LineString(0 100, 100 100)')
+        self.assertFalse(line.simplify(tolerance).intersects(simplified_probe(ZONES, tolerance)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# coding=utf-8
+"""Tiled buffer dissolve merge test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+
+from gestionnaire_pi.core.algorithms.buffer_dissolve import (
+    BufferDissolveTiledAlgorithm, _Components, _connected_groups,
+)
+from gestionnaire_pi.test.utilities import output_layer, run_algorithm
+
+# lignes qui traversent plusieurs tuiles de 50 m, se croisent, et une isolée
+LINES = [
+    (1, 'LineString(0 0, 300 10)'),
+    (2, 'LineString(20 -40, 180 120)'),
+    (3, 'LineString(150 -60, 160 200, 240 230)'),
+    (4, 'LineString(260 150, 280 160, 300 140, 320 170)'),
+    (5, 'LineString(600 600, 640 610)'),
+]
+BUFFER = {'DISTANCE': 10.0, 'SEGMENTS': 5, 'END_CAP_STYLE': 0, 'JOIN_STYLE': 0,
+          'MITER_LIMIT': 2.0}
+
+
+class ComponentsTest(unittest.TestCase):
+    """Union-find sur les parties des tuiles."""
+
+    def test_singletons(self):
+        components = _Components(3)
+        self.assertEqual([components.find(i) for i in range(3)], [0, 1, 2])
+
+    def test_join_is_transitive(self):
+        components = _Components(5)
+        components.join(0, 1)
+        components.join(3, 4)
+        components.join(1, 4)
+        root = components.find(0)
+        self.assertEqual({components.find(i) for i in (0, 1, 3, 4)}, {root})
+        self.assertNotEqual(components.find(2), root)
+
+    def test_join_twice(self):
+        components = _Components(2)
+        components.join(0, 1)
+        components.join(1, 0)
+        self.assertEqual(components.find(0), components.find(1))
+
+
+class ConnectedGroupsTest(unittest.TestCase):
+    """Regroupement des parties à refusionner."""
+
+    def test_no_pairs(self):
+        self.assertEqual(_connected_groups(3, []), [[0], [1], [2]])
+
+    def test_empty(self):
+        self.assertEqual(_connected_groups(0, []), [])
+
+    def test_chain_across_tiles(self):
+        # 0-2 et 2-5 se touchent : une seule partie refusionnée
+        groups = _connected_groups(6, [(0, 2), (2, 5), (3, 4)])
+        self.assertEqual(groups, [[0, 2, 5], [1], [3, 4]])
+
+    def test_pairs_from_generator(self):
+        pairs = ((i, i + 1) for i in range(3))
+        self.assertEqual(_connected_groups(4, pairs), [[0, 1, 2, 3]])
+
+    def test_every_index_once(self):
+        groups = _connected_groups(50, [(i, (i * 7) % 50) for i in range(0, 50, 3)])
+        self.assertEqual(sorted(i for g in groups for i in g), list(range(50)))
+
+
+
+class BufferDissolveTiledTest(unittest.TestCase):
+    """Même zone que `native:buffer` avec DISSOLVE."""
+
+    def lines(self):
+        layer = QgsVectorLayer('LineString?crs=EPSG:2154&field=id:integer', 'lignes', 'memory')
+        features = []
+        for fid, wkt in LINES:
+            feat = QgsFeature(layer.fields())
+            feat.setAttributes([fid])
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            features.append(feat)
+        layer.dataProvider().addFeatures(features)
+        return layer
+
+    def single_feature(self, results, context):
+        features = list(output_layer(results, context).getFeatures())
+        self.assertEqual(len(features), 1)
+        return features[0]
+
+    def native(self):
+        results, context = run_algorithm('native:buffer', dict(
+            BUFFER, INPUT=self.lines(), DISSOLVE=True, OUTPUT='memory:'))
+        return self.single_feature(results, context).geometry()
+
+    def tiled(self, tolerance=0.0):
+        results, context = run_algorithm(BufferDissolveTiledAlgorithm(), dict(
+            BUFFER, INPUT=self.lines(), TILE_SIZE=50.0, SIMPLIFY_TOLERANCE=tolerance,
+            OUTPUT='memory:'))
+        return self.single_feature(results, context)
+
+    def test_same_area_as_native(self):
+        exact = self.native()
+        feat = self.tiled()
+        result = feat.geometry()
+        self.assertEqual(feat['id'], 1)
+        self.assertAlmostEqual(result.area(), exact.area(), delta=1e-6 * exact.area())
+        self.assertLess(result.symDifference(exact).area(), 1e-6 * exact.area())
+        # parties raccordées aux bords des tuiles : lignes 1-3, 4, 5
+        self.assertEqual(result.constGet().numGeometries(), exact.constGet().numGeometries())
+
+    def test_simplify_tolerance_bound(self):
+        exact = self.native()
+        for tolerance in (0.5, 2.0):
+            result = self.tiled(tolerance).geometry()
+            # jamais réduit (à l’approximation des arcs près)…
+            self.assertLess(exact.difference(result).area(), 1e-3 * exact.area(), tolerance)
+            # … ni élargi de plus de 2 × tolérance (plus la flèche des arcs
+            # à 5 segments : 10 × (1 − cos(π / 20)) ≈ 0,12)
+            self.assertTrue(exact.buffer(2 * tolerance + 0.2, 16).contains(result), tolerance)
+
+
+if __name__ == "__main__":
+    unittest.main()
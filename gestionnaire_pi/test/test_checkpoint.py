@@ -0,0 +1,179 @@
+# coding=utf-8
+"""Batch checkpoint test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from qgis.core import Qgis
+
+from gestionnaire_pi.core.modeler.checkpoint import (
+    MANIFEST, RESUME_SUPPORTED, prune_checkpoint, resume_config,
+    run_fingerprint, save_checkpoint,
+)
+
+SUCCESS = Qgis.ProcessingModelChildAlgorithmExecutionStatus.Success
+
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+
+    def sourceFilePath(self):
+        return self.path
+
+
+class FakeChildResult:
+    def __init__(self, outputs, status=SUCCESS):
+        self._outputs, self._status = outputs, status
+
+    def outputs(self):
+        return self._outputs
+
+    def executionStatus(self):
+        return self._status
+
+
+class FakeModelResult:
+    def __init__(self, **children):
+        self.children = children
+
+    def childResults(self):
+        return self.children
+
+
+class CheckpointTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.ckpt = os.path.join(self.tmp, '.reprise_lot')
+        os.makedirs(self.ckpt)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def output(self, name, mtime=None):
+        path = os.path.join(self.ckpt, name)
+        with open(path, 'w') as f:
+            f.write('x')
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def manifest(self):
+        with open(os.path.join(self.ckpt, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+
+
+class RunFingerprintTest(CheckpointTestCase):
+    """Empreinte du lot."""
+
+    def setUp(self):
+        super().setUp()
+        self.model_path = os.path.join(self.tmp, 'Principale.model3')
+        with open(self.model_path, 'w') as f:
+            f.write('<model/>')
+        self.model = FakeModel(self.model_path)
+
+    def test_stable(self):
+        params = {'insee': '75056', 'dossier_sortie': self.tmp}
+        self.assertEqual(run_fingerprint(self.model, params, single_package=True),
+                         run_fingerprint(self.model, dict(reversed(params.items())),
+                                         single_package=True))
+
+    def test_changes_with_params_and_options(self):
+        reference = run_fingerprint(self.model, {'insee': '75056'}, single_package=True)
+        self.assertNotEqual(run_fingerprint(self.model, {'insee': '92012'}, single_package=True),
+                            reference)
+        self.assertNotEqual(run_fingerprint(self.model, {'insee': '75056'}, single_package=False),
+                            reference)
+
+    def test_changes_with_model_file(self):
+        reference = run_fingerprint(self.model, {})
+        with open(self.model_path, 'w') as f:
+            f.write('<model version="2"/>')
+        self.assertNotEqual(run_fingerprint(self.model, {}), reference)
+
+
+class SaveCheckpointTest(CheckpointTestCase):
+    """Enfants consignés après un échec ou une annulation."""
+
+    def test_only_successful_children(self):
+        done = self.output('a.gpkg')
+        result = FakeModelResult(a=FakeChildResult({'OUTPUT': done}),
+                                 b=FakeChildResult({'OUTPUT': self.output('b.gpkg')}, status=None))
+        self.assertEqual(save_checkpoint(self.ckpt, 'fp', result), 1)
+        self.assertEqual(self.manifest(), {'fingerprint': 'fp', 'children': {'a': {'OUTPUT': done}}})
+
+    def test_empty_outputs_skipped(self):
+        result = FakeModelResult(a=FakeChildResult({}))
+        self.assertEqual(save_checkpoint(self.ckpt, 'fp', result), 0)
+
+    def test_outputs_written_after_cancel_skipped(self):
+        canceled_at = time.time()
+        before = self.output('before.gpkg', canceled_at - 60)
+        after = self.output('after.gpkg', canceled_at + 1)
+        result = FakeModelResult(a=FakeChildResult({'OUTPUT': before}),
+                                 b=FakeChildResult({'OUTPUT': after}))
+        self.assertEqual(save_checkpoint(self.ckpt, 'fp', result, canceled_at=canceled_at), 1)
+        self.assertEqual(list(self.manifest()['children']), ['a'])
+
+        prune_checkpoint(self.ckpt)
+        self.assertTrue(os.path.exists(before))
+        self.assertFalse(os.path.exists(after))
+
+    def test_previous_run_kept_only_for_same_fingerprint(self):
+        first = self.output('a.gpkg')
+        save_checkpoint(self.ckpt, 'fp', FakeModelResult(a=FakeChildResult({'OUTPUT': first})))
+        second = FakeModelResult(b=FakeChildResult({'OUTPUT': self.output('b.gpkg')}))
+        self.assertEqual(save_checkpoint(self.ckpt, 'fp', second), 2)
+        self.assertEqual(save_checkpoint(self.ckpt, 'autre', second), 1)
+
+
+@unittest.skipUnless(RESUME_SUPPORTED, 'reprise : QGIS 3.38 ou plus')
+class ResumeConfigTest(CheckpointTestCase):
+    """Configuration de reprise lue dans le manifeste."""
+
+    def write_manifest(self, fingerprint, children):
+        with open(os.path.join(self.ckpt, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'children': children}, f)
+
+    def test_other_run_cleared(self):
+        self.write_manifest('autre', {'a': {'OUTPUT': self.output('a.gpkg')}})
+        self.assertEqual(resume_config(self.ckpt, 'fp'), (None, []))
+        self.assertEqual(os.listdir(self.ckpt), [])
+
+    def test_matching_run(self):
+        self.write_manifest('fp', {
+            'b': {'OUTPUT': self.output('b.gpkg')},
+            'a': {'OUTPUT': self.output('a.gpkg') + '|layername=a', 'COUNT': 3},
+        })
+        config, resumed = resume_config(self.ckpt, 'fp')
+        self.assertIsNotNone(config)
+        self.assertEqual(resumed, ['a', 'b'])
+
+    def test_missing_or_empty_outputs_dropped(self):
+        self.write_manifest('fp', {
+            'a': {'OUTPUT': self.output('a.gpkg')},
+            'b': {'OUTPUT': os.path.join(self.ckpt, 'absent.gpkg')},
+            'c': {},
+        })
+        self.assertEqual(resume_config(self.ckpt, 'fp')[1], ['a'])
+
+
+if __name__ == "__main__":
+    unittest.main()
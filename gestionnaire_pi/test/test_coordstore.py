@@ -0,0 +1,154 @@
+# coding=utf-8
+"""Line coordinate store test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from qgis.core import QgsFeature, QgsGeometry, QgsRectangle, QgsVectorLayer
+
+from gestionnaire_pi.core.algorithms.write_lot import WriteLotAlgorithm
+from gestionnaire_pi.core.annexe6.cache import geometry_digest
+from gestionnaire_pi.core.annexe6.coordstore import LineCoordStore, np, store_folder
+from gestionnaire_pi.test.utilities import run_algorithm
+
+
+def memory_layer(uri, rows):
+    layer = QgsVectorLayer(uri, 'couche', 'memory')
+    features = []
+    for attributes, wkt in rows:
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes(list(attributes))
+        feat.setGeometry(QgsGeometry.fromWkt(wkt))
+        features.append(feat)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def lot_layers():
+    lines_a = memory_layer('LineString?crs=EPSG:2154&field=classe:string', [
+        (('C',), 'LineString(0 0, 10 0, 10 10)'),
+        (('B',), 'LineString(20 20, 30 25)'),
+        (('C',), 'LineString(40.125 0.5, 45.75 3.25)'),
+    ])
+    lines_b = memory_layer('MultiLineString?crs=EPSG:2154&field=classe:string', [
+        (('C',), 'MultiLineString((0 50, 5 55), (6 56, 9 60))'),
+        (('B',), 'MultiLineString((100 0, 110 0))'),
+    ])
+    folios = memory_layer('Polygon?crs=EPSG:2154&field=lg_res_clc:double', [
+        ((None,), 'Polygon((0 0, 50 0, 50 50, 0 50, 0 0))'),
+    ])
+    return [('Lineaires_a', lines_a), ('Lineaires_b', lines_b), ('Folios', folios)]
+
+
+@unittest.skipIf(np is None, 'NumPy absent')
+class LineCoordStoreTest(unittest.TestCase):
+    """Aller-retour couche → magasin et invalidation par table."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'Lot.gpkg')
+        parameters = {'OUTPUT': self.path}
+        for n, (name, layer) in enumerate(lot_layers(), 1):
+            parameters[f'LAYER_{n}'] = layer
+            parameters[f'NAME_{n}'] = name
+        run_algorithm(WriteLotAlgorithm(), parameters)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def layer(self, name):
+        layer = QgsVectorLayer(f'{self.path}|layername={name}', name, 'ogr')
+        self.assertTrue(layer.isValid(), name)
+        return layer
+
+    def open_counting(self, layer):
+        """(magasin, nombre de reconstructions)."""
+        with mock.patch.object(LineCoordStore, '_build', wraps=LineCoordStore._build) as build:
+            store = LineCoordStore.open_for(layer)
+        self.assertIsNotNone(store)
+        return store, build.call_count
+
+    def test_round_trip(self):
+        for name in ('Lineaires_a', 'Lineaires_b'):
+            layer = self.layer(name)
+            store = LineCoordStore.open_for(layer)
+            features = list(layer.getFeatures())
+            self.assertEqual(store.count, len(features), name)
+            for i, feat in enumerate(features):
+                geom = feat.geometry()
+                self.assertEqual(bytes(store.geometry(i).asWkb()), bytes(geom.asWkb()), name)
+                self.assertEqual(store.digest(i), geometry_digest(geom), name)
+                self.assertEqual(store.class_name(i), feat['classe'], name)
+                self.assertEqual(store.bbox_rect(i), geom.boundingBox(), name)
+
+    def test_queries(self):
+        layer = self.layer('Lineaires_a')
+        store = LineCoordStore.open_for(layer)
+        boxes = [f.geometry().boundingBox() for f in layer.getFeatures()]
+        classes = [f['classe'] for f in layer.getFeatures()]
+        for rect in (QgsRectangle(0, 0, 15, 15), QgsRectangle(9, 9, 41, 21),
+                     QgsRectangle(-10, -10, 100, 100), QgsRectangle(60, 60, 70, 70)):
+            expected = [i for i, b in enumerate(boxes) if b.intersects(rect)]
+            self.assertEqual(store.intersecting(rect).tolist(), expected)
+            expected_c = [i for i in expected if classes[i] == 'C']
+            self.assertEqual(store.intersecting(rect, 'C').tolist(), expected_c)
+            centred = [i for i, b in enumerate(boxes)
+                       if rect.xMinimum() <= b.center().x() < rect.xMaximum()
+                       and rect.yMinimum() <= b.center().y() < rect.yMaximum()]
+            self.assertEqual(store.centred_in(rect).tolist(), centred)
+        self.assertEqual(store.intersecting(QgsRectangle(0, 0, 100, 100), 'X').tolist(), [])
+
+    def test_one_folder_per_table(self):
+        store_a, _ = self.open_counting(self.layer('Lineaires_a'))
+        store_b, _ = self.open_counting(self.layer('Lineaires_b'))
+        self.assertNotEqual(store_folder(self.path, 'Lineaires_a'),
+                            store_folder(self.path, 'Lineaires_b'))
+        for name in ('Lineaires_a', 'Lineaires_b'):
+            self.assertTrue(os.path.isdir(store_folder(self.path, name)), name)
+        # chaque table garde son magasin : aucune reconstruction
+        store_a, built_a = self.open_counting(self.layer('Lineaires_a'))
+        store_b, built_b = self.open_counting(self.layer('Lineaires_b'))
+        self.assertEqual((built_a, built_b), (0, 0))
+        self.assertEqual((store_a.count, store_b.count), (3, 2))
+
+    def test_other_table_written(self):
+        self.open_counting(self.layer('Lineaires_a'))
+        # écriture des longueurs dans la table des folios du même paquet
+        folios = self.layer('Folios')
+        index = folios.fields().indexFromName('lg_res_clc')
+        folios.startEditing()
+        for feat in folios.getFeatures():
+            folios.changeAttributeValue(feat.id(), index, 12.5)
+        self.assertTrue(folios.commitChanges())
+        _, built = self.open_counting(self.layer('Lineaires_a'))
+        self.assertEqual(built, 0)
+
+    def test_table_modified(self):
+        self.open_counting(self.layer('Lineaires_a'))
+        layer = self.layer('Lineaires_a')
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes([None, 'B'])
+        feat.setGeometry(QgsGeometry.fromWkt('LineString(70 70, 80 80)'))
+        self.assertTrue(layer.dataProvider().addFeatures([feat])[0])
+        store, built = self.open_counting(self.layer('Lineaires_a'))
+        self.assertEqual(built, 1)
+        self.assertEqual(store.count, 4)
+        self.assertEqual(store.geometry(3).asWkt(), 'LineString (70 70, 80 80)')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# coding=utf-8
+"""Hash-based duplicate removal test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+
+from gestionnaire_pi.core.algorithms.dedup_geometries import (
+    DedupGeometriesAlgorithm, bbox_keys,
+)
+from gestionnaire_pi.test.utilities import output_layer, run_algorithm
+
+# (id, géométrie) ; None : entité sans géométrie
+DOUBLONS = [
+    (1, 'MultiLineString((0 0, 10 0))'),
+    (2, 'MultiLineString((10 0, 0 0))'),                    # sens inverse
+    (3, 'MultiLineString((0 0, 5 0, 10 0))'),               # sommet aligné en plus
+    (4, 'MultiLineString((0 0, 5 0),(5 0, 10 0))'),         # ligne découpée
+    (5, 'MultiLineString((0 0, 10 10))'),
+    (6, 'MultiLineString((0 10, 10 0))'),                   # même emprise que 5
+    (7, None),
+    (8, 'MultiLineString((0 10, 10 0))'),
+    (9, 'MultiLineString((0 0, 10 0.001))'),
+    (10, None),
+]
+
+
+def lines_layer(rows):
+    layer = QgsVectorLayer('MultiLineString?crs=EPSG:2154&field=id:integer',
+                           'doublons', 'memory')
+    features = []
+    for fid, wkt in rows:
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes([fid])
+        if wkt:
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+        features.append(feat)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+class BboxKeysTest(unittest.TestCase):
+    """Clés de la table de hachage."""
+
+    def test_exact_bbox(self):
+        key, neighbours = bbox_keys(QgsGeometry.fromWkt('LineString(1 2, 3 5)'))
+        self.assertEqual(key, (1, 2, 3, 5))
+        self.assertEqual(neighbours, [key])
+
+    def test_equal_geometries_share_key(self):
+        self.assertEqual(bbox_keys(QgsGeometry.fromWkt('LineString(0 0, 10 0)'))[0],
+                         bbox_keys(QgsGeometry.fromWkt('LineString(10 0, 5 0, 0 0)'))[0])
+
+    def test_tolerance_neighbours(self):
+        key, neighbours = bbox_keys(QgsGeometry.fromWkt('LineString(0.51 0, 10 0)'), 1)
+        other, _ = bbox_keys(QgsGeometry.fromWkt('LineString(0.49 0, 10 0)'), 1)
+        self.assertEqual(key, (0, 0))
+        self.assertEqual(len(neighbours), 9)
+        self.assertNotEqual(other, key)
+        self.assertIn(other, neighbours)
+
+
+class DedupGeometriesTest(unittest.TestCase):
+    """Même résultat que `native:deleteduplicategeometries`."""
+
+    def run_dedup(self, rows, tolerance=0.0):
+        results, context = run_algorithm(DedupGeometriesAlgorithm(), {
+            'INPUT': lines_layer(rows), 'TOLERANCE': tolerance, 'OUTPUT': 'memory:'})
+        return results, list(output_layer(results, context).getFeatures())
+
+    def test_same_as_native(self):
+        results, ours = self.run_dedup(DOUBLONS)
+        native_results, context = run_algorithm('native:deleteduplicategeometries', {
+            'INPUT': lines_layer(DOUBLONS), 'OUTPUT': 'memory:'})
+        native = list(output_layer(native_results, context).getFeatures())
+
+        self.assertEqual(len(ours), len(native))
+        self.assertEqual(sum(not f.hasGeometry() for f in ours),
+                         sum(not f.hasGeometry() for f in native))
+        for mine, theirs in ((ours, native), (native, ours)):
+            for feat in (f for f in mine if f.hasGeometry()):
+                self.assertTrue(any(feat.geometry().isGeosEqual(other.geometry())
+                                    for other in theirs if other.hasGeometry()),
+                                feat.geometry().asWkt())
+        self.assertEqual(results['DUPLICATE_COUNT'], len(DOUBLONS) - len(native))
+
+    def test_first_of_group_kept(self):
+        results, ours = self.run_dedup(DOUBLONS)
+        self.assertEqual(sorted(f['id'] for f in ours), [1, 5, 6, 7, 9, 10])
+        self.assertEqual(results['RETAINED_COUNT'], 6)
+
+    def test_tolerance_across_cell_boundary(self):
+        rows = [(1, 'MultiLineString((0.49 0, 10 0))'),
+                (2, 'MultiLineString((0.51 0, 10 0))'),
+                (3, 'MultiLineString((3 0, 10 0))')]
+        results, ours = self.run_dedup(rows, tolerance=1)
+        self.assertEqual([f['id'] for f in ours], [1, 3])
+        self.assertEqual(results['DUPLICATE_COUNT'], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
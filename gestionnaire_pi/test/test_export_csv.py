@@ -0,0 +1,69 @@
+# coding=utf-8
+"""Export CSV (format final) test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import io
+import unittest
+
+from qgis.PyQt.QtCore import QDate, QDateTime, QTime
+from qgis.core import NULL
+
+from gestionnaire_pi.core.algorithms.export_csv import csv_value, csv_writer
+
+
+class CsvValueTest(unittest.TestCase):
+    """Valeurs écrites dans export_folios.csv."""
+
+    def test_null_is_empty(self):
+        self.assertEqual(csv_value(None), '')
+        self.assertEqual(csv_value(NULL), '')
+
+    def test_dates_are_iso(self):
+        self.assertEqual(csv_value(QDate(2025, 4, 15)), '2025-04-15')
+        self.assertEqual(csv_value(QTime(8, 5, 0)), '08:05:00')
+        self.assertEqual(csv_value(QDateTime(QDate(2025, 4, 15), QTime(8, 5, 0))),
+                         '2025-04-15T08:05:00')
+
+    def test_other_values_are_str(self):
+        self.assertEqual(csv_value(12), '12')
+        self.assertEqual(csv_value(1.5), '1.5')
+        self.assertEqual(csv_value('abc'), 'abc')
+        self.assertEqual(csv_value(0), '0')
+
+
+class CsvWriterTest(unittest.TestCase):
+    """Échappement sans guillemets."""
+
+    def _line(self, row, delimiter=';'):
+        buf = io.StringIO(newline='')
+        csv_writer(buf, delimiter).writerow(row)
+        return buf.getvalue()
+
+    def test_plain_row(self):
+        self.assertEqual(self._line(['a', '1', '']), 'a;1;\r\n')
+
+    def test_delimiter_is_escaped(self):
+        self.assertEqual(self._line(['a;b', 'c']), 'a\\;b;c\r\n')
+
+    def test_quotes_are_escaped_not_added(self):
+        self.assertEqual(self._line(['"x"', 'y']), '\\"x\\";y\r\n')
+
+    def test_escape_char_is_escaped(self):
+        self.assertEqual(self._line(['a\\b']), 'a\\\\b\r\n')
+
+    def test_other_delimiter(self):
+        self.assertEqual(self._line(['a,b', 'c;d'], ','), 'a\\,b,c;d\r\n')
+
+
+if __name__ == "__main__":
+    unittest.main()
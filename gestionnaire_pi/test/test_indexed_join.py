@@ -0,0 +1,166 @@
+# coding=utf-8
+"""Shared-index joins test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import QgsFeature, QgsGeometry, QgsVectorLayer
+
+from gestionnaire_pi.core.algorithms.indexed_join import IndexedJoinAlgorithm
+from gestionnaire_pi.test.utilities import output_layer, run_algorithm
+
+# origine en Lambert 93, pour que la reprojection en WGS 84 ait un sens
+X0, Y0 = 650000, 6860000
+# prédicats des anciens joinattributesbylocation_1/_2 du modèle
+PREDICATES = [0, 1, 3, 4, 5, 6]
+
+
+def memory_layer(uri, rows):
+    layer = QgsVectorLayer(uri, 'couche', 'memory')
+    features = []
+    for attributes, wkt in rows:
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes(list(attributes))
+        if wkt:
+            geom = QgsGeometry.fromWkt(wkt)
+            geom.translate(X0, Y0)
+            feat.setGeometry(geom)
+        features.append(feat)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def join_layer():
+    return memory_layer('LineString?crs=EPSG:2154&field=id:integer&field=nom:string', [
+        ((1, 'a'), 'LineString(0 0, 100 0)'),
+        ((2, 'b'), 'LineString(0 30, 100 30)'),
+        ((3, 'c'), 'LineString(50 -20, 50 60)'),
+        ((4, 'd'), 'LineString(200 200, 300 200)'),
+    ])
+
+
+def points_layer():
+    return memory_layer('Point?crs=EPSG:2154&field=pid:integer', [
+        ((1,), 'Point(10 4)'),
+        ((2,), 'Point(80 12)'),
+        ((3,), 'Point(52 50)'),
+        ((4,), 'Point(150 150)'),
+        ((5,), None),
+    ])
+
+
+def zones_layer():
+    return memory_layer('Polygon?crs=EPSG:2154&field=zid:integer', [
+        ((1,), 'Polygon((40 -10, 60 -10, 60 10, 40 10, 40 -10))'),
+        ((2,), 'Polygon((40 20, 60 20, 60 40, 40 40, 40 20))'),
+        ((3,), 'Polygon((500 500, 510 500, 510 510, 500 500))'),
+        ((4,), 'Polygon((10 25, 20 25, 20 35, 10 35, 10 25))'),
+        ((5,), None),
+    ])
+
+
+def rows(layer):
+    """Attributs de sortie comparables (NULL → None, réels arrondis au cm)."""
+    out = []
+    for feat in layer.getFeatures():
+        out.append(tuple(None if v == None else  # noqa: E711 (NULL de QGIS)
+                         round(v, 2) if isinstance(v, float) else v
+                         for v in feat.attributes()))
+    return sorted(out, key=repr)
+
+
+class IndexedJoinTestCase(unittest.TestCase):
+
+    def indexed(self, **parameters):
+        parameters.setdefault('JOIN', join_layer())
+        results, context = run_algorithm(IndexedJoinAlgorithm(), parameters)
+        name = 'NEAREST_OUTPUT_1' if 'NEAREST_OUTPUT_1' in parameters else 'INTERSECT_OUTPUT_1'
+        return output_layer(results, context, name)
+
+    def native(self, alg_id, **parameters):
+        results, context = run_algorithm(alg_id, dict(parameters, OUTPUT='memory:'))
+        return output_layer(results, context)
+
+
+class NearestTest(IndexedJoinTestCase):
+    """Comparaison avec `native:joinbynearest`."""
+
+    def nearest(self, join, neighbors, max_distance, prefix=''):
+        ours = self.indexed(JOIN=join, NEAREST_INPUT_1=points_layer(), NEAREST_PREFIX=prefix,
+                            NEIGHBORS=neighbors, MAX_DISTANCE=max_distance,
+                            NEAREST_OUTPUT_1='memory:')
+        # natif : distance maximale absente (et non 0) pour « aucune »
+        native = self.native('native:joinbynearest', INPUT=points_layer(), INPUT_2=join,
+                             FIELDS_TO_COPY=[], DISCARD_NONMATCHING=False, PREFIX=prefix,
+                             NEIGHBORS=neighbors, MAX_DISTANCE=max_distance or None)
+        return ours, native
+
+    def test_one_neighbour_within_distance(self):
+        ours, native = self.nearest(join_layer(), 1, 10)
+        self.assertEqual(rows(ours), rows(native))
+        matched = {f['pid']: f['nom'] for f in ours.getFeatures() if f['nom']}
+        self.assertEqual(matched, {1: 'a', 3: 'c'})
+
+    def test_neighbour_count(self):
+        ours, native = self.nearest(join_layer(), 2, 0)
+        self.assertEqual(rows(ours), rows(native))
+        self.assertEqual(sorted(f['n'] for f in ours.getFeatures() if f['pid'] == 1), [1, 2])
+
+    def test_field_prefix(self):
+        ours, native = self.nearest(join_layer(), 1, 10, prefix='J_')
+        self.assertEqual(ours.fields().names(), native.fields().names())
+        self.assertEqual(ours.fields().names()[:3], ['pid', 'J_id', 'J_nom'])
+        self.assertEqual(rows(ours), rows(native))
+
+    def test_distance_in_input_crs(self):
+        results, context = run_algorithm('native:reprojectlayer', {
+            'INPUT': join_layer(), 'TARGET_CRS': 'EPSG:4326', 'OUTPUT': 'memory:'})
+        join_wgs84 = output_layer(results, context)
+        ours, native = self.nearest(join_wgs84, 1, 15)
+        self.assertEqual(rows(ours), rows(native))
+        distances = {f['pid']: f['distance'] for f in ours.getFeatures()}
+        self.assertAlmostEqual(distances[1], 4, places=2)
+        self.assertAlmostEqual(distances[2], 12, places=2)
+
+
+class LocationTest(IndexedJoinTestCase):
+    """Comparaison avec `native:joinattributesbylocation` (première correspondance)."""
+
+    def location(self, prefix='C_'):
+        ours = self.indexed(INTERSECT_INPUT_1=zones_layer(), INTERSECT_PREFIX_1=prefix,
+                            PREDICATE=PREDICATES, INTERSECT_OUTPUT_1='memory:')
+        native = self.native('native:joinattributesbylocation', INPUT=zones_layer(),
+                             JOIN=join_layer(), PREDICATE=PREDICATES, JOIN_FIELDS=[],
+                             METHOD=1, DISCARD_NONMATCHING=False, PREFIX=prefix)
+        return ours, native
+
+    def test_same_as_native(self):
+        ours, native = self.location()
+        self.assertEqual(ours.fields().names(), ['zid', 'C_id', 'C_nom'])
+        self.assertEqual(ours.fields().names(), native.fields().names())
+        self.assertEqual(rows(ours), rows(native))
+
+    def test_first_match(self):
+        ours, _ = self.location()
+        # z1 recoupe a et c, z2 recoupe b et c : l’entité jointe de plus petit id
+        self.assertEqual({f['zid']: f['C_nom'] for f in ours.getFeatures()},
+                         {1: 'a', 2: 'b', 3: None, 4: 'b', 5: None})
+
+    def test_predicate_indices_match_native(self):
+        names = [p[0] for p in IndexedJoinAlgorithm.PREDICATES]
+        self.assertEqual([names[i] for i in PREDICATES],
+                         ['intersects', 'contains', 'touches', 'overlaps', 'within', 'crosses'])
+
+
+if __name__ == "__main__":
+    unittest.main()
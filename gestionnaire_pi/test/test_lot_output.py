@@ -0,0 +1,69 @@
+# coding=utf-8
+"""Lot output mode test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from qgis.PyQt.QtCore import QSettings
+
+from gestionnaire_pi.core.modeler.checkpoint import (
+    CHECKPOINT_DIR, RESUME_SUPPORTED, lot_checkpoint_dir,
+)
+from gestionnaire_pi.core.modeler.lot_output import keeps_in_memory
+from gestionnaire_pi.settings.manager import SettingsManager
+
+MB = 1024 * 1024
+
+
+class LotModeTest(unittest.TestCase):
+    """Intermédiaires en mémoire ou points de reprise selon les réglages."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.settings = SettingsManager()
+        self.settings.settings = QSettings(os.path.join(self.tmp, 'settings.ini'),
+                                           QSettings.IniFormat)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def mode(self, input_bytes):
+        ckpt_dir = lot_checkpoint_dir(self.settings, self.tmp)
+        return ckpt_dir, keeps_in_memory(input_bytes, self.settings.get_memory_budget_mb(),
+                                         ckpt_dir)
+
+    def test_default_settings_keep_intermediates_in_memory(self):
+        self.assertFalse(self.settings.get_checkpoint())
+        self.assertEqual(self.mode(10 * MB), (None, True))
+
+    def test_default_settings_large_lot_on_disk(self):
+        self.assertEqual(self.mode(2048 * MB), (None, False))
+
+    @unittest.skipUnless(RESUME_SUPPORTED, 'reprise : QGIS 3.38 ou plus')
+    def test_checkpoint_disables_memory(self):
+        self.settings.set_checkpoint(True)
+        self.assertEqual(self.mode(10 * MB),
+                         (os.path.join(self.tmp, CHECKPOINT_DIR), False))
+
+    def test_budget(self):
+        self.assertTrue(keeps_in_memory(100 * MB, 300))
+        self.assertFalse(keeps_in_memory(101 * MB, 300))
+        self.assertFalse(keeps_in_memory(0, 300))
+        self.assertFalse(keeps_in_memory(1, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# coding=utf-8
+"""One-pass field mapping test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import (
+    QgsFeature, QgsGeometry, QgsProcessingException, QgsVectorLayer, QgsWkbTypes,
+)
+from qgis.PyQt.QtCore import QVariant
+
+from gestionnaire_pi.core.algorithms.map_fields import MapFieldsAlgorithm
+from gestionnaire_pi.test.utilities import output_layer, run_algorithm
+
+
+def memory_layer():
+    layer = QgsVectorLayer(
+        'LineString?crs=EPSG:2154&field=nom:string&field=val:integer', 'lignes', 'memory')
+    features = []
+    for i, (nom, val) in enumerate([('a', 2), ('b', 7), ('c', 12), (None, 20)]):
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes([nom, val])
+        feat.setGeometry(QgsGeometry.fromWkt(f'LineString({i} 0, {i} 10)'))
+        features.append(feat)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def field(name, field_type, expression, length=0, precision=0):
+    return {'name': name, 'type': field_type, 'expression': expression,
+            'length': length, 'precision': precision}
+
+
+# étape 1 : champs calculés depuis l’entrée
+MAPPING_1 = [
+    field('nom', QVariant.String, 'upper("nom")', 10),
+    field('double', QVariant.Int, '"val" * 2'),
+]
+# étape 2 : ne connaît que les champs produits par l’étape 1
+FILTER_2 = '"double" > 10'
+MAPPING_2 = [
+    field('etiquette', QVariant.String, "coalesce(\"nom\", '?') || '-' || \"double\"", 20),
+    field('moitie', QVariant.Double, '"double" / 4', 10, 2),
+]
+
+# formatage de la zone de détection (mapfields_2 du modèle) : couche vide
+EMPTY_MAPPING = [
+    field('id', QVariant.String, '', 254),
+    field('type', QVariant.LongLong, '', 10),
+    field('ColorIndex', QVariant.LongLong, '15', 10),
+    field('Weight', QVariant.Double, '5', 23, 15),
+]
+
+
+def rows(layer, names):
+    return sorted((tuple(f[name] for name in names) for f in layer.getFeatures()),
+                  key=repr)
+
+
+class MapFieldsTest(unittest.TestCase):
+    """Étapes composées en une lecture, comparées aux algorithmes natifs."""
+
+    def map_fields(self, **parameters):
+        parameters.setdefault('INPUT', memory_layer())
+        parameters.setdefault('OUTPUT', 'TEMPORARY_OUTPUT')
+        return output_layer(*run_algorithm(MapFieldsAlgorithm(), parameters))
+
+    def test_stages_chained(self):
+        layer = self.map_fields(FIELDS_MAPPING_1=MAPPING_1, FILTER_2=FILTER_2,
+                                FIELDS_MAPPING_2=MAPPING_2)
+        self.assertEqual(layer.fields().names(), ['etiquette', 'moitie'])
+        self.assertEqual(layer.wkbType(), QgsWkbTypes.LineString)
+        self.assertEqual(rows(layer, ['etiquette', 'moitie']),
+                         [('?-40', 10.0), ('B-14', 3.5), ('C-24', 6.0)])
+
+    def test_matches_native_chain(self):
+        step, context = run_algorithm('native:refactorfields', {
+            'INPUT': memory_layer(), 'FIELDS_MAPPING': MAPPING_1,
+            'OUTPUT': 'TEMPORARY_OUTPUT'})
+        step, context = run_algorithm('native:extractbyexpression', {
+            'INPUT': output_layer(step, context), 'EXPRESSION': FILTER_2,
+            'OUTPUT': 'TEMPORARY_OUTPUT'})
+        step, context = run_algorithm('native:refactorfields', {
+            'INPUT': output_layer(step, context), 'FIELDS_MAPPING': MAPPING_2,
+            'OUTPUT': 'TEMPORARY_OUTPUT'})
+        native = output_layer(step, context)
+
+        layer = self.map_fields(FIELDS_MAPPING_1=MAPPING_1, FILTER_2=FILTER_2,
+                                FIELDS_MAPPING_2=MAPPING_2)
+        names = ['etiquette', 'moitie']
+        self.assertEqual(layer.fields().names(), native.fields().names())
+        self.assertEqual(rows(layer, names), rows(native, names))
+        self.assertEqual(sorted(f.geometry().asWkt() for f in layer.getFeatures()),
+                         sorted(f.geometry().asWkt() for f in native.getFeatures()))
+
+    def test_input_filter(self):
+        layer = self.map_fields(FILTER_1='"val" < 10', FIELDS_MAPPING_1=MAPPING_1)
+        self.assertEqual(rows(layer, ['nom', 'double']), [('A', 4), ('B', 14)])
+
+    def test_always_false_filter(self):
+        layer = self.map_fields(FILTER_1='false', FIELDS_MAPPING_1=EMPTY_MAPPING)
+        self.assertEqual(layer.featureCount(), 0)
+        self.assertEqual(layer.fields().names(), ['id', 'type', 'ColorIndex', 'Weight'])
+        self.assertEqual(layer.wkbType(), QgsWkbTypes.LineString)
+        self.assertEqual(layer.crs().authid(), 'EPSG:2154')
+
+    def test_drop_geometry(self):
+        layer = self.map_fields(FIELDS_MAPPING_1=MAPPING_1, DROP_GEOMETRY=True)
+        self.assertEqual(layer.wkbType(), QgsWkbTypes.NoGeometry)
+        self.assertEqual(layer.featureCount(), 4)
+
+    def test_unknown_field_of_previous_stage(self):
+        # l’étape 2 ne voit plus « val », remplacé à l’étape 1
+        with self.assertRaises(QgsProcessingException):
+            self.map_fields(FIELDS_MAPPING_1=MAPPING_1,
+                            FIELDS_MAPPING_2=[field('x', QVariant.Int, '"val" + 1')])
+
+    def test_parser_error(self):
+        with self.assertRaises(QgsProcessingException):
+            self.map_fields(FIELDS_MAPPING_1=[field('x', QVariant.Int, '"val" +')])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# coding=utf-8
+"""Merged lines schema test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import QgsProcessingException, QgsVectorLayer, QgsWkbTypes
+
+from gestionnaire_pi.core.algorithms.merge_lines import merged_schema
+
+
+def memory_layer(geometry, fields, name='lin'):
+    uri = f"{geometry}?crs=EPSG:2154" + "".join(f"&field={f}" for f in fields)
+    return QgsVectorLayer(uri, name, 'memory')
+
+
+class MergedSchemaTest(unittest.TestCase):
+    """Règles de `native:mergevectorlayers`."""
+
+    @classmethod
+    def setUpClass(cls):
+        from gestionnaire_pi.test.utilities import get_qgis_app
+        get_qgis_app()
+
+    def test_fields_joined_ignoring_case(self):
+        a = memory_layer('LineString', ['CODE:string', 'diam:integer'])
+        b = memory_layer('LineString', ['code:string', 'matiere:string'])
+        fields, _, added = merged_schema([a, b])
+        self.assertEqual(fields.names(), ['CODE', 'diam', 'matiere', 'layer', 'path'])
+        self.assertEqual(added, ['layer', 'path'])
+
+    def test_existing_layer_field_kept(self):
+        a = memory_layer('LineString', ['layer:string'])
+        fields, _, added = merged_schema([a])
+        self.assertEqual(fields.names(), ['layer', 'path'])
+        self.assertEqual(added, ['path'])
+
+    def test_field_type_mismatch(self):
+        a = memory_layer('LineString', ['diam:integer'], 'a')
+        b = memory_layer('LineString', ['DIAM:string'], 'b')
+        with self.assertRaises(QgsProcessingException):
+            merged_schema([a, b])
+
+    def test_geometry_type_mismatch(self):
+        a = memory_layer('LineString', [])
+        b = memory_layer('Point', [])
+        with self.assertRaises(QgsProcessingException):
+            merged_schema([a, b])
+
+    def test_z_m_multi_promoted(self):
+        layers = [memory_layer('LineString', []),
+                  memory_layer('LineStringZ', []),
+                  memory_layer('MultiLineStringM', [])]
+        _, wkb_type, _ = merged_schema(layers)
+        self.assertEqual(wkb_type, QgsWkbTypes.MultiLineStringZM)
+
+    def test_single_layer_type_unchanged(self):
+        _, wkb_type, _ = merged_schema([memory_layer('LineString', [])])
+        self.assertEqual(wkb_type, QgsWkbTypes.LineString)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# coding=utf-8
+"""Weighted lot progress test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+from unittest import mock
+
+from gestionnaire_pi.core.modeler import progress
+from gestionnaire_pi.core.modeler.progress import (
+    ProgressEstimator, format_duration, parse_step,
+)
+
+
+def _estimator(history, feature_count, t0=100.0):
+    with mock.patch.object(progress.time, 'perf_counter', return_value=t0):
+        return ProgressEstimator(history, feature_count)
+
+
+def _estimate(estimator, raw_pct, now):
+    with mock.patch.object(progress.time, 'perf_counter', return_value=now):
+        return estimator.estimate(raw_pct)
+
+
+class ParseStepTest(unittest.TestCase):
+    """Messages d’étape émis par le modèle (setProgressText)."""
+
+    def test_model_message(self):
+        self.assertEqual(parse_step('Running 1-Fusion_Lin [3/27]'),
+                         ('1-Fusion_Lin', 3, 27))
+
+    def test_description_with_spaces_and_brackets(self):
+        self.assertEqual(parse_step('Running B-Format Emprises [12/27]'),
+                         ('B-Format Emprises', 12, 27))
+        self.assertEqual(parse_step('Running Tampon [dissous] [4/9] '),
+                         ('Tampon [dissous]', 4, 9))
+
+    def test_without_prefix(self):
+        self.assertEqual(parse_step('DOUBLONS [5/27]'), ('DOUBLONS', 5, 27))
+
+    def test_other_messages(self):
+        self.assertIsNone(parse_step('Running Principale'))
+        self.assertIsNone(parse_step("Algorithm 'DOUBLONS' finished"))
+        self.assertIsNone(parse_step(''))
+
+
+class ProgressEstimatorTest(unittest.TestCase):
+    """Progression pondérée et temps restant."""
+
+    def test_without_history_keeps_raw_progress(self):
+        est = _estimator({}, 10)
+        est.start_step('A', 1, 2)
+        self.assertEqual(_estimate(est, 0, 110.0), (0, None))
+        pct, eta = _estimate(est, 50.0, 110.0)
+        self.assertEqual(pct, 50.0)
+        self.assertAlmostEqual(eta, 10.0)
+
+    def test_before_first_step_keeps_raw_progress(self):
+        est = _estimator({'A': 1.0}, 1)
+        pct, eta = _estimate(est, 20.0, 102.0)
+        self.assertEqual(pct, 20.0)
+        self.assertAlmostEqual(eta, 8.0)
+
+    def test_weighted_by_history(self):
+        # A : 1 s attendue, B : 3 s (1 entité)
+        est = _estimator({'A': 1.0, 'B': 3.0}, 1)
+        est.start_step('A', 1, 2)
+        pct, eta = _estimate(est, 25.0, 101.0)       # moitié de A
+        self.assertAlmostEqual(pct, 12.5)
+        # 0,5 s attendue faite en 1 s : reste 3,5 s attendues × 2
+        self.assertAlmostEqual(eta, 7.0)
+
+        est.start_step('B', 2, 2)
+        pct, _ = _estimate(est, 75.0, 103.0)         # moitié de B
+        self.assertAlmostEqual(pct, 62.5)
+
+    def test_scaled_by_feature_count(self):
+        est = _estimator({'A': 1.0, 'B': 3.0}, 1000)
+        est.start_step('A', 1, 2)
+        pct, _ = _estimate(est, 50.0, 101.0)         # A terminé
+        self.assertAlmostEqual(pct, 25.0)
+
+    def test_unknown_step_uses_mean_duration(self):
+        est = _estimator({'A': 2.0, 'B': 4.0}, 1)
+        est.start_step('C', 1, 3)
+        pct, _ = _estimate(est, 100.0 / 3, 101.0)    # C (3 s supposées) terminé
+        self.assertAlmostEqual(pct, 100.0 * 3 / (3 + 2 + 4))
+
+    def test_updated_history(self):
+        est = _estimator({'A': 1.0}, 10)
+        history = est.updated_history({'A': 20.0, 'B': 5.0})
+        # A : 0,7 × 1 + 0,3 × 2 ; B : première mesure, 0,5 s / entité
+        self.assertAlmostEqual(history['A'], 1.3)
+        self.assertAlmostEqual(history['B'], 0.5)
+        self.assertEqual(est.history, {'A': 1.0})
+
+    def test_format_duration(self):
+        self.assertEqual(format_duration(75), '01 min 15 s')
+        self.assertEqual(format_duration(3912), '1 h 05 min 12 s')
+
+
+class TimingFeedbackTest(unittest.TestCase):
+    """Les étapes annoncées par setProgressText alimentent l’historique."""
+
+    @classmethod
+    def setUpClass(cls):
+        from gestionnaire_pi.test.utilities import get_qgis_app
+        get_qgis_app()
+
+    def test_set_progress_text_starts_steps(self):
+        from gestionnaire_pi.ui.main_dockwidget import TimingFeedback
+
+        est = _estimator({'1-Fusion_Lin': 1.0}, 1)
+        feedback = TimingFeedback(estimator=est)
+        with mock.patch('time.perf_counter', side_effect=[10.0, 14.0]):
+            feedback.setProgressText('Running 1-Fusion_Lin [1/2]')
+            feedback.setProgressText('Running DOUBLONS [2/2]')
+        self.assertEqual(est._current, 'DOUBLONS')
+        self.assertEqual(est._done, ['1-Fusion_Lin'])
+        durations = feedback.step_durations(end=15.0)
+        self.assertEqual(durations, {'1-Fusion_Lin': 4.0, 'DOUBLONS': 1.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
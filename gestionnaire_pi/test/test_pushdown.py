@@ -0,0 +1,87 @@
+# coding=utf-8
+"""Extent pushdown test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import unittest
+
+from qgis.core import (
+    QgsCoordinateReferenceSystem, QgsFeature, QgsGeometry, QgsRectangle,
+    QgsVectorLayer,
+)
+
+from gestionnaire_pi.core.modeler.pushdown import emprise_extent, extent_parameter
+
+
+class ExtentParameterTest(unittest.TestCase):
+    """Valeur du paramètre « emprise_lineaires »."""
+
+    def test_null_or_empty(self):
+        crs = QgsCoordinateReferenceSystem('EPSG:2154')
+        null = QgsRectangle()
+        null.setNull()
+        self.assertIsNone(extent_parameter(null, crs))
+        self.assertIsNone(extent_parameter(QgsRectangle(5, 5, 5, 5), crs))
+
+    def test_margin_in_metres(self):
+        crs = QgsCoordinateReferenceSystem('EPSG:2154')
+        self.assertEqual(extent_parameter(QgsRectangle(0, 0, 1000, 500), crs),
+                         '-100.0,1100.0,-100.0,600.0 [EPSG:2154]')
+        self.assertEqual(extent_parameter(QgsRectangle(0, 0, 1000, 500), crs, 0),
+                         '0.0,1000.0,0.0,500.0 [EPSG:2154]')
+
+    def test_margin_converted_to_degrees(self):
+        crs = QgsCoordinateReferenceSystem('EPSG:4326')
+        value = extent_parameter(QgsRectangle(2, 48, 3, 49), crs)
+        coords, authid = value.split(' ')
+        xmin, xmax, ymin, ymax = (float(c) for c in coords.split(','))
+        self.assertEqual(authid, '[EPSG:4326]')
+        self.assertAlmostEqual(2 - xmin, 100 / 111319.49, places=6)
+        self.assertAlmostEqual(ymax - 49, 100 / 111319.49, places=6)
+
+
+class EmpriseExtentTest(unittest.TestCase):
+    """Emprise des plans des communes du lot."""
+
+    @classmethod
+    def setUpClass(cls):
+        from gestionnaire_pi.test.utilities import get_qgis_app
+        get_qgis_app()
+
+    def layer(self):
+        layer = QgsVectorLayer('Polygon?crs=EPSG:2154&field=COMMUNE_IN:string',
+                               'emprises', 'memory')
+        features = []
+        for code, wkt in (('75056', 'POLYGON((0 0, 10 0, 10 10, 0 10, 0 0))'),
+                          ('92012', 'POLYGON((100 100, 120 100, 120 130, 100 100))'),
+                          ('93001', 'POLYGON((-50 -50, -40 -50, -40 -40, -50 -50))')):
+            feat = QgsFeature(layer.fields())
+            feat.setAttributes([code])
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+            features.append(feat)
+        layer.dataProvider().addFeatures(features)
+        return layer
+
+    def test_filtered_by_insee(self):
+        extent = emprise_extent(self.layer(), ['75056', '92012'])
+        self.assertEqual(extent, QgsRectangle(0, 0, 120, 130))
+
+    def test_unknown_code(self):
+        self.assertTrue(emprise_extent(self.layer(), ['00000']).isNull())
+
+    def test_without_codes(self):
+        extent = emprise_extent(self.layer(), [])
+        self.assertEqual(extent, QgsRectangle(-50, -50, 120, 130))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+# coding=utf-8
+"""Single GeoPackage lot writer test.
+
+.. note:: This program is free software; you can redistribute it and/or modify
+     it under the terms of the GNU General Public License as published by
+     the Free Software Foundation; either version 2 of the License, or
+     (at your option) any later version.
+
+"""
+
+__author__ = 'Xavier.garachon@externe.grdf.fr'
+__date__ = '2025-04-15'
+__copyright__ = 'Copyright 2025, xavier'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from qgis.core import (
+    QgsFeature, QgsGeometry, QgsProcessingException, QgsProcessingFeedback,
+    QgsVectorLayer, QgsWkbTypes,
+)
+
+from gestionnaire_pi.core.algorithms.write_lot import WriteLotAlgorithm
+from gestionnaire_pi.test.utilities import run_algorithm
+
+
+def memory_layer(uri, rows):
+    layer = QgsVectorLayer(uri, 'couche', 'memory')
+    features = []
+    for attributes, wkt in rows:
+        feat = QgsFeature(layer.fields())
+        feat.setAttributes(list(attributes))
+        if wkt:
+            feat.setGeometry(QgsGeometry.fromWkt(wkt))
+        features.append(feat)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+
+def lot_layers():
+    lines = memory_layer(
+        'LineString?crs=EPSG:2154&field=nom:string(20)&field=diam:integer'
+        '&field=longueur:double&field=fid:integer', [
+            (('a', 63, 10.5, 99), 'LineString(0 0, 10 0)'),
+            (('b', None, 2.0, 98), 'LineString(0 5, 10 5)'),
+            ((None, 110, None, 97), 'LineString(0 9, 10 9)'),
+        ])
+    folios = memory_layer('Polygon?crs=EPSG:2154&field=type:string', [
+        (('vrai',), 'Polygon((0 0, 10 0, 10 10, 0 10, 0 0))'),
+        (('raccord',), 'Polygon((10 0, 20 0, 20 10, 10 10, 10 0))'),
+    ])
+    table = memory_layer('None?field=commune:string&field=total:double', [
+        (('75056', 1.5), None),
+    ])
+    return [('Lineaires_lot', lines), ('Folios_lot', folios), ('Synthese', table)]
+
+
+class WriteLotTest(unittest.TestCase):
+    """Paquet écrit d’un bloc, jamais laissé partiel."""
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'Lot.gpkg')
+        self.part = os.path.join(self.folder, 'Lot.part.gpkg')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def write(self, layers, feedback=None):
+        parameters = {'OUTPUT': self.path, 'CACHE_SIZE': 16}
+        for n, (name, layer) in enumerate(layers, 1):
+            parameters[f'LAYER_{n}'] = layer
+            parameters[f'NAME_{n}'] = name
+        results, _ = run_algorithm(WriteLotAlgorithm(), parameters, feedback)
+        return results
+
+    def previous_package(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'lot precedent')
+
+    def assertPreviousUntouched(self):
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), b'lot precedent')
+        for suffix in ('', '-wal', '-shm'):
+            self.assertFalse(os.path.exists(self.part + suffix), suffix)
+
+    def test_layers_written(self):
+        layers = lot_layers()
+        results = self.write(layers)
+        self.assertEqual(results['OUTPUT'], self.path)
+        self.assertEqual(results['LAYERS'],
+                         [f'{self.path}|layername={name}' for name, _ in layers])
+        self.assertFalse(os.path.exists(self.part))
+
+        written = {name: QgsVectorLayer(uri, name, 'ogr')
+                   for name, uri in zip((n for n, _ in layers), results['LAYERS'])}
+        for name, source in layers:
+            layer = written[name]
+            self.assertTrue(layer.isValid(), name)
+            self.assertEqual(layer.featureCount(), source.featureCount(), name)
+
+        lines = written['Lineaires_lot']
+        # la colonne fid du paquet remplace le champ homonyme
+        self.assertEqual(lines.fields().names(), ['fid', 'nom', 'diam', 'longueur'])
+        self.assertEqual(lines.wkbType(), QgsWkbTypes.LineString)
+        self.assertEqual(lines.crs().authid(), 'EPSG:2154')
+        rows = sorted((f['nom'] or '', f['diam'], f['longueur']) for f in lines.getFeatures())
+        self.assertEqual([r[0] for r in rows], ['', 'a', 'b'])
+        self.assertEqual(written['Folios_lot'].fields().names(), ['fid', 'type'])
+        self.assertEqual(written['Synthese'].wkbType(), QgsWkbTypes.NoGeometry)
+        self.assertEqual([f['commune'] for f in written['Synthese'].getFeatures()], ['75056'])
+
+    def test_replaces_previous_package(self):
+        self.previous_package()
+        self.write(lot_layers()[:1])
+        layer = QgsVectorLayer(f'{self.path}|layername=Lineaires_lot', 'lin', 'ogr')
+        self.assertEqual(layer.featureCount(), 3)
+
+    def test_cancel_keeps_previous_package(self):
+        self.previous_package()
+        feedback = QgsProcessingFeedback()
+        feedback.cancel()
+        with self.assertRaises(QgsProcessingException):
+            self.write(lot_layers(), feedback)
+        self.assertPreviousUntouched()
+
+    def test_failure_keeps_previous_package(self):
+        self.previous_package()
+        layers = lot_layers()
+        # deux tables du même nom : la seconde ne peut pas être créée
+        # (RuntimeError si les exceptions OGR sont activées)
+        with self.assertRaises((QgsProcessingException, RuntimeError)):
+            self.write([layers[0], ('Lineaires_lot', layers[1][1])])
+        self.assertPreviousUntouched()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -59,3 +59,41 @@ def get_qgis_app():
         IFACE = QgisInterface(CANVAS)
 
     return QGIS_APP, CANVAS, IFACE, PARENT
+
+
+def run_algorithm(algorithm, parameters, feedback=None):
+    """ Run a processing algorithm and return its results and context.
+
+    :param algorithm: Algorithm id (e.g. 'native:buffer') or an instance of
+        one of the plugin algorithms.
+    :param parameters: Algorithm parameters.
+    :param feedback: Optional QgsProcessingFeedback (e.g. already canceled).
+    :returns: Results dict and the QgsProcessingContext holding the
+        temporary output layers (see :func:`output_layer`).
+    :rtype: (dict, QgsProcessingContext)
+
+    Errors, including cancellation, are raised as QgsProcessingException.
+    """
+    from qgis.analysis import QgsNativeAlgorithms
+    from qgis.core import (
+        QgsApplication, QgsProcessingContext, QgsProcessingFeedback)
+
+    get_qgis_app()
+    registry = QgsApplication.processingRegistry()
+    if registry.providerById('native') is None:
+        registry.addProvider(QgsNativeAlgorithms())
+    if isinstance(algorithm, str):
+        algorithm = registry.createAlgorithmById(algorithm)
+    else:
+        algorithm = algorithm.create()
+    context = QgsProcessingContext()
+    results, _ = algorithm.run(
+        parameters, context, feedback or QgsProcessingFeedback(),
+        catchExceptions=False)
+    return results, context
+
+
+def output_layer(results, context, name='OUTPUT'):
+    """ Layer written to a 'memory:' or file output by :func:`run_algorithm`."""
+    from qgis.core import QgsProcessingUtils
+    return QgsProcessingUtils.mapLayerFromString(results[name], context)
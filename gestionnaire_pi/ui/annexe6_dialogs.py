@@ -5,31 +5,53 @@
 """
 from qgis.PyQt.QtWidgets import (
     QDialog, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QSpacerItem,
-    QSizePolicy
+    QSizePolicy, QListWidget, QListWidgetItem, QAbstractItemView
 )
 from qgis.PyQt.QtCore import Qt
 from qgis.PyQt.QtGui import QColor
 from qgis.gui import QgsRubberBand
-from qgis.core import QgsWkbTypes
+from qgis.core import Qgis, QgsMessageLog, QgsWkbTypes
 
 
 class ModificationDialog(QDialog):
-    def __init__(self, features, iface, deleted_features, layer, parent=None):
+    # nombre de folios impactés listés sous une zone
+    MAX_FOLIOS_SHOWN = 5
+
+    def __init__(self, features, iface, deleted_ids, layer, parent=None, result=None):
         super().__init__(parent)
         self.iface = iface
         self.canvas = iface.mapCanvas()
         self.layer = layer
         self.features = features
-        self.deleted_features = deleted_features
+        self.deleted_ids = deleted_ids       # fid des zones supprimées
         self.current_index = 0
+        self.current_feature = None
         self.rubber_alpha = 100
-        self.rubber_band = None
+
+        # Éléments de canvas propres à la boîte : le nettoyage ne parcourt
+        # qu’eux, pas toute la scène
+        self.zones_band = self._new_band(QColor(255, 140, 0, 60), QColor(255, 140, 0, 200), 1)
+        self.current_band = self._new_band(QColor(255, 0, 0, 40), QColor(255, 0, 0, self.rubber_alpha), 2)
+
+        # Index de contribution (process_data(with_contributions=True))
+        self.contributions = dict(result.contributions) if result is not None else {}
+        self.total_c = result.length_c if result is not None else None
+        self.total_b = result.length_b + result.length_w if result is not None else None
+        self.folio_names = {}
+        if result is not None:
+            for f in result.vrais:
+                name = f.get('plan_nom')
+                self.folio_names[f.id()] = str(name) if name else f"#{f.id()}"
 
         self.setWindowTitle("Parcourir les zones")
 
         # ── UI ───────────────────────────────────────────
         self.label = QLabel(alignment=Qt.AlignCenter)
+        self.zone_list = QListWidget()
+        self.zone_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.length_label = QLabel("", alignment=Qt.AlignCenter)
+        self.impact_label = QLabel("", alignment=Qt.AlignCenter)
+        self.impact_label.setWordWrap(True)
 
         self.btn_prev = QPushButton("Précédent")
         self.btn_next = QPushButton("Suivant")
@@ -44,8 +66,10 @@ class ModificationDialog(QDialog):
 
         layout = QVBoxLayout(self)
         layout.addWidget(self.label)
+        layout.addWidget(self.zone_list)
         layout.addItem(QSpacerItem(5, 5, QSizePolicy.Minimum, QSizePolicy.Expanding))
         layout.addWidget(self.length_label)
+        layout.addWidget(self.impact_label)
         layout.addItem(QSpacerItem(5, 5, QSizePolicy.Minimum, QSizePolicy.Expanding))
         layout.addLayout(nav)
         layout.addItem(QSpacerItem(5, 5, QSizePolicy.Minimum, QSizePolicy.Expanding))
@@ -56,13 +80,46 @@ class ModificationDialog(QDialog):
         self.btn_next.clicked.connect(self.show_next)
         self.btn_delete.clicked.connect(self.on_delete)
         self.btn_close.clicked.connect(self.accept)
+        self.zone_list.currentRowChanged.connect(self._on_row_changed)
+        self.zone_list.itemSelectionChanged.connect(self._update_delete_label)
 
+        self.fill_list()
+        self.draw_zones()
         self.update_view()          # affichage initial
     # ---------------------------------------------------
 
+    def _new_band(self, fill, stroke, width):
+        band = QgsRubberBand(self.canvas, QgsWkbTypes.PolygonGeometry)
+        band.setFillColor(fill)
+        band.setStrokeColor(stroke)
+        band.setWidth(width)
+        return band
+
+    def fill_list(self):
+        self.zone_list.blockSignals(True)
+        self.zone_list.clear()
+        for feat in self.features:
+            length = round(feat.geometry().length(), 1)
+            self.zone_list.addItem(QListWidgetItem(f"ID {feat.id():02d} — {length} m"))
+        if self.features:
+            self.zone_list.setCurrentRow(self.current_index)
+        self.zone_list.blockSignals(False)
+
+    def draw_zones(self):
+        """Toutes les zones candidates dans une seule bande (un seul élément de scène)."""
+        self.zones_band.reset(QgsWkbTypes.PolygonGeometry)
+        for feat in self.features:
+            self.zones_band.addGeometry(feat.geometry(), self.layer, False)
+        self.zones_band.updatePosition()
+        self.zones_band.update()
+
     def update_view(self):
         if not self.features:
             self.label.setText("Aucune zone à afficher.")
+            self.length_label.setText("")
+            self.impact_label.setText("")
+            self.current_band.reset(QgsWkbTypes.PolygonGeometry)
+            self.current_feature = None
             self.btn_prev.setEnabled(False)
             self.btn_next.setEnabled(False)
             self.btn_delete.setEnabled(False)
@@ -70,13 +127,11 @@ class ModificationDialog(QDialog):
 
         self.current_feature = self.features[self.current_index]
         self.label.setText(
-            f"Zone {self.current_index+1}/{len(self.features)} — ID : {self.current_feature.id():02d}"
+            f"Zone {self.current_index+1}/{len(self.features)} — ID : {self.current_feature.id():02d}"
         )
 
-        # -- recadre UNE FOIS --
-        bbox = self.current_feature.geometry().boundingBox()
-        self.canvas.setExtent(bbox)
-        self.canvas.refresh()
+        # -- recadre seulement si la zone sort de l’écran --
+        self.pan_to(self.current_feature.geometry().boundingBox())
 
         # -- rubber band --
         self.draw_rubber_band(self.current_feature)
@@ -84,57 +139,119 @@ class ModificationDialog(QDialog):
         # -- métrage --
         length = round(self.current_feature.geometry().length(), 1)
         self.length_label.setText(f"Longueur : {length} m")
+        self.impact_label.setText(self.impact_text(self.current_feature.id()))
 
         # navigation btns
         self.btn_prev.setEnabled(self.current_index > 0)
         self.btn_next.setEnabled(self.current_index < len(self.features) - 1)
+        self._update_delete_label()
+
+    def pan_to(self, bbox):
+        """Déplace la vue uniquement si *bbox* (CRS couche) n’est pas entièrement visible."""
+        bbox = self.canvas.mapSettings().layerExtentToOutputExtent(self.layer, bbox)
+        extent = self.canvas.extent()
+        if extent.contains(bbox):
+            return
+        if bbox.width() < extent.width() and bbox.height() < extent.height():
+            self.canvas.setCenter(bbox.center())    # on garde l’échelle
+        else:
+            self.canvas.setExtent(bbox)
 
     # ---------------------------------------------------
+    def impact_text(self, zone_id):
+        """Écart exact sur les totaux C/B et les folios si la zone est supprimée."""
+        if self.total_c is None:
+            return ""
+        contrib = self.contributions.get(zone_id)
+        if contrib is None or (contrib.c <= 0 and contrib.b <= 0):
+            return "Si supprimée : aucun impact sur les totaux."
+
+        lines = [
+            "Si supprimée : "
+            f"C −{contrib.c:.1f} m (→ {self.total_c - contrib.c:.1f} m) · "
+            f"B −{contrib.b:.1f} m (→ {self.total_b - contrib.b:.1f} m)"
+        ]
+        impacted = sorted(contrib.folios.items(), key=lambda kv: -(kv[1][0] + kv[1][1]))
+        for fid, (c, b) in impacted[:self.MAX_FOLIOS_SHOWN]:
+            lines.append(f"{self.folio_names.get(fid, fid)} : C −{c:.1f} m / B −{b:.1f} m")
+        if len(impacted) > self.MAX_FOLIOS_SHOWN:
+            lines.append(f"… et {len(impacted) - self.MAX_FOLIOS_SHOWN} autre(s) folio(s)")
+        return "\n".join(lines)
+
     def draw_rubber_band(self, feature):
-        if self.rubber_band:
-            self.rubber_band.reset(QgsWkbTypes.PolygonGeometry)
-        self.rubber_band = QgsRubberBand(self.canvas, QgsWkbTypes.PolygonGeometry)
-        self.rubber_band.setToGeometry(feature.geometry(), self.layer)
-        self.rubber_band.setColor(QColor(255, 0, 0, self.rubber_alpha))
-        self.rubber_band.setWidth(2)
+        self.current_band.setToGeometry(feature.geometry(), self.layer)
+
+    def _on_row_changed(self, row):
+        if 0 <= row < len(self.features) and row != self.current_index:
+            self.current_index = row
+            self.update_view()
+
+    def _update_delete_label(self):
+        n = len(self.zone_list.selectedItems())
+        self.btn_delete.setText(f"🗑 Supprimer ({n})" if n > 1 else "🗑 Supprimer")
+        self.btn_delete.setEnabled(bool(self.features))
 
     def show_next(self):
         if self.current_index < len(self.features) - 1:
-            self.current_index += 1
-            self.update_view()      # recadre au changement de zone
+            self.zone_list.setCurrentRow(self.current_index + 1)
 
     def show_prev(self):
         if self.current_index > 0:
-            self.current_index -= 1
-            self.update_view()      # recadre au changement de zone
+            self.zone_list.setCurrentRow(self.current_index - 1)
 
 
     def on_delete(self):
+        """Supprime en un seul lot les zones sélectionnées (à défaut, la zone courante)."""
         if not self.current_feature:
             return
 
-        feature_id = self.current_feature.id()
+        rows = sorted({self.zone_list.row(item) for item in self.zone_list.selectedItems()})
+        if not rows:
+            rows = [self.current_index]
+        to_delete = [self.features[r] for r in rows]
+        feature_ids = [f.id() for f in to_delete]
 
         if not self.layer.isEditable():
             self.layer.startEditing()
 
-        self.layer.deleteFeature(feature_id)
-        self.deleted_features.append(self.current_feature)
-
-        print(f"Zone supprimée immédiatement : {feature_id}")
-        del self.features[self.current_index]
-
-        if self.current_index >= len(self.features):
-            self.current_index = max(0, len(self.features) - 1)
+        self.layer.deleteFeatures(feature_ids)
+        self.deleted_ids.extend(feature_ids)
+
+        # totaux affichés : on retire la part exclusive des zones supprimées
+        # (exacte pour une zone ; pour un lot, les recouvrements entre zones
+        #  supprimées ne sont pas comptés)
+        for feature_id in feature_ids:
+            contrib = self.contributions.pop(feature_id, None)
+            if contrib is not None and self.total_c is not None:
+                self.total_c -= contrib.c
+                self.total_b -= contrib.b
+
+        QgsMessageLog.logMessage(
+            f"[GestionnairePi] Zones supprimées : {feature_ids}",
+            "GestionnairePi", Qgis.Info
+        )
+        for r in reversed(rows):
+            del self.features[r]
 
+        self.current_index = min(rows[0], max(0, len(self.features) - 1))
+        self.fill_list()
+        self.draw_zones()
         self.update_view()
 
-    def get_deleted_features(self):
-        return self.deleted_features
+    def get_deleted_ids(self):
+        return self.deleted_ids
+
+    def cleanup(self):
+        """Retire du canvas les seules bandes créées par la boîte."""
+        for band in (self.zones_band, self.current_band):
+            if band is not None:
+                self.canvas.scene().removeItem(band)
+        self.zones_band = self.current_band = None
 
 
 class ValidationDialog(QDialog):
-    def __init__(self, total_zones, length_c, length_b, length_w):
+    def __init__(self, total_zones=None, length_c=0.0, length_b=0.0, length_w=0.0,
+                 preview=None):
         super().__init__()
         self.setWindowTitle("Validation des Statistiques")
         self.setMinimumWidth(350)
@@ -142,9 +259,11 @@ class ValidationDialog(QDialog):
         self.closed_by_x = False
 
         # Labels
-        self.label_zones = QLabel(f"Nombre total de zones détectées : {total_zones}")
-        self.label_c = QLabel(f"Classe C : {round(length_c, 1)} m")
-        self.label_b = QLabel(f"Classe B : {round(length_b + length_w,1)} m")
+        self.label_zones = QLabel()
+        self.label_c = QLabel()
+        self.label_b = QLabel()
+        self.label_status = QLabel()
+        self.label_status.setWordWrap(True)
 
         # Boutons
         self.modify_button = QPushButton("Modifier")
@@ -155,6 +274,7 @@ class ValidationDialog(QDialog):
         layout.addWidget(self.label_zones)
         layout.addWidget(self.label_c)
         layout.addWidget(self.label_b)
+        layout.addWidget(self.label_status)
 
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(self.modify_button)
@@ -170,6 +290,33 @@ class ValidationDialog(QDialog):
 
         self._modify_clicked = False
 
+        if preview is not None:
+            self.set_preview(preview)
+        else:
+            self.set_totals(total_zones, length_c, length_b, length_w)
+
+    def set_preview(self, preview):
+        """Variante « aperçu » : valeurs estimées, boutons bloqués jusqu’au calcul exact."""
+        self.setWindowTitle("Aperçu des Statistiques")
+        self.label_zones.setText("Calcul exact en cours…")
+        self.label_c.setText(f"Classe C : ≈ {preview.length_c:.0f} m (± {preview.err_c:.0f} m)")
+        self.label_b.setText(f"Classe B : ≈ {preview.length_b:.0f} m (± {preview.err_b:.0f} m)")
+        self.label_status.setText(
+            f"Estimation sur {preview.sampled} segment(s) / {preview.population}, "
+            f"borne à 95 %.")
+        for btn in (self.modify_button, self.accept_button, self.cancel_button):
+            btn.setEnabled(False)
+
+    def set_totals(self, total_zones, length_c, length_b, length_w):
+        """Valeurs exactes : la validation devient possible."""
+        self.setWindowTitle("Validation des Statistiques")
+        self.label_zones.setText(f"Nombre total de zones détectées : {total_zones}")
+        self.label_c.setText(f"Classe C : {round(length_c, 1)} m")
+        self.label_b.setText(f"Classe B : {round(length_b + length_w,1)} m")
+        self.label_status.setText("")
+        for btn in (self.modify_button, self.accept_button, self.cancel_button):
+            btn.setEnabled(True)
+
     def modify_clicked(self):
         self._modify_clicked = True
         self.reject()
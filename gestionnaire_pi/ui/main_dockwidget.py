@@ -6,8 +6,8 @@ import random
 
 # --- QGIS / Qt --------------------------------------------------------
 from qgis.PyQt import QtWidgets, uic
-from qgis.PyQt.QtCore import pyqtSignal, Qt, QMetaObject, QTimer, QDir
-from qgis.PyQt.QtGui import QMovie
+from qgis.PyQt.QtCore import pyqtSignal, Qt, QMetaObject, QTimer, QDir, QUrl
+from qgis.PyQt.QtGui import QMovie, QDesktopServices
 
 from qgis.PyQt.QtWidgets import (
     QFileDialog,
@@ -18,7 +18,7 @@ from qgis.PyQt.QtWidgets import (
 )
 from qgis.core import (
     QgsApplication, QgsMessageLog, QgsProcessingAlgRunnerTask,
-    QgsProcessingContext, QgsProcessingFeedback, QgsProject,
+    QgsProcessingContext, QgsProcessingFeedback, QgsProcessingUtils, QgsProject,
     QgsRasterLayer, QgsSettings, QgsVectorLayer,
     QgsWkbTypes, Qgis, QgsPathResolver,    
 )
@@ -30,6 +30,21 @@ from PyQt5.QtCore import Qt, QSize, QTimer
 
 # --- Plugin local -----------------------------------------------------
 from gestionnaire_pi.settings.manager import SettingsManager
+from gestionnaire_pi.core.modeler.checkpoint import (
+    RESUME_SUPPORTED, clear_checkpoint, lot_checkpoint_dir, prune_checkpoint,
+    resume_config, run_fingerprint, save_checkpoint,
+)
+from gestionnaire_pi.core.modeler.indexes import ensure_spatial_indexes
+from gestionnaire_pi.core.modeler.loader import ResultLayersTask
+from gestionnaire_pi.core.modeler.lot_output import lot_outputs, prepare_lot_model
+from gestionnaire_pi.core.modeler.pushdown import emprise_extent, extent_parameter
+from gestionnaire_pi.core.modeler.progress import (
+    ProgressEstimator, format_duration, parse_step,
+)
+from gestionnaire_pi.core.annexe6.service import chunk_size_setting
+from gestionnaire_pi.core.history.service import (
+    KIND_LOT, MemorySampler, export_html_report, record_run,
+)
 import gestionnaire_pi.resources_rc
 
 FORM_CLASS, _ = uic.loadUiType(
@@ -44,11 +59,13 @@ class TimingFeedback(QgsProcessingFeedback):
     _re_start = re.compile(r"^Running (.+)")
     _re_end   = re.compile(r"^Algorithm '([^']+)' finished")
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, estimator: ProgressEstimator | None = None, **kwargs):
         super().__init__(*args, **kwargs)
         self._t0: dict[str, float] = {}
         self.times: dict[str, float] = {}
         self._log: list[str] = []        # journal interne
+        self.estimator = estimator
+        self.step_starts: list[tuple[str, float]] = []
 
     # ---------- utilitaire interne ----------
     def _log_to_qgis(self, txt: str) -> None:
@@ -58,7 +75,12 @@ class TimingFeedback(QgsProcessingFeedback):
 
     def _handle(self, txt: str) -> None:
         self._log.append(txt)
-        if m := self._re_start.match(txt):
+        if step := parse_step(txt):
+            key, index, total = step
+            self.step_starts.append((key, time.perf_counter()))
+            if self.estimator:
+                self.estimator.start_step(key, index, total)
+        elif m := self._re_start.match(txt):
             self._t0[m.group(1)] = time.perf_counter()
         elif m := self._re_end.match(txt):
             algo = m.group(1)
@@ -66,6 +88,16 @@ class TimingFeedback(QgsProcessingFeedback):
                 self.times[algo] = time.perf_counter() - self._t0.pop(algo)
 
     # ---------- méthodes surchargées ----------
+    def setProgressText(self, txt: str) -> None:
+        # le modèle annonce chaque enfant ici (« Running … [i/n] »)
+        self._handle(txt)
+        super().setProgressText(txt)
+
+    def pushInfo(self, txt: str) -> None:
+        self._handle(txt)
+        self._log_to_qgis(txt)
+        super().pushInfo(txt)
+
     def info(self, txt: str) -> None:
         self._handle(txt)
         self._log_to_qgis(txt)
@@ -86,6 +118,15 @@ class TimingFeedback(QgsProcessingFeedback):
         """Retourne les *n* derniers messages du log interne."""
         return "\n".join(self._log[-n:])
 
+    def step_durations(self, end: float | None = None) -> dict[str, float]:
+        """Durée (s) de chaque enfant : écart entre deux débuts successifs."""
+        end = time.perf_counter() if end is None else end
+        stamps = self.step_starts + [("", end)]
+        return {
+            key: t_next - t
+            for (key, t), (_, t_next) in zip(stamps, stamps[1:])
+        }
+
 class ProgressLineWebp(QWidget):
     """
     Barre façon YouTube :
@@ -175,7 +216,19 @@ class ProgressLineWebp(QWidget):
     def resizeEvent(self, e):
         super().resizeEvent(e)
         self.set_progress(self._pct)
-        
+
+
+class ProgressDialog(QDialog):
+    """
+    Fenêtre de progression d’un lot : Échap, la croix et le bouton
+    « Annuler » demandent l’annulation (signal cancelRequested) sans fermer ;
+    la fenêtre reste ouverte jusqu’à l’arrêt effectif de la tâche.
+    """
+    cancelRequested = pyqtSignal()
+
+    def reject(self):
+        self.cancelRequested.emit()
+
 class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
     """Dock principal du plugin Gestionnaire P.I."""
 
@@ -183,6 +236,16 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
     _task_signals_connected = False
     _layers_signals_connected = False
 
+    # Délai de regroupement des ajouts / suppressions de couches (ms)
+    LAYERS_DEBOUNCE_MS = 200
+
+    # Préfixes à sélectionner en priorité, par combo (casse respectée)
+    DEFAULT_PREFIXES = {
+        "combo_troncons": ["lineaires"],
+        "combo_zones":    ["Zone_detection"],
+        "combo_folios":   ["Folios"],
+    }
+
     # ────────────────────────────── INIT ──────────────────────────────
     def __init__(self, plugin):
         super().__init__(None)
@@ -194,6 +257,8 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self.current_task: QgsProcessingAlgRunnerTask | None = None
         self.current_context: QgsProcessingContext | None = None
         self._task_start_time: float | None = None
+        self._loader_task: ResultLayersTask | None = None
+        self._estimator: ProgressEstimator | None = None
 
         # Au moins 1 thread Processing
         qs = QgsSettings()
@@ -205,10 +270,19 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             QgsApplication.taskManager().allTasksFinished.connect(self._on_all_tasks_finished)
             GestionnairePiDockWidget._task_signals_connected = True
 
+        # Delta de couches en attente, appliqué d’un bloc par un minuteur
+        # anti-rebond (chargement d’un gros projet, résultats d’un lot…)
+        self._pending_added: dict[str, QgsVectorLayer] = {}
+        self._pending_removed: set[str] = set()
+        self._layers_timer = QTimer(self)
+        self._layers_timer.setSingleShot(True)
+        self._layers_timer.setInterval(self.LAYERS_DEBOUNCE_MS)
+        self._layers_timer.timeout.connect(self._apply_layers_delta)
+
         if not GestionnairePiDockWidget._layers_signals_connected:
             prj = QgsProject.instance()
-            prj.layersAdded.connect(self._on_layers_changed)
-            prj.layersWillBeRemoved.connect(self._on_layers_changed)
+            prj.layersAdded.connect(self._on_layers_added)
+            prj.layersWillBeRemoved.connect(self._on_layers_removed)
             GestionnairePiDockWidget._layers_signals_connected = True
 
         # Préremplissage UI
@@ -235,6 +309,7 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self.btn_browse_default_output.clicked.connect(self.select_default_output_folder)
         self.btn_browse_default_styles.clicked.connect(self.select_default_styles_folder)
         self.btn_save_settings.clicked.connect(self.save_settings)
+        self.btn_rapport_perf.clicked.connect(self.export_performance_report)
         self.btn_param_retour.clicked.connect(self.show_main_menu)
 
         if self.combo_theme:
@@ -246,76 +321,118 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
     def _on_all_tasks_finished(self):
         QgsMessageLog.logMessage("[GestionnairePi] ► Toutes les tâches terminées", "GestionnairePi", Qgis.Info)
 
-    # ─── MAJ combos selon pages ──────────────────────────────────────
-    def _on_layers_changed(self, *args):
-        page = self.stackedWidget.currentWidget()
-        if page == self.page_annexe6:
-            self.populate_layer_combos()
-        elif page == self.page_creation_lot:
-            self.populate_creation_lot_combos()
+    # ─── MAJ incrémentale des combos ─────────────────────────────────
+    def _on_layers_added(self, layers):
+        for lyr in layers:
+            if isinstance(lyr, QgsVectorLayer):
+                self._pending_removed.discard(lyr.id())
+                self._pending_added[lyr.id()] = lyr
+        self._layers_timer.start()
+
+    def _on_layers_removed(self, layer_ids):
+        for lid in layer_ids:
+            # ajout puis retrait dans la même fenêtre : rien à faire
+            if self._pending_added.pop(lid, None) is None:
+                self._pending_removed.add(lid)
+        self._layers_timer.start()
+
+    def _apply_layers_delta(self):
+        """Applique aux combos le seul delta de couches accumulé."""
+        added, removed = self._pending_added, self._pending_removed
+        self._pending_added, self._pending_removed = {}, set()
+
+        to_select = set()
+        combos = self._layer_combos()
+        for combo in combos:
+            combo.blockSignals(True)
+        try:
+            # 1. Retraits (repérés par l’id de couche stocké en userData)
+            for lid in removed:
+                for combo in combos:
+                    idx = combo.findData(lid)
+                    if idx == -1:
+                        continue
+                    if idx == combo.currentIndex():
+                        to_select.add(combo)
+                    combo.removeItem(idx)
+
+            # 2. Ajouts, filtrés par type de géométrie
+            for lid, lyr in added.items():
+                for combo in self._combos_for_layer(lyr):
+                    if combo.findData(lid) != -1:
+                        continue
+                    combo.addItem(lyr.name(), lid)
+                    prefixes = self.DEFAULT_PREFIXES.get(combo.objectName(), [])
+                    if self._starts_with_any(lyr.name(), prefixes) and \
+                            not self._starts_with_any(combo.currentText(), prefixes):
+                        to_select.add(combo)
+
+            # 3. Sélection par préfixe uniquement là où elle a pu changer
+            for combo in to_select:
+                self._select_default(combo)
+        finally:
+            for combo in combos:
+                combo.blockSignals(False)
 
     # ─── Peuplement combos ───────────────────────────────────────────
+    def _layer_combos(self) -> list[QtWidgets.QComboBox]:
+        return [
+            self.combo_troncons, self.combo_zones, self.combo_folios,
+            self.combo_emprises, self.combo_lineaires_me,
+        ]
+
+    def _combos_for_layer(self, lyr) -> list[QtWidgets.QComboBox]:
+        """Combos susceptibles de proposer *lyr*, selon sa géométrie."""
+        if not isinstance(lyr, QgsVectorLayer):
+            return []
+        geom = QgsWkbTypes.geometryType(lyr.wkbType())
+        if geom == QgsWkbTypes.LineGeometry:
+            return [self.combo_troncons, self.combo_lineaires_me]
+        if geom == QgsWkbTypes.PolygonGeometry:
+            return [self.combo_zones, self.combo_folios, self.combo_emprises]
+        return []
+
+    def _fill_combos(self, combos: list[QtWidgets.QComboBox]):
+        """Reconstruction complète (ouverture de page) des combos donnés."""
+        for combo in combos:
+            combo.clear()
+        for lyr in QgsProject.instance().mapLayers().values():
+            for combo in self._combos_for_layer(lyr):
+                if combo in combos:
+                    combo.addItem(lyr.name(), lyr.id())
+
+    @staticmethod
+    def _starts_with_any(text: str, prefixes: list[str]) -> bool:
+        return any(text.startswith(pfx) for pfx in prefixes)
+
+    def _select_default(self, combo: QtWidgets.QComboBox):
+        """
+        Sélectionne la première entrée dont le texte commence par l’un
+        des préfixes de `DEFAULT_PREFIXES` ; sinon, si la combo n’est pas
+        vide, on choisit l’index 0.
+        """
+        for pfx in self.DEFAULT_PREFIXES.get(combo.objectName(), []):
+            # Qt.MatchStartsWith → « commence par » (sensible à la casse)
+            idx = combo.findText(pfx, Qt.MatchStartsWith | Qt.MatchCaseSensitive)
+            if idx != -1:
+                combo.setCurrentIndex(idx)
+                return
+        if combo.count():
+            combo.setCurrentIndex(0)
+
     def populate_layer_combos(self):
         """
         Remplit les trois QComboBox (tronçons, zones, folios) et place
         automatiquement la sélection sur la première couche dont le nom
-        *commence par* l’un des préfixes indiqués dans `defaults`.
+        *commence par* l’un des préfixes indiqués dans `DEFAULT_PREFIXES`.
         """
-        # 0. Nettoyage
-        self.combo_troncons.clear()
-        self.combo_zones.clear()
-        self.combo_folios.clear()
-
-        # 1. Remplissage
-        for lyr in QgsProject.instance().mapLayers().values():
-            if not isinstance(lyr, QgsVectorLayer):
-                continue
-
-            geom = QgsWkbTypes.geometryType(lyr.wkbType())
-            if geom == QgsWkbTypes.LineGeometry:
-                self.combo_troncons.addItem(lyr.name())
-            elif geom == QgsWkbTypes.PolygonGeometry:
-                self.combo_zones.addItem(lyr.name())
-                self.combo_folios.addItem(lyr.name())
-
-        # 2. Préfixes à détecter en priorité
-        defaults = {
-            "troncons": ["lineaires"],        # préfixes souhaités (minuscules ou pas)
-            "zones":    ["Zone_detection"],
-            "folios":   ["Folios"],
-        }
-
-        def _select(combo: QtWidgets.QComboBox, prefixes: list[str]):
-            """
-            Sélectionne la première entrée dont le texte commence par l’un
-            des préfixes donnés ; sinon, si la combo n’est pas vide, on
-            choisit l’index 0.
-            """
-            for pfx in prefixes:
-                # Qt.MatchStartsWith → « commence par »
-                # (la recherche est sensible à la casse par défaut ; enlevez
-                #  Qt.MatchCaseSensitive si vous préférez l’ignorer)
-                idx = combo.findText(pfx, Qt.MatchStartsWith | Qt.MatchCaseSensitive)
-                if idx != -1:
-                    combo.setCurrentIndex(idx)
-                    return
-            if combo.count():
-                combo.setCurrentIndex(0)
-
-        _select(self.combo_troncons, defaults["troncons"])
-        _select(self.combo_zones,    defaults["zones"])
-        _select(self.combo_folios,   defaults["folios"])
+        combos = [self.combo_troncons, self.combo_zones, self.combo_folios]
+        self._fill_combos(combos)
+        for combo in combos:
+            self._select_default(combo)
 
     def populate_creation_lot_combos(self):
-        self.combo_emprises.clear()
-        self.combo_lineaires_me.clear()
-        for lyr in QgsProject.instance().mapLayers().values():
-            if isinstance(lyr, QgsVectorLayer):
-                geom = QgsWkbTypes.geometryType(lyr.wkbType())
-                if geom == QgsWkbTypes.PolygonGeometry:
-                    self.combo_emprises.addItem(lyr.name())
-                elif geom == QgsWkbTypes.LineGeometry:
-                    self.combo_lineaires_me.addItem(lyr.name())
+        self._fill_combos([self.combo_emprises, self.combo_lineaires_me])
 
     # ─── Navigation UI ───────────────────────────────────────────────
     def show_main_menu(self):
@@ -393,6 +510,8 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
     # ─── Lancement de la tâche Processing ────────────────────────────
     def _start_processing_task(self):
+        if not hasattr(self, "progress_dialog"):
+            return      # annulé avant le lancement
         self._task_start_time = time.time()
 
         params = {
@@ -404,6 +523,7 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             "georeferencement": self.combo_georef.currentIndex(),
             "dossier_sortie": self.line_output.text(),
             "dossier_styles": self.line_styles.text(),
+            "tolerance_simplification": self.settings.get_simplify_tolerance(),
         }
 
         alg_id = "gestionnaire_pi_models:Principale"
@@ -413,24 +533,149 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
             QMessageBox.critical(self, "Erreur", f"Algorithme introuvable : {alg_id}")
             return
 
+        # Entrées sans index spatial : création avant le lancement
+        indexed = ensure_spatial_indexes(
+            [params["emprises"], params["lineaires_me"], *params["lineaires"]]
+        )
+        if indexed:
+            QgsMessageLog.logMessage(
+                f"[GestionnairePi] Index spatial créé : {', '.join(indexed)}",
+                "GestionnairePi", Qgis.Info
+            )
+
+        # Linéaires lus sur l’emprise des plans du lot (requête rectangle)
+        if self.settings.get_extent_pushdown():
+            codes = [c.strip() for c in params["insee"].split(";") if c.strip()]
+            params["emprise_lineaires"] = extent_parameter(
+                emprise_extent(params["emprises"], codes), params["emprises"].crs()
+            )
+
+        input_layers = [params["emprises"], params["lineaires_me"], *params["lineaires"]]
+        single_package = self.settings.get_single_package()
+
+        # Points de reprise : même lot (modèle, entrées, paramètres) → reprise
+        ckpt_dir = lot_checkpoint_dir(self.settings, params["dossier_sortie"])
+        resume, resumed = None, []
+        if ckpt_dir:
+            fingerprint = run_fingerprint(alg, params, single_package=single_package)
+            resume, resumed = resume_config(ckpt_dir, fingerprint)
+
+        alg, in_memory = prepare_lot_model(
+            alg, input_layers, self.settings.get_memory_budget_mb(), single_package,
+            checkpoint_dir=ckpt_dir,
+        )
+        if in_memory:
+            QgsMessageLog.logMessage(
+                "[GestionnairePi] Couches intermédiaires gardées en mémoire",
+                "GestionnairePi", Qgis.Info
+            )
+
         context = QgsProcessingContext()
         context.setProject(QgsProject.instance())
-        feedback = TimingFeedback()          
+        if resume is not None:
+            context.setModelInitialRunConfig(resume)
+            QgsMessageLog.logMessage(
+                f"[GestionnairePi] Reprise du lot : {len(resumed)} étape(s) déjà faite(s) "
+                f"({', '.join(resumed)})",
+                "GestionnairePi", Qgis.Info
+            )
 
+        # Durées historiques normalisées par le volume d’entrée du lot
+        input_counts = {
+            lyr.name(): max(lyr.featureCount(), 0) for lyr in input_layers
+        }
+        self._estimator = ProgressEstimator(
+            self.settings.get_child_timings(), sum(input_counts.values())
+        )
+        feedback = TimingFeedback(estimator=self._estimator)
+
+        sampler = MemorySampler().start()     # pic mémoire de ce lot
         task = QgsProcessingAlgRunnerTask(alg, params, context, feedback)
         self.current_task, self.current_context = task, context
-        task.progressChanged.connect(self.progress_line.set_progress)
+        task.progressChanged.connect(self._on_task_progress)
+        run = {}      # infos partagées entre les callbacks (historique)
+        # heure d’annulation : les sorties écrites après ne sont pas reprises
+        feedback.canceled.connect(lambda: run.setdefault("canceled_at", time.time()))
+
+        # Callback : couches résultats prêtes → un seul ajout, canvas gelé
+        def _on_layers_ready(layers: list[QgsVectorLayer], error: str | None):
+            self._loader_task = None
+            peak_mb = sampler.stop()
+            if error is not None:
+                QMessageBox.critical(
+                    self, "Erreur",
+                    f"{error}\nLes fichiers du lot sont dans {params['dossier_sortie']}."
+                )
+                return
+            canvas = self.plugin.iface.mapCanvas()
+            canvas.freeze(True)
+            try:
+                QgsProject.instance().addMapLayers(layers)
+            finally:
+                canvas.freeze(False)
+            canvas.refresh()
+
+            # Historique local des exécutions
+            phases = dict(run["phases"])
+            phases["Chargement des résultats"] = time.perf_counter() - run["t_load"]
+            try:
+                record_run(
+                    KIND_LOT, self._task_start_time, time.time() - self._task_start_time,
+                    input_counts, phases, run["outputs"], peak_memory_mb=peak_mb,
+                )
+            except Exception as e:
+                QgsMessageLog.logMessage(
+                    f"[GestionnairePi] Historique non enregistré : {e}",
+                    "GestionnairePi", Qgis.Warning
+                )
+
+            # ───────── 4.  message récapitulatif ─────────
+            d = int(time.time() - self._task_start_time)
+
+            QMessageBox.information(
+                self,
+                "Succès",
+                f"{len(layers)} couche(s) chargée(s).\n"
+                f"Durée : {format_duration(d)}"
+            )
 
         # 4) Callback exécuté sur le thread principal
         def _on_executed(success: bool, results: dict[str, object]):
             self._close_progress_dialog()
+            self.current_task = self.current_context = None
             if not success:
-                QMessageBox.critical(self, "Erreur", feedback.text() or "Échec du traitement.")
+                sampler.stop()
+                canceled = feedback.isCanceled()
+                message = "Traitement annulé." if canceled \
+                    else feedback.text() or "Échec du traitement."
+                if ckpt_dir:
+                    try:
+                        done = save_checkpoint(ckpt_dir, fingerprint, context.modelResult(),
+                                               canceled_at=run.get("canceled_at"))
+                        message += (f"\n\n{done} étape(s) conservée(s) : relancer le même "
+                                    f"lot pour reprendre après elles.")
+                    except Exception as e:
+                        QgsMessageLog.logMessage(
+                            f"[GestionnairePi] Point de reprise non enregistré : {e}",
+                            "GestionnairePi", Qgis.Warning
+                        )
+                if canceled:
+                    self._discard_temporary_outputs(context, ckpt_dir)
+                    QMessageBox.information(self, "Annulation", message)
+                else:
+                    QMessageBox.critical(self, "Erreur", message)
                 return
+            clear_checkpoint(ckpt_dir)
 
             proj         = QgsProject.instance()
             child        = results.get("CHILD_RESULTS", {})
-            loaded       = 0
+
+            # Historique des durées par enfant (pondération des lots suivants)
+            run["phases"] = feedback.step_durations()
+            run["t_load"] = time.perf_counter()
+            self.settings.set_child_timings(
+                self._estimator.updated_history(run["phases"])
+            )
 
             # ───────── 1.  couches vecteur finales (déjà stylées) ─────────
 
@@ -447,87 +692,32 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
 
 
             # --- 1. mapping « style » → « savefeatures » -------------------------
-            outputs = { # ordonné selon l'ordre du premier au dernier chargé
-                'lin': child['native:savefeatures_1']['OUTPUT'], 
-                'fol': child['native:savefeatures_2']['OUTPUT'],
-                'zon': child['native:savefeatures_3']['OUTPUT'],
-            }
+            # ordonné selon l'ordre du premier au dernier chargé
+            outputs = dict(zip(('lin', 'fol', 'zon'), lot_outputs(child, single_package)))
             style_dir = params["dossier_styles"]
+            run["outputs"] = [
+                *dict.fromkeys(src.split("|")[0] for src in outputs.values()),
+                child.get("gestionnaire_pi:exportcsv_1", {}).get("OUTPUT"),
+            ]
+            styles = {
+                'lin': "Lineaire.qml",
+                'fol': "Folios.qml",
+                'zon': "Zone_detection.qml",
+            }
 
-            for k, gpkg in outputs.items():
-
-                # 1. Chemin du .qml – d’abord
-                qml = os.path.join(
-                    style_dir,
-                    "Lineaire.qml"        if k == "lin" else
-                    "Folios.qml"          if k == "fol" else
-                    "Zone_detection.qml"  # k == "zon"
-                )
-
-                # 2. Ouverture du GeoPackage
-                name   = os.path.splitext(os.path.basename(gpkg))[0]   # joli nom dans la Légende
-                vlayer = QgsVectorLayer(gpkg, name, "ogr")
-                if not vlayer.isValid():
-                    QgsMessageLog.logMessage(f"⚠️ Impossible d’ouvrir {gpkg}", "GestionnairePi", Qgis.Warning)
-                    continue
-
-                # 3. Application + sauvegarde du style
-                ok, _ = vlayer.loadNamedStyle(qml)
-                if not ok:
-                    QgsMessageLog.logMessage(f"⚠️ Style manquant : {qml}", "GestionnairePi", Qgis.Warning)
-                else:
-                    vlayer.saveStyleToDatabase('default', '', '', True)   # stocke le QML dans le gpkg
-
-                # 4. Ajout au projet
-                QgsProject.instance().addMapLayer(vlayer)
-                loaded += 1
-
-            # ───────── 2.  Ré-enregistrement du CSV (écrasement) ─────────
-            csv_path = child.get("native:savefeatures_4", {}).get("FILE_PATH")
-            if csv_path and os.path.exists(csv_path):
-                try:
-                    import csv, tempfile, shutil
-                    # On ré-enregistre le fichier avec nos paramètres : UTF-8, délimiteur « ; », tout en texte
-                    fd, tmp_path = tempfile.mkstemp(suffix=".csv")
-                    os.close(fd)
-
-                    with open(csv_path, "r", encoding="utf-8", newline="") as src, \
-                         open(tmp_path, "w", encoding="utf-8", newline="") as dst:
-                        reader = csv.reader(src, delimiter=";")
-                        writer = csv.writer(dst, delimiter=";", quoting=csv.QUOTE_NONE)
-                        for row in reader:
-                            writer.writerow(row)
-
-                    # Remplace l'ancien fichier par la nouvelle version
-                    shutil.move(tmp_path, csv_path)
-                except Exception as e:
-                    QgsMessageLog.logMessage(
-                        f"[GestionnairePi] Ré-enregistrement CSV échoué : {e}",
-                        "GestionnairePi", Qgis.Warning
-                    )
-
-            # ───────── 4.  message récapitulatif ─────────
-            d = int(time.time() - self._task_start_time)
-
-            # helper local pour formater la durée (> 1 h → « 1 h 05 min 12 s »)
-            def _fmt(seconds: int) -> str:
-                h, rem = divmod(seconds, 3600)
-                m, s   = divmod(rem, 60)
-                return f"{h} h {m:02d} min {s:02d} s" if h else f"{m:02d} min {s:02d} s"
-
-            QMessageBox.information(
-                self,
-                "Succès",
-                f"{loaded} couche(s) chargée(s).\n"
-                f"Durée : {_fmt(d)}"
+            # Ouverture + style en tâche de fond, ajout groupé au retour
+            self._loader_task = ResultLayersTask(
+                [(gpkg, os.path.join(style_dir, styles[k])) for k, gpkg in outputs.items()],
+                _on_layers_ready,
             )
+            QgsApplication.taskManager().addTask(self._loader_task)
 
         task.executed.connect(_on_executed)
         QgsApplication.taskManager().addTask(task)
 
     # ─── Progress dialog ─────────────────────────────────────────────
     def _show_progress_dialog(self):
-        self.progress_dialog = QDialog(self)
+        self.progress_dialog = ProgressDialog(self)
         self.progress_dialog.setWindowTitle("Traitement en cours")
         self.progress_dialog.setWindowModality(Qt.ApplicationModal)
         self.progress_dialog.setWindowFlags(
@@ -555,13 +745,76 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         )
         label_text.setAlignment(Qt.AlignCenter)
         layout.addWidget(label_text)
+        self.progress_label = label_text
+
+        # — temps restant estimé (rempli au fil de la progression) —
+        self.progress_eta = QLabel("", self.progress_dialog)
+        self.progress_eta.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.progress_eta)
+
+        # — annulation : relayée au feedback du modèle par la tâche —
+        self.progress_buttons = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.Cancel, self.progress_dialog
+        )
+        self.progress_buttons.rejected.connect(self.progress_dialog.reject)
+        layout.addWidget(self.progress_buttons)
+        self.progress_dialog.cancelRequested.connect(self._cancel_processing)
 
         self.progress_dialog.show()
 
+    def _cancel_processing(self):
+        """Annule la tâche en cours ; la fenêtre se ferme à son arrêt."""
+        task = self.current_task
+        if task is None:
+            # tâche pas encore créée (lancement différé) ou déjà terminée
+            self._close_progress_dialog()
+            return
+        if hasattr(self, "progress_dialog"):
+            self.progress_buttons.setEnabled(False)
+            self.progress_label.setText("Annulation en cours…\nArrêt de l’étape en cours.")
+            self.progress_eta.setText("")
+        QgsMessageLog.logMessage(
+            "[GestionnairePi] Annulation demandée", "GestionnairePi", Qgis.Info
+        )
+        task.cancel()
+
+    def _discard_temporary_outputs(self, context: QgsProcessingContext, ckpt_dir: str | None):
+        """Libère les intermédiaires d’un lot annulé (mémoire, fichiers temporaires)."""
+        context.temporaryLayerStore().removeAllMapLayers()
+        if ckpt_dir:
+            # étapes terminées gardées pour une reprise, sortie partielle supprimée
+            prune_checkpoint(ckpt_dir)
+            return
+        if not RESUME_SUPPORTED:
+            return
+        temp_dir = os.path.normcase(QgsProcessingUtils.tempFolder())
+        for result in context.modelResult().childResults().values():
+            for value in result.outputs().values():
+                path = value.split("|")[0] if isinstance(value, str) else ""
+                if path and os.path.normcase(path).startswith(temp_dir) and os.path.isfile(path):
+                    try:
+                        os.remove(path)
+                    except OSError as e:
+                        QgsMessageLog.logMessage(
+                            f"[GestionnairePi] Impossible de supprimer {path}: {e}",
+                            "GestionnairePi", Qgis.Warning
+                        )
+
+    def _on_task_progress(self, raw_pct: float):
+        """Progression brute du modèle → barre pondérée + temps restant."""
+        if not hasattr(self, "progress_dialog"):
+            return
+        pct, eta = (raw_pct, None) if self._estimator is None \
+            else self._estimator.estimate(raw_pct)
+        self.progress_line.set_progress(pct)
+        self.progress_eta.setText(
+            f"Temps restant estimé : {format_duration(eta)}" if eta is not None else ""
+        )
+
     def _close_progress_dialog(self):
         if hasattr(self, "progress_dialog"):
             dlg = self.progress_dialog
-            QMetaObject.invokeMethod(dlg, "close", Qt.QueuedConnection)
+            QMetaObject.invokeMethod(dlg, "accept", Qt.QueuedConnection)
             QMetaObject.invokeMethod(dlg, "deleteLater", Qt.QueuedConnection)
             del self.progress_dialog
 
@@ -581,6 +834,13 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self.line_default_output.setText(self.settings.get_output_folder())
         self.line_default_styles.setText(self.settings.get_styles_folder())
         self.check_logs.setChecked(self.settings.get_log_detail())
+        self.spin_annexe6_chunk.setValue(self.settings.get_annexe6_chunk_size())
+        self.spin_simplify_tolerance.setValue(self.settings.get_simplify_tolerance())
+        self.spin_memory_budget.setValue(self.settings.get_memory_budget_mb())
+        self.check_single_package.setChecked(self.settings.get_single_package())
+        self.check_extent_pushdown.setChecked(self.settings.get_extent_pushdown())
+        self.check_checkpoint.setChecked(self.settings.get_checkpoint())
+        self.check_checkpoint.setEnabled(RESUME_SUPPORTED)
         self.current_color = self.settings.get_color()
         self.setStyleSheet(f"background-color: {self.current_color.name()};")
         if hasattr(self, "label_color"):
@@ -597,10 +857,34 @@ class GestionnairePiDockWidget(QtWidgets.QDockWidget, FORM_CLASS):
         self.settings.set_output_folder(self.line_default_output.text())
         self.settings.set_styles_folder(self.line_default_styles.text())
         self.settings.set_log_detail(self.check_logs.isChecked())
+        chunk_size = chunk_size_setting(self.spin_annexe6_chunk.value())
+        self.spin_annexe6_chunk.setValue(chunk_size)
+        self.settings.set_annexe6_chunk_size(chunk_size)
+        self.settings.set_simplify_tolerance(self.spin_simplify_tolerance.value())
+        self.settings.set_memory_budget_mb(self.spin_memory_budget.value())
+        self.settings.set_single_package(self.check_single_package.isChecked())
+        self.settings.set_extent_pushdown(self.check_extent_pushdown.isChecked())
+        self.settings.set_checkpoint(self.check_checkpoint.isChecked())
         self.settings.set_color(self.current_color)
         if self.combo_theme:
             self.settings.set_theme(self.combo_theme.currentText())
 
+    def export_performance_report(self):
+        """Exporte l’historique des exécutions en HTML et l’ouvre."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Rapport de performances",
+            os.path.join(self.settings.get_output_folder(), "performances_gestionnaire_pi.html"),
+            "HTML (*.html)",
+        )
+        if not path:
+            return
+        try:
+            export_html_report(path)
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Rapport impossible : {e}")
+            return
+        QDesktopServices.openUrl(QUrl.fromLocalFile(path))
+
     def select_default_output_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Sélectionner le dossier de sortie")
         if folder: